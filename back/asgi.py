@@ -0,0 +1,390 @@
+"""ASGI-режим сервера.
+
+GET /appointment, /clients и /services обслуживаются асинхронно на движке SQLAlchemy с asyncpg:
+пока база выполняет запрос, рабочий процесс принимает другие соединения, и число одновременных
+клиентов ограничено пулом соединений (ASYNC_POOL_SIZE + ASYNC_MAX_OVERFLOW), а не числом потоков.
+Все остальные маршруты передаются в Flask-приложение через WsgiToAsgi.
+
+Списки кодируются так же, как во Flask-версии (back/encoding.py): JSON или MessagePack по Accept,
+сжатие gzip/deflate по Accept-Encoding.
+
+GET /events тоже обслуживается в цикле событий: подписчик рассыльщика - asyncio.Queue, поэтому
+открытое подключение не занимает ни поток, ни соединение с базой.
+
+    uvicorn --factory back.asgi:create_asgi_app --workers 4
+
+Проверка токена та же, что у cached_jwt_required() и role_required(): общий кэш проверенных
+токенов, список отозванных jti и роль из claims; тела ошибок совпадают с Flask-версией.
+"""
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+import jwt
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from back.app import create_app
+from back.changes import CHANGE_CURSOR
+from back.encoding import StreamEncoder, choose_coding, choose_mimetype, encode_rows, representation_tag
+from back.events import HEARTBEAT, format_event, get_broker, initial_events
+from back.metrics import registry
+from back.queries import (
+    APPOINTMENT_FIELDS, APPOINTMENT_SORTS, CLIENT_FIELDS, CLIENT_LIST, SERVICE_FIELDS, SERVICE_LIST,
+    appointment_filters, appointment_list, appointment_values, client_values, service_values
+)
+from back.tokens import get_token_cache, is_revoked
+from back.utils import decode_cursor, encode_cursor, get_role_id
+from back.versions import VERSION_SELECT, cached_version, remember_version
+
+
+class HTTPError(Exception):
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+
+def async_database_url(url):
+    """URL синхронного движка с драйвером asyncpg"""
+    return make_url(url).set(drivername='postgresql+asyncpg')
+
+
+class AsyncSubscriber:
+    """Подписчик рассыльщика событий для цикла asyncio: deliver() вызывается из потока рассыльщика"""
+
+    def __init__(self, size, loop):
+        self.queue = asyncio.Queue(size)
+        self.loop = loop
+        self.overflowed = False
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Цикл событий уже закрыт (процесс останавливается): подписчик отключается
+            return False
+        return True
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+class AsyncReadApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi_app = WsgiToAsgi(flask_app)
+        self.engine = create_async_engine(
+            async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI']),
+            pool_size=flask_app.config['ASYNC_POOL_SIZE'],
+            max_overflow=flask_app.config['ASYNC_MAX_OVERFLOW'],
+        )
+        # (метод, путь) -> (обработчик, допустимые роли; None - любая)
+        self.routes = {
+            ('GET', '/appointment'): (self.get_appointment, None),
+            ('GET', '/clients'): (self.get_clients, [1, 2]),
+            ('GET', '/services'): (self.get_services, None),
+            ('GET', '/events'): (self.stream_events, None),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        route = self.routes.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+        if route is None:
+            await self.wsgi_app(scope, receive, send)
+            return
+
+        handler, role_ids = route
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+        params = parse_qs(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+        started = time.perf_counter()
+        response = {'status': 500}
+
+        async def send_and_remember(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            await send(message)
+
+        try:
+            await self.authenticate(headers, role_ids)
+            await handler(headers, params, send_and_remember, receive)
+        except HTTPError as e:
+            await self.send_json(send_and_remember, e.status, e.body)
+        except Exception as e:
+            print(f"Error in {scope['path']}: {e}")
+            await self.send_json(send_and_remember, 500, {"message": "Ошибка на сервере"})
+        finally:
+            # Те же метрики, что у Flask-маршрутов (back/metrics.py), но без времени в базе: замеры SQL
+            # привязаны к контексту запроса Flask. Поток событий учитывается только ответом
+            values = {}
+            if scope['path'] != '/events':
+                values['nail_salon_request_duration_seconds'] = time.perf_counter() - started
+            registry.observe(scope['path'], scope['method'], response['status'], values)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def authenticate(self, headers, role_ids):
+        """Проверка токена как в cached_jwt_required() + role_required(); возвращает claims.
+
+        Токен из кэша проверяется в цикле событий; проверка подписи нового токена выполняется
+        в потоке, чтобы не задерживать другие подключения.
+        """
+        header = headers.get('authorization', '')
+        if not header.startswith('Bearer '):
+            raise HTTPError(401, {"msg": "Missing Authorization Header"})
+        token = header[len('Bearer '):].strip()
+
+        with self.flask_app.app_context():
+            entry = get_token_cache().get(token)
+        if entry is None:
+            claims = await asyncio.to_thread(self.verify_token, token)
+        else:
+            claims = entry[1]
+
+        with self.flask_app.app_context():
+            if is_revoked(claims):
+                raise HTTPError(401, {"msg": "Token has been revoked"})
+        if role_ids is not None and get_role_id(claims) not in role_ids:
+            raise HTTPError(403, {"message": "Доступ запрещен"})
+        return claims
+
+    def verify_token(self, token):
+        """Проверяет подпись и срок токена и кладет его в кэш; возвращает claims"""
+        with self.flask_app.app_context():
+            try:
+                claims = decode_token(token)
+            except jwt.ExpiredSignatureError:
+                raise HTTPError(401, {"msg": "Token has expired"})
+            except (jwt.InvalidTokenError, JWTExtendedException) as e:
+                raise HTTPError(422, {"msg": str(e)})
+            if claims.get('type') == 'refresh':
+                raise HTTPError(422, {"msg": "Only non-refresh tokens are allowed"})
+            get_token_cache().put(token, jwt.get_unverified_header(token), claims)
+            return claims
+
+    def dumps(self, obj):
+        # Компактный JSON, как у jsonify()
+        return self.flask_app.json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    async def send_json(self, send, status, body, headers=()):
+        payload = self.dumps(body)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(payload)).encode('ascii')), *headers],
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+
+    def negotiate(self, headers):
+        """Формат и сжатие ответа по заголовкам запроса: (mimetype, Content-Encoding или None)"""
+        return choose_mimetype(headers.get('accept', '')), choose_coding(headers.get('accept-encoding', ''))
+
+    def encoding_headers(self, mimetype, coding):
+        encoding_headers = [(b'content-type', mimetype.encode('ascii')), (b'vary', b'Accept, Accept-Encoding')]
+        if coding:
+            encoding_headers.append((b'content-encoding', coding.encode('ascii')))
+        return encoding_headers
+
+    async def send_encoded(self, headers, send, fields, rows, extra_headers=()):
+        """Ответ 200 со списком строк в формате и сжатии, которые принимает клиент"""
+        config = self.flask_app.config
+        mimetype, coding = self.negotiate(headers)
+        payload, coding = encode_rows(fields, rows, mimetype, coding, config['RESPONSE_COMPRESS_LEVEL'],
+                                      config['RESPONSE_COMPRESS_MIN_SIZE'])
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [*self.encoding_headers(mimetype, coding),
+                        (b'content-length', str(len(payload)).encode('ascii')), *extra_headers],
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def table_version(self, table):
+        """Версия справочника для ETag; тот же кэш процесса, что у conditional_get()"""
+        version = cached_version(table, self.flask_app.config['TABLE_VERSION_TTL'])
+        if version is None:
+            async with self.engine.connect() as connection:
+                result = await connection.execute(text(VERSION_SELECT), {'table_name': table})
+                version = result.scalar() or 0
+            remember_version(table, version)
+        return version
+
+    async def send_reference(self, headers, send, table, sql, fields, to_values):
+        """Справочник целиком с ETag по версии таблицы и представлению, 304 при совпадении If-None-Match"""
+        etag = f'"{table}-{await self.table_version(table)}-{representation_tag(*self.negotiate(headers))}"'
+        etag_headers = [(b'etag', etag.encode('ascii')), (b'cache-control', b'no-cache')]
+        # Слабое сравнение (RFC 9110): префикс W/ не учитывается
+        if_none_match = [tag.strip().removeprefix('W/') for tag in headers.get('if-none-match', '').split(',')]
+        if etag in if_none_match or '*' in if_none_match:
+            await send({'type': 'http.response.start', 'status': 304,
+                        'headers': [*etag_headers, (b'vary', b'Accept, Accept-Encoding')]})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        async with self.engine.connect() as connection:
+            rows = (await connection.execute(text(sql))).all()
+        await self.send_encoded(headers, send, fields, [to_values(row) for row in rows], etag_headers)
+
+    async def get_clients(self, headers, params, send, receive):
+        await self.send_reference(headers, send, 'clients', CLIENT_LIST, CLIENT_FIELDS, client_values)
+
+    async def get_services(self, headers, params, send, receive):
+        await self.send_reference(headers, send, 'services', SERVICE_LIST, SERVICE_FIELDS, service_values)
+
+    async def get_appointment(self, headers, params, send, receive):
+        """Те же режимы и фильтры, что у Flask-версии: поток списка или страница по limit/after"""
+        config = self.flask_app.config
+        after = params.get('after', [None])[0]
+        limit = params.get('limit', [None])[0]
+        if limit is not None:
+            # Опечатка в limit не должна превращаться в выдачу всей таблицы потоком
+            if not limit.isdigit() or not 1 <= int(limit) <= config['APPOINTMENT_PAGE_MAX']:
+                raise HTTPError(400, {"message": f"limit должен быть от 1 до {config['APPOINTMENT_PAGE_MAX']}"})
+            limit = int(limit)
+
+        try:
+            conditions, query_params = appointment_filters({name: values[0] for name, values in params.items()})
+        except ValueError:
+            raise HTTPError(400, {"message": "Неверные параметры фильтра"})
+        sort = params.get('sort', ['date'])[0]
+        if sort not in APPOINTMENT_SORTS:
+            raise HTTPError(400, {"message": "sort должен быть date или -date"})
+        order, after_condition = APPOINTMENT_SORTS[sort]
+
+        if limit is None and after is None:
+            await self.stream_appointments(headers, send, appointment_list(conditions, order), query_params)
+            return
+
+        if limit is None:
+            limit = config['APPOINTMENT_PAGE_SIZE']
+
+        query_params['limit'] = limit + 1
+        if after:
+            try:
+                query_params['after_date'], query_params['after_id'] = decode_cursor(after)
+            except ValueError:
+                raise HTTPError(400, {"message": "Неверный курсор"})
+            conditions.append(after_condition)
+
+        cursor_headers = []
+        async with self.engine.connect() as connection:
+            if not after:
+                change_cursor = (await connection.execute(text(CHANGE_CURSOR))).scalar()
+                cursor_headers.append((b'x-change-cursor', change_cursor.encode('ascii')))
+            result = await connection.execute(
+                text(f"{appointment_list(conditions, order)} LIMIT :limit"), query_params
+            )
+            items = result.all()
+
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            cursor = encode_cursor(last.appointment_date, last.appointment_id)
+            cursor_headers.append((b'x-next-cursor', cursor.encode('ascii')))
+        await self.send_encoded(headers, send, APPOINTMENT_FIELDS, [appointment_values(item) for item in items],
+                                cursor_headers)
+
+    async def stream_appointments(self, headers, send, sql, query_params):
+        """Выборка по частям из курсора на стороне сервера (JSON-массив или MessagePack)"""
+        chunk_size = self.flask_app.config['APPOINTMENT_STREAM_CHUNK']
+        mimetype, coding = self.negotiate(headers)
+        encoder = StreamEncoder(mimetype, coding, self.flask_app.config['RESPONSE_COMPRESS_LEVEL'], APPOINTMENT_FIELDS)
+        async with self.engine.connect() as connection:
+            # Курсор берется до выборки: все, что изменится после, вернет /appointment/changes
+            change_cursor = (await connection.execute(text(CHANGE_CURSOR))).scalar()
+            result = await connection.stream(
+                text(sql),
+                query_params,
+                execution_options={'yield_per': chunk_size}
+            )
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [*self.encoding_headers(mimetype, coding),
+                                    (b'x-change-cursor', change_cursor.encode('ascii'))]})
+            try:
+                async for partition in result.partitions(chunk_size):
+                    chunk = encoder.encode([appointment_values(item) for item in partition])
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            except Exception as e:
+                # Заголовки уже отправлены - клиент получит оборванный (невалидный) ответ
+                print(f"Error while streaming /appointment: {e}")
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+            await send({'type': 'http.response.body', 'body': encoder.finish()})
+
+    def open_events(self, broker, subscriber, last_event_id):
+        """Подписка и первые события потока; выполняется в потоке, т.к. обращается к базе"""
+        if not broker.subscribe(subscriber):
+            return None
+        try:
+            with self.flask_app.app_context():
+                return initial_events(last_event_id), format_event('reset', {})
+        except Exception:
+            broker.unsubscribe(subscriber)
+            raise
+
+    async def stream_events(self, headers, params, send, receive):
+        """GET /events: те же события, что у Flask-версии"""
+        config = self.flask_app.config
+        broker = get_broker(self.flask_app)
+        subscriber = AsyncSubscriber(config['EVENTS_QUEUE_SIZE'], asyncio.get_running_loop())
+        last_event_id = headers.get('last-event-id') or params.get('last_event_id', [None])[0]
+        opened = await asyncio.to_thread(self.open_events, broker, subscriber, last_event_id)
+        if opened is None:
+            raise HTTPError(503, {"message": "Слишком много подключений"})
+        first_events, reset = opened
+
+        disconnected = asyncio.ensure_future(wait_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+            for message in first_events:
+                await send({'type': 'http.response.body', 'body': message.encode('utf-8'), 'more_body': True})
+            while True:
+                received = asyncio.ensure_future(subscriber.queue.get())
+                done, _ = await asyncio.wait({received, disconnected}, timeout=config['EVENTS_HEARTBEAT'],
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    received.cancel()
+                    return
+                if received not in done:
+                    received.cancel()
+                    message = HEARTBEAT
+                elif subscriber.overflowed:
+                    await send({'type': 'http.response.body', 'body': reset.encode('utf-8')})
+                    return
+                else:
+                    message = received.result()
+                await send({'type': 'http.response.body', 'body': message.encode('utf-8'), 'more_body': True})
+        finally:
+            disconnected.cancel()
+            broker.unsubscribe(subscriber)
+
+
+def create_asgi_app(config=None):
+    return AsyncReadApp(create_app(config))
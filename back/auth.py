@@ -1,11 +1,12 @@
-import json
+from concurrent.futures import TimeoutError as HashTimeout
 
-import bcrypt
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token
 from sqlalchemy import text
 
 from back.db import db
+from back.hashing import PoolSaturated, check_password, hash_password, needs_rehash
+from back.tokens import bearer_token, cached_jwt_required, get_claims, revoke_token
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -26,16 +27,18 @@ def register():
         if result:
             return jsonify({"message": "User already exists"}), 400
 
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = hash_password(password)
 
         db.session.execute(
             text("INSERT INTO users (username, password_hash, role_id) VALUES (:username, :password_hash, :role_id)"),
-            {"username": username, "password_hash": password_hash.decode('utf-8'), "role_id": role_id}
+            {"username": username, "password_hash": password_hash, "role_id": role_id}
         )
         db.session.commit()
 
         return jsonify({"message": "User registered successfully"}), 201
 
+    except (PoolSaturated, HashTimeout):
+        return server_busy()
     except Exception as e:
         return jsonify({"message": f"Server error: {str(e)}"}), 500
 
@@ -57,15 +60,42 @@ def login():
             password_hash = result[2]
             role_id = result[3]
 
-            if bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
-                identity = json.dumps({'user_id': str(user_id), 'role_id': role_id})
-                access_token = create_access_token(identity=identity)
+            if check_password(password, password_hash):
+                # Стоимость bcrypt в настройках изменилась - пересчитываем хеш, пока известен пароль.
+                # Если пул перегружен, пересчет откладывается до следующего входа.
+                if needs_rehash(password_hash):
+                    try:
+                        db.session.execute(
+                            text("UPDATE users SET password_hash = :password_hash WHERE user_id = :user_id"),
+                            {"password_hash": hash_password(password), "user_id": user_id}
+                        )
+                        db.session.commit()
+                    except (PoolSaturated, HashTimeout):
+                        pass
+
+                access_token = create_access_token(identity=str(user_id), additional_claims={'role_id': role_id})
                 return jsonify(access_token=access_token), 200
             else:
                 return jsonify({"message": "Неверное имя пользователя или пароль"}), 401
         else:
             return jsonify({"message": "Неверное имя пользователя или пароль"}), 401
 
+    except (PoolSaturated, HashTimeout):
+        return server_busy()
     except Exception as e:
         return jsonify({"message": f"Серверная ошибка: {str(e)}"}), 500
 
+
+@auth_bp.route('/logout', methods=['POST'])
+@cached_jwt_required()
+def logout():
+    revoke_token(get_claims(), bearer_token())
+    return jsonify({"message": "Выход выполнен"}), 200
+
+
+def server_busy():
+    """503 с Retry-After, когда пул хеширования паролей перегружен"""
+    response = jsonify({"message": "Сервер перегружен, повторите попытку позже"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
@@ -0,0 +1,101 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import text
+
+from back.db import db
+
+# Нижняя граница диапазона по appointment_date: запись, начавшаяся раньше, чем за самую
+# длинную услугу до начала интервала, пересечься с ним не может. Благодаря этой границе
+# запросы читают только диапазон индекса (master_id, appointment_date).
+LOOKBACK = "(SELECT COALESCE(MAX(duration), 0) FROM services) * INTERVAL '1 minute'"
+
+# Условие пересечения записи busy (с услугой busy_s) мастера {master} с интервалом
+# [{start}, {start} + {duration} мин). Используется в выборке занятых интервалов, при проверке
+# конфликта в create_appointment и при импорте записей пачкой.
+OVERLAP_CONDITION = f"""
+    busy.master_id = {{master}}
+    AND busy.appointment_date >= CAST({{start}} AS timestamp) - {LOOKBACK}
+    AND busy.appointment_date < CAST({{start}} AS timestamp) + {{duration}} * INTERVAL '1 minute'
+    AND busy.appointment_date + busy_s.duration * INTERVAL '1 minute' > CAST({{start}} AS timestamp)
+"""
+
+BUSY_INTERVALS = f"""
+    SELECT busy.appointment_date AS busy_start,
+           busy.appointment_date + busy_s.duration * INTERVAL '1 minute' AS busy_end
+    FROM appointments busy
+    JOIN services busy_s ON busy.service_id = busy_s.service_id
+    WHERE {OVERLAP_CONDITION.format(master=':master_id', start=':range_start', duration=':range_minutes')}
+    ORDER BY busy.appointment_date
+"""
+
+def parse_appointment_date(value):
+    """Разбирает дату записи: 'YYYY-MM-DD' или ISO-дату со временем. Бросает ValueError"""
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid appointment date: {value!r}")
+    return datetime.fromisoformat(value)
+
+
+def parse_time(value):
+    """Время 'HH:MM' из настроек приложения"""
+    return time.fromisoformat(value)
+
+
+def merge_intervals(intervals):
+    """Сливает отсортированные по началу интервалы (start, end) в непересекающиеся"""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def busy_intervals(master_id, range_start, range_end):
+    """Занятые интервалы мастера, пересекающиеся с [range_start, range_end), слитые и отсортированные"""
+    rows = db.session.execute(
+        text(BUSY_INTERVALS),
+        {
+            'master_id': master_id,
+            'range_start': range_start,
+            'range_minutes': int((range_end - range_start).total_seconds() // 60)
+        }
+    ).fetchall()
+    return merge_intervals((row.busy_start, row.busy_end) for row in rows)
+
+
+def free_slots(busy, day_start, day_end, duration, step):
+    """Свободные окна длительностью duration минут с шагом step минут внутри [day_start, day_end).
+
+    busy - слитые и отсортированные занятые интервалы (результат busy_intervals).
+    """
+    length = timedelta(minutes=duration)
+    step = timedelta(minutes=step)
+    slots = []
+    index = 0
+    start = day_start
+    while start + length <= day_end:
+        end = start + length
+        # Интервалы, закончившиеся до начала окна, дальше не понадобятся
+        while index < len(busy) and busy[index][1] <= start:
+            index += 1
+        if index < len(busy) and busy[index][0] < end:
+            # Окно пересекается с занятостью: переходим к первому шагу после ее окончания
+            busy_end = busy[index][1]
+            steps = -(-(busy_end - day_start) // step)
+            start = day_start + steps * step
+            continue
+        slots.append((start, end))
+        start += step
+    return slots
+
+
+def day_bounds(day, open_time, close_time):
+    """Начало и конец рабочего дня салона"""
+    if isinstance(day, datetime):
+        day = day.date()
+    if not isinstance(day, date):
+        day = date.fromisoformat(day)
+    return datetime.combine(day, open_time), datetime.combine(day, close_time)
+
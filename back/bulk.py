@@ -0,0 +1,528 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from itertools import islice
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from back.availability import OVERLAP_CONDITION, parse_appointment_date
+from back.db import db
+from back.reports import add_to_revenue
+from back.schedule import COMPLETE_APPOINTMENTS, refresh_schedule
+from back.tokens import cached_jwt_required
+from back.utils import role_required
+from back.versions import VERSIONED_TABLES, bump_version
+
+bulk_bp = Blueprint('bulk', __name__)
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+class RowError(ValueError):
+    """Ошибка в отдельной строке импорта; попадает в отчет, не прерывая загрузку"""
+
+
+def read_records():
+    """Записи из тела запроса: JSON-массив или поток NDJSON. Возвращает итератор (index, record)"""
+    if request.mimetype in NDJSON_MIMETYPES:
+        return _read_ndjson(request.stream)
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array or NDJSON stream")
+    return enumerate(data)
+
+
+def _read_ndjson(stream):
+    index = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError:
+            yield index, RowError("Неверный JSON")
+        index += 1
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _require(record, *fields):
+    if not isinstance(record, dict):
+        raise RowError("Ожидался объект")
+    missing = [field for field in fields if record.get(field) in (None, '')]
+    if missing:
+        raise RowError(f"Не заполнены поля: {', '.join(missing)}")
+
+
+def _integer(record, field):
+    try:
+        return int(record[field])
+    except (TypeError, ValueError):
+        raise RowError(f"Поле {field} должно быть числом")
+
+
+def prepare_client(record):
+    _require(record, 'client_name', 'phone')
+    return {
+        'client_name': record['client_name'],
+        'phone': record['phone'],
+        'birth_date': record.get('birth_date')
+    }
+
+
+def prepare_master(record):
+    _require(record, 'master_name', 'phone')
+    return {
+        'master_name': record['master_name'],
+        'phone': record['phone']
+    }
+
+
+def prepare_service(record):
+    _require(record, 'service_name', 'price', 'duration')
+    return {
+        'service_name': record['service_name'],
+        'description': record.get('description', ''),
+        'price': record['price'],
+        'duration': _integer(record, 'duration')
+    }
+
+
+def prepare_appointment(record):
+    _require(record, 'client_id', 'master_id', 'service_id', 'appointment_date')
+    try:
+        appointment_date = parse_appointment_date(record['appointment_date'])
+    except ValueError:
+        raise RowError("Неверный формат даты")
+    return {
+        'client_id': _integer(record, 'client_id'),
+        'master_id': _integer(record, 'master_id'),
+        'service_id': _integer(record, 'service_id'),
+        'appointment_date': appointment_date,
+        'status': record.get('status') or 'Запланировано'
+    }
+
+
+def existing_phones(table):
+    def existing(keys):
+        rows = db.session.execute(
+            text(f"SELECT phone FROM {table} WHERE phone = ANY(:keys)"),
+            {'keys': list(keys)}
+        )
+        return {row.phone for row in rows}
+    return existing
+
+
+def existing_services(keys):
+    rows = db.session.execute(
+        text("SELECT service_name FROM services WHERE service_name = ANY(:keys)"),
+        {'keys': list(keys)}
+    )
+    return {row.service_name for row in rows}
+
+
+# Строки пачки (номер, мастер, начало, длительность), пересекающиеся с записями в базе - то же
+# условие, что у create_appointment; каждая строка читает только диапазон индекса мастера
+BULK_APPOINTMENT_CONFLICTS = f"""
+    SELECT candidate.row_index
+    FROM unnest(
+        CAST(:row_indexes AS integer[]), CAST(:master_ids AS integer[]),
+        CAST(:dates AS timestamp[]), CAST(:durations AS integer[])
+    ) AS candidate(row_index, master_id, start_date, duration)
+    WHERE EXISTS (
+        SELECT 1
+        FROM appointments busy
+        JOIN services busy_s ON busy.service_id = busy_s.service_id
+        WHERE {OVERLAP_CONDITION.format(
+            master='candidate.master_id', start='candidate.start_date', duration='candidate.duration'
+        )}
+    )
+"""
+
+
+def check_appointments(rows, errors):
+    """Проверяет пачку записей: клиенты, мастера и услуги существуют, мастер свободен.
+
+    Занятость считается с учетом длительности услуг: пересечения с базой ищутся одним запросом,
+    а внутри пачки строки одного мастера сортируются по началу и сравниваются с последней принятой.
+    """
+    if not rows:
+        return rows
+    rows, durations = check_appointment_references(rows, errors)
+    if not rows:
+        return rows
+
+    busy = set(db.session.execute(
+        text(BULK_APPOINTMENT_CONFLICTS),
+        {
+            'row_indexes': list(range(len(rows))),
+            'master_ids': [row['master_id'] for _, row in rows],
+            'dates': [row['appointment_date'] for _, row in rows],
+            'durations': [durations[row['service_id']] for _, row in rows]
+        }
+    ).scalars())
+
+    free = []
+    for position, (index, row) in enumerate(rows):
+        if position in busy:
+            errors.append({'index': index, 'message': "Мастер занят в это время"})
+        else:
+            free.append((index, row))
+
+    accepted = []
+    master_end = {}
+    for index, row in sorted(free, key=lambda item: (item[1]['master_id'], item[1]['appointment_date'], item[0])):
+        end = master_end.get(row['master_id'])
+        if end is not None and row['appointment_date'] < end:
+            errors.append({'index': index, 'message': "Мастер занят в это время"})
+            continue
+        master_end[row['master_id']] = row['appointment_date'] + timedelta(minutes=durations[row['service_id']])
+        accepted.append((index, row))
+    # Вставка - в порядке строк запроса
+    return sorted(accepted, key=lambda item: item[0])
+
+
+def check_appointment_references(rows, errors):
+    """Проверяет одним запросом, что клиенты, мастера и услуги из пачки существуют.
+
+    Возвращает прошедшие проверку строки и длительности их услуг (service_id -> минуты).
+    """
+    found = db.session.execute(
+        text("""
+            SELECT 'client_id' AS kind, client_id AS id, CAST(NULL AS integer) AS duration
+            FROM clients WHERE client_id = ANY(:client_ids)
+            UNION ALL
+            SELECT 'master_id', master_id, NULL FROM masters WHERE master_id = ANY(:master_ids)
+            UNION ALL
+            SELECT 'service_id', service_id, duration FROM services WHERE service_id = ANY(:service_ids)
+        """),
+        {
+            'client_ids': list({row['client_id'] for _, row in rows}),
+            'master_ids': list({row['master_id'] for _, row in rows}),
+            'service_ids': list({row['service_id'] for _, row in rows})
+        }
+    ).fetchall()
+    durations = {row.id: row.duration for row in found if row.kind == 'service_id'}
+    found = {(row.kind, row.id) for row in found}
+    messages = (
+        ('client_id', "Клиент не найден"),
+        ('master_id', "Мастер не найден"),
+        ('service_id', "Услуга не найдена")
+    )
+
+    valid = []
+    for index, row in rows:
+        message = next((message for field, message in messages if (field, row[field]) not in found), None)
+        if message:
+            errors.append({'index': index, 'message': message})
+        else:
+            valid.append((index, row))
+    return valid, durations
+
+
+def after_appointments_insert(rows):
+    """Пересчитывает расписание затронутых дней"""
+    refresh_schedule({(row['master_id'], row['appointment_date'].date()) for row in rows})
+
+
+IMPORTS = {
+    'clients': {
+        'table': 'clients',
+        'columns': ('client_name', 'phone', 'birth_date'),
+        'prepare': prepare_client,
+        'key': lambda row: row['phone'],
+        'existing': existing_phones('clients'),
+        'duplicate_message': "Клиент с таким номером телефона уже существует"
+    },
+    'masters': {
+        'table': 'masters',
+        'columns': ('master_name', 'phone'),
+        'prepare': prepare_master,
+        'key': lambda row: row['phone'],
+        'existing': existing_phones('masters'),
+        'duplicate_message': "Мастер с таким номером телефона уже существует"
+    },
+    'services': {
+        'table': 'services',
+        'columns': ('service_name', 'description', 'price', 'duration'),
+        'prepare': prepare_service,
+        'key': lambda row: row['service_name'],
+        'existing': existing_services,
+        'duplicate_message': "Услуга с таким названием уже существует"
+    },
+    'appointments': {
+        'table': 'appointments',
+        'columns': ('client_id', 'master_id', 'service_id', 'appointment_date', 'status'),
+        'prepare': prepare_appointment,
+        # Ключа дубликатов нет: занятость мастера с учетом длительности услуг проверяет check
+        'check': check_appointments,
+        'after_insert': after_appointments_insert
+    }
+}
+
+
+def insert_rows(table, columns, rows):
+    """Вставляет строки: COPY на PostgreSQL, иначе executemany"""
+    connection = db.session.connection()
+    column_list = ', '.join(columns)
+    if len(rows) > 1 and connection.dialect.driver in ('psycopg2', 'pg8000'):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['\\N' if row[column] is None else row[column] for column in columns])
+        buffer.seek(0)
+
+        copy_sql = f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        cursor = connection.connection.cursor()
+        try:
+            if connection.dialect.driver == 'psycopg2':
+                cursor.copy_expert(copy_sql, buffer)
+            else:
+                cursor.execute(copy_sql, stream=buffer)
+        finally:
+            cursor.close()
+        return
+
+    placeholders = ', '.join(f':{column}' for column in columns)
+    db.session.execute(text(f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"), rows)
+
+
+def insert_batch(spec, rows, errors):
+    """Вставляет пачку целиком, а при ошибке - построчно, чтобы найти и отчитаться о плохих строках"""
+    if not rows:
+        return 0
+    try:
+        with db.session.begin_nested():
+            insert_rows(spec['table'], spec['columns'], [row for _, row in rows])
+        return len(rows)
+    except Exception:
+        pass
+
+    inserted = 0
+    for index, row in rows:
+        try:
+            with db.session.begin_nested():
+                insert_rows(spec['table'], spec['columns'], [row])
+            inserted += 1
+        except DBAPIError as e:
+            errors.append({'index': index, 'message': f"Ошибка сохранения: {str(e.orig).splitlines()[0]}"})
+    return inserted
+
+
+def run_import(spec):
+    """Загружает записи пачками по batch_size: проверка, поиск дубликатов, вставка и commit на пачку"""
+    batch_size = request.args.get('batch_size', current_app.config['BULK_BATCH_SIZE'], type=int)
+    if not 1 <= batch_size <= current_app.config['BULK_MAX_BATCH_SIZE']:
+        return jsonify({"message": f"batch_size должен быть от 1 до {current_app.config['BULK_MAX_BATCH_SIZE']}"}), 400
+
+    try:
+        records = read_records()
+    except ValueError:
+        return jsonify({"message": "Ожидался JSON-массив или поток NDJSON"}), 400
+
+    received = 0
+    inserted = 0
+    errors = []
+    seen = set()
+    try:
+        for batch in _batched(records, batch_size):
+            received += len(batch)
+
+            rows = []
+            for index, record in batch:
+                try:
+                    if isinstance(record, RowError):
+                        raise record
+                    row = spec['prepare'](record)
+                except RowError as e:
+                    errors.append({'index': index, 'message': str(e)})
+                    continue
+
+                if 'key' in spec:
+                    key = spec['key'](row)
+                    if key in seen:
+                        errors.append({'index': index, 'message': spec['duplicate_message']})
+                        continue
+                    seen.add(key)
+                rows.append((index, row))
+
+            if 'check' in spec:
+                rows = spec['check'](rows, errors)
+
+            unique_rows = rows
+            if 'key' in spec and rows:
+                # Дубликаты в базе ищем одним запросом на всю пачку
+                existing = spec['existing']([spec['key'](row) for _, row in rows])
+                unique_rows = []
+                for index, row in rows:
+                    if spec['key'](row) in existing:
+                        errors.append({'index': index, 'message': spec['duplicate_message']})
+                    else:
+                        unique_rows.append((index, row))
+
+            batch_inserted = insert_batch(spec, unique_rows, errors)
+            if batch_inserted and spec['table'] in VERSIONED_TABLES:
+                bump_version(spec['table'])
+            if batch_inserted and 'after_insert' in spec:
+                spec['after_insert']([row for _, row in unique_rows])
+            inserted += batch_inserted
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in /{spec['table']}/bulk: {e}")
+        return jsonify({
+            "message": "Ошибка на сервере",
+            "received": received,
+            "inserted": inserted,
+            "errors": errors
+        }), 500
+
+    return jsonify({'received': received, 'inserted': inserted, 'errors': errors}), 200
+
+
+@bulk_bp.route('/clients/bulk', methods=['POST'])
+@cached_jwt_required()
+@role_required([1, 2])
+def import_clients():
+    return run_import(IMPORTS['clients'])
+
+
+@bulk_bp.route('/masters/bulk', methods=['POST'])
+@cached_jwt_required()
+@role_required([1, 2])
+def import_masters():
+    return run_import(IMPORTS['masters'])
+
+
+@bulk_bp.route('/services/bulk', methods=['POST'])
+@cached_jwt_required()
+@role_required([1, 2])
+def import_services():
+    return run_import(IMPORTS['services'])
+
+
+@bulk_bp.route('/appointments/bulk', methods=['POST'])
+@cached_jwt_required()
+@role_required([1, 2])
+def import_appointments():
+    return run_import(IMPORTS['appointments'])
+
+
+def prepare_payment(record):
+    _require(record, 'client_id', 'appointment_id', 'payment_amount', 'payment_method')
+    try:
+        payment_amount = float(record['payment_amount'])
+    except (TypeError, ValueError):
+        raise RowError("Поле payment_amount должно быть числом")
+    return {
+        'client_id': _integer(record, 'client_id'),
+        'appointment_id': _integer(record, 'appointment_id'),
+        'payment_amount': payment_amount,
+        'payment_method': record['payment_method']
+    }
+
+
+def check_payment_references(rows, results):
+    """Проверяет одним запросом, что записи и клиенты из пачки оплат существуют"""
+    if not rows:
+        return rows
+    found = db.session.execute(
+        text("""
+            SELECT 'appointment_id' AS kind, appointment_id AS id FROM appointments WHERE appointment_id = ANY(:appointment_ids)
+            UNION ALL
+            SELECT 'client_id', client_id FROM clients WHERE client_id = ANY(:client_ids)
+        """),
+        {
+            'appointment_ids': list({row['appointment_id'] for _, row in rows}),
+            'client_ids': list({row['client_id'] for _, row in rows})
+        }
+    )
+    found = {(row.kind, row.id) for row in found}
+    messages = (
+        ('appointment_id', "Запись не найдена"),
+        ('client_id', "Клиент не найден")
+    )
+
+    valid = []
+    for index, row in rows:
+        message = next((message for field, message in messages if (field, row[field]) not in found), None)
+        if message:
+            results[index] = {'index': index, 'status': 'error', 'message': message}
+        else:
+            valid.append((index, row))
+    return valid
+
+
+@bulk_bp.route('/payments/batch', methods=['POST'])
+@cached_jwt_required()
+@role_required([1, 2])
+def post_payments_batch():
+    """Проводит пачку оплат (закрытие дня) в одной транзакции.
+
+    Записи и клиенты проверяются одним запросом, оплаты вставляются одним многострочным INSERT,
+    статусы записей обновляются одним UPDATE ... ANY, затем один commit. Ответ содержит
+    результат по каждой оплате; ошибочные оплаты пропускаются, остальные проводятся.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        return jsonify({"message": "Ожидался JSON-массив оплат"}), 400
+    if len(data) > current_app.config['BULK_MAX_BATCH_SIZE']:
+        return jsonify({"message": f"Не больше {current_app.config['BULK_MAX_BATCH_SIZE']} оплат за запрос"}), 400
+
+    results = [None] * len(data)
+    rows = []
+    for index, record in enumerate(data):
+        try:
+            rows.append((index, prepare_payment(record)))
+        except RowError as e:
+            results[index] = {'index': index, 'status': 'error', 'message': str(e)}
+
+    try:
+        rows = check_payment_references(rows, results)
+        if rows:
+            payment_date = datetime.now().replace(microsecond=0)
+            payment_ids = db.session.execute(
+                text("""
+                    INSERT INTO payments (client_id, appointment_id, payment_amount, payment_method, payment_date)
+                    SELECT client_id, appointment_id, payment_amount, payment_method, :payment_date
+                    FROM unnest(
+                        CAST(:client_ids AS integer[]),
+                        CAST(:appointment_ids AS integer[]),
+                        CAST(:payment_amounts AS numeric[]),
+                        CAST(:payment_methods AS varchar[])
+                    ) AS batch(client_id, appointment_id, payment_amount, payment_method)
+                    RETURNING payment_id
+                """),
+                {
+                    'client_ids': [row['client_id'] for _, row in rows],
+                    'appointment_ids': [row['appointment_id'] for _, row in rows],
+                    'payment_amounts': [row['payment_amount'] for _, row in rows],
+                    'payment_methods': [row['payment_method'] for _, row in rows],
+                    'payment_date': payment_date
+                }
+            ).scalars().all()
+
+            db.session.execute(
+                text(COMPLETE_APPOINTMENTS),
+                {'appointment_ids': list({row['appointment_id'] for _, row in rows})}
+            )
+            add_to_revenue(payment_ids)
+            db.session.commit()
+
+            for index, row in rows:
+                results[index] = {'index': index, 'status': 'ok', 'appointment_id': row['appointment_id']}
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in /payments/batch: {e}")
+        return jsonify({"message": "Ошибка на сервере"}), 500
+
+    return jsonify({'received': len(data), 'posted': len(rows), 'results': results}), 200
@@ -0,0 +1,98 @@
+from sqlalchemy import text
+
+from back.db import db
+from back.queries import APPOINTMENT_ORDER, APPOINTMENT_SELECT
+
+# Журнал appointment_changes заполняют триггеры на appointments и payments (миграция 0005):
+# строка на каждую измененную запись с идентификатором транзакции (xid).
+#
+# Курсор изменений - граница xmin снимка: все транзакции с xid ниже нее уже завершены, поэтому
+# выборка [предыдущий курсор, новый курсор) не пропускает изменения транзакций, которые
+# закоммитились позже, чем получили номер.
+#
+# Пока открыта долгая транзакция (отчет, сессия idle in transaction), xmin стоит на ее xid:
+# курсор не растет, и все изменения после нее доходят до клиентов только после ее завершения.
+# Одно и то же изменение может прийти дважды (первые события нового подписчика /events
+# пересекаются с пачкой рассыльщика), поэтому строки изменений - текущее состояние записи,
+# а клиент применяет их как upsert и удаление по appointment_id: повтор ничего не меняет.
+#
+# Журнал очищается от записей старше APPOINTMENT_CHANGES_RETENTION_DAYS (flask prune-changes);
+# курсор не выше границы очистки считается устаревшим - ответ 409, список загружается заново.
+CHANGE_CURSOR = "SELECT CAST(pg_snapshot_xmin(pg_current_snapshot()) AS text)"
+
+# В ids попадает не больше :limit + 1 записи: лишняя означает, что изменений больше лимита
+CHANGED_APPOINTMENTS = """
+    WITH bounds AS (
+        SELECT pg_snapshot_xmin(pg_current_snapshot()) AS upto
+    ),
+    changed AS (
+        SELECT DISTINCT c.appointment_id
+        FROM appointment_changes c, bounds
+        WHERE c.xid >= CAST(:since AS xid8) AND c.xid < bounds.upto
+        LIMIT :limit + 1
+    )
+    SELECT CAST(bounds.upto AS text) AS cursor,
+           ARRAY(SELECT appointment_id FROM changed) AS ids,
+           h.pruned_xid >= CAST(:since AS xid8) AS expired
+    FROM bounds
+    CROSS JOIN appointment_changes_horizon h
+"""
+
+# Удаляет записи журнала старше :days дней и поднимает границу очистки до их наибольшего xid
+PRUNE_CHANGES = """
+    WITH pruned AS (
+        DELETE FROM appointment_changes
+        WHERE changed_at < CURRENT_TIMESTAMP - make_interval(days => :days)
+        RETURNING xid
+    )
+    UPDATE appointment_changes_horizon
+    SET pruned_xid = GREATEST(pruned_xid, (SELECT max(xid) FROM pruned))
+    RETURNING (SELECT count(*) FROM pruned)
+"""
+
+CHANGED_ROWS = f"{APPOINTMENT_SELECT} WHERE a.appointment_id = ANY(:ids) {APPOINTMENT_ORDER}"
+
+
+class TooManyChanges(Exception):
+    """Изменений больше лимита: клиенту проще загрузить список заново"""
+
+
+class CursorExpired(Exception):
+    """Изменения после курсора уже очищены из журнала: список нужно загрузить заново"""
+
+
+def current_change_cursor():
+    """Курсор, с которого начнутся изменения, не вошедшие в выборку, сделанную после этого вызова"""
+    return db.session.execute(text(CHANGE_CURSOR)).scalar()
+
+
+def validate_cursor(cursor):
+    """Курсор изменений - неотрицательное число (xid8). Бросает ValueError"""
+    if not cursor or not cursor.isdigit():
+        raise ValueError(f"Invalid change cursor: {cursor}")
+    return cursor
+
+
+def appointment_changes(since, limit):
+    """Изменения записей после курсора since: (новый курсор, измененные строки, удаленные id)"""
+    cursor, ids, expired = db.session.execute(
+        text(CHANGED_APPOINTMENTS), {'since': since, 'limit': limit}
+    ).fetchone()
+    if expired:
+        raise CursorExpired()
+    if len(ids) > limit:
+        raise TooManyChanges()
+    if not ids:
+        return cursor, [], []
+
+    upserted = db.session.execute(text(CHANGED_ROWS), {'ids': ids}).fetchall()
+    present = {row.appointment_id for row in upserted}
+    deleted = sorted(set(ids) - present)
+    return cursor, upserted, deleted
+
+
+def prune_appointment_changes(days):
+    """Очищает журнал от изменений старше days дней; возвращает число удаленных строк"""
+    deleted = db.session.execute(text(PRUNE_CHANGES), {'days': days}).scalar()
+    db.session.commit()
+    return deleted
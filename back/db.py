@@ -1,5 +1,64 @@
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 
 db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+
+# Ревизия миграций (migrations/versions), которую ожидает этот код
+SCHEMA_VERSION = '0011'
+
+DEFAULT_ROLES = [
+    {'role_id': 1, 'role_name': 'Администратор', 'permissions': 'all'},
+    {'role_id': 2, 'role_name': 'Работник', 'permissions': 'edit'},
+    {'role_id': 3, 'role_name': 'Пользователь', 'permissions': 'view'}
+]
+
+
+def get_schema_version():
+    """Текущая ревизия схемы из alembic_version (одним запросом); None, если миграции не применялись"""
+    try:
+        return db.session.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except DBAPIError:
+        db.session.rollback()
+        return None
+
+
+# SQLSTATE пересечения записей мастера (триггер check_appointment_overlap, миграция 0011)
+EXCLUSION_VIOLATION = '23P01'
+
+
+def sqlstate(error):
+    """Код SQLSTATE ошибки базы (DBAPIError) для psycopg2 и pg8000; None, если кода нет"""
+    orig = getattr(error, 'orig', error)
+    code = getattr(orig, 'pgcode', None)
+    if code is None and orig.args and isinstance(orig.args[0], dict):
+        code = orig.args[0].get('C')
+    return code
+
+
+_extensions = {}
+
+
+def has_extension(name):
+    """Установлено ли расширение PostgreSQL в базе приложения; ответ запоминается на время жизни процесса"""
+    key = (str(db.engine.url), name)
+    if key not in _extensions:
+        _extensions[key] = db.session.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = :name)"), {'name': name}
+        ).scalar()
+    return _extensions[key]
+
+
+def seed_roles():
+    """Создает роли по умолчанию одним запросом; существующие роли не трогает"""
+    values = ', '.join(
+        f"(:role_id_{i}, :role_name_{i}, :permissions_{i})" for i in range(len(DEFAULT_ROLES))
+    )
+    params = {f"{key}_{i}": value for i, role in enumerate(DEFAULT_ROLES) for key, value in role.items()}
+    db.session.execute(
+        text(f"INSERT INTO roles (role_id, role_name, permissions) VALUES {values} ON CONFLICT DO NOTHING"),
+        params
+    )
+    db.session.commit()
@@ -0,0 +1,208 @@
+"""Кодирование ответов со списками: JSON через orjson или MessagePack, сжатие gzip/deflate.
+
+Формат выбирается по Accept: application/msgpack, если клиент ставит его выше application/json,
+иначе JSON. Сжатие - по Accept-Encoding (gzip предпочтительнее deflate). Даты кодируются так же,
+как у jsonify() (HTTP-дата в GMT), Decimal - строкой, поэтому JSON совпадает с прежним по значениям.
+
+Список передается как имена полей и кортежи значений. JSON - массив объектов, как и раньше
+(его читают и другие клиенты). MessagePack - массив имен полей, затем массивы строк-массивов:
+имена не повторяются в каждой строке, и словарь на строку сервер не строит.
+
+orjson и msgpack необязательны: без orjson JSON кодирует провайдер Flask, без msgpack
+сервер всегда отвечает JSON.
+"""
+import zlib
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from flask import Response, current_app, request, stream_with_context
+from werkzeug.http import parse_accept_header
+
+try:
+    import orjson
+except ImportError:  # JSON кодирует провайдер Flask
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack - необязательная возможность
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Поддерживаемые Content-Encoding в порядке предпочтения
+CODINGS = ('gzip', 'deflate')
+
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def http_date(value):
+    """Дата в формате jsonify(): 'Fri, 01 Mar 2024 10:00:00 GMT'; время без зоны считается UTC"""
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return (f"{_WEEKDAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+            f"{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT")
+
+
+def _default(value):
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def choose_mimetype(accept):
+    """Формат ответа по заголовку Accept"""
+    if msgpack is not None:
+        accepted = parse_accept_header(accept)
+        if accepted.quality(MSGPACK_MIMETYPE) > accepted.quality(JSON_MIMETYPE):
+            return MSGPACK_MIMETYPE
+    return JSON_MIMETYPE
+
+
+def choose_coding(accept_encoding):
+    """Content-Encoding по заголовку Accept-Encoding; None - без сжатия"""
+    return parse_accept_header(accept_encoding).best_match(CODINGS)
+
+
+def dumps(obj):
+    """JSON-байты obj: orjson, если установлен, иначе провайдер Flask"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return current_app.json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+class Compressor:
+    """Потоковое сжатие gzip или deflate (zlib); coding None - данные проходят без изменений"""
+
+    def __init__(self, coding, level):
+        self.compressor = None
+        if coding:
+            wbits = 16 + zlib.MAX_WBITS if coding == 'gzip' else zlib.MAX_WBITS
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self.compressor.compress(data) if self.compressor else data
+
+    def flush(self):
+        return self.compressor.flush() if self.compressor else b''
+
+
+def compress_chunks(chunks, coding, level):
+    compressor = Compressor(coding, level)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class StreamEncoder:
+    """Список строк (кортежей значений fields), который кодируется по частям.
+
+    JSON - один массив объектов, собранный из частей. MessagePack - массив имен полей, затем
+    по массиву строк на часть подряд (клиент читает их msgpack.Unpacker и сопоставляет значения
+    с именами по позиции); у пустого списка есть только массив имен.
+    """
+
+    def __init__(self, mimetype, coding, level, fields):
+        self.mimetype = mimetype
+        self.compressor = Compressor(coding, level)
+        self.fields = fields
+        self.started = False
+
+    def encode(self, rows):
+        if self.mimetype == MSGPACK_MIMETYPE:
+            chunk = msgpack.packb(rows, default=_default)
+            if not self.started:
+                chunk = msgpack.packb(self.fields) + chunk
+        elif not rows:
+            return b''
+        else:
+            # Массив части без скобок; части разделяются запятой
+            items = [dict(zip(self.fields, row)) for row in rows]
+            chunk = (b',' if self.started else b'[') + dumps(items)[1:-1]
+        self.started = True
+        return self.compressor.compress(chunk)
+
+    def finish(self):
+        if self.mimetype == MSGPACK_MIMETYPE:
+            tail = b'' if self.started else msgpack.packb(self.fields)
+        else:
+            tail = b']' if self.started else b'[]'
+        return self.compressor.compress(tail) + self.compressor.flush()
+
+
+def encode_rows(fields, rows, mimetype, coding, level, min_size):
+    """Тело ответа со списком: (байты, примененный Content-Encoding или None).
+
+    Маленькие тела не сжимаются.
+    """
+    encoder = StreamEncoder(mimetype, None, level, fields)
+    body = encoder.encode(rows) + encoder.finish()
+    if not coding or len(body) < min_size:
+        return body, None
+    compressor = Compressor(coding, level)
+    return compressor.compress(body) + compressor.flush(), coding
+
+
+def representation_tag(mimetype, coding):
+    """Часть ETag, которая различает представления одного ресурса: формат и сжатие.
+
+    Применение сжатия зависит и от размера тела, но тело однозначно определяется версией данных,
+    форматом и принятым Content-Encoding, поэтому разные тела всегда получают разные ETag.
+    """
+    name = 'msgpack' if mimetype == MSGPACK_MIMETYPE else 'json'
+    return f"{name}-{coding}" if coding else name
+
+
+def negotiated():
+    """Формат и сжатие ответа на текущий запрос Flask: (mimetype, Content-Encoding или None)"""
+    return (choose_mimetype(request.headers.get('Accept', '')),
+            choose_coding(request.headers.get('Accept-Encoding', '')))
+
+
+def _set_encoding_headers(response, coding):
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    if coding:
+        response.headers['Content-Encoding'] = coding
+
+
+def encoded_response(fields, rows, status=200):
+    """Ответ Flask: список строк в формате и со сжатием, которые принимает клиент"""
+    mimetype, coding = negotiated()
+    body, coding = encode_rows(fields, rows, mimetype, coding, current_app.config['RESPONSE_COMPRESS_LEVEL'],
+                               current_app.config['RESPONSE_COMPRESS_MIN_SIZE'])
+    response = Response(body, status, mimetype=mimetype)
+    _set_encoding_headers(response, coding)
+    return response
+
+
+def encoded_stream(fields, partitions):
+    """Потоковый ответ Flask из частей списка (итератор списков строк); части кодируются по мере чтения.
+
+    Итератор выполняется внутри ответа, с контекстом запроса, поэтому может читать курсор базы.
+    """
+    mimetype, coding = negotiated()
+    encoder = StreamEncoder(mimetype, coding, current_app.config['RESPONSE_COMPRESS_LEVEL'], fields)
+
+    def generate():
+        try:
+            for rows in partitions:
+                chunk = encoder.encode(rows)
+                if chunk:
+                    yield chunk
+        except Exception as e:
+            # Заголовки уже отправлены - клиент получит оборванный (невалидный) ответ
+            print(f"Error while streaming {request.path}: {e}")
+            return
+        yield encoder.finish()
+
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    _set_encoding_headers(response, coding)
+    return response
@@ -0,0 +1,244 @@
+import queue
+import select
+import threading
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from back.changes import CursorExpired, TooManyChanges, appointment_changes, current_change_cursor, validate_cursor
+from back.db import db
+from back.queries import appointment_to_dict
+from back.tokens import cached_jwt_required
+
+events_bp = Blueprint('events', __name__)
+
+# Канал LISTEN/NOTIFY, которым триггер журнала изменений (миграция 0008) будит рассыльщиков
+# событий во всех процессах: уведомление уходит при commit любой транзакции, изменившей записи
+CHANNEL = 'appointment_changes'
+
+HEARTBEAT = ': heartbeat\n\n'
+
+_broker_lock = threading.Lock()
+
+
+def format_event(event, data, event_id=None):
+    """Событие в формате text/event-stream; id события - курсор изменений"""
+    lines = [f"id: {event_id}"] if event_id else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {current_app.json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def changes_event(cursor, upserted, deleted):
+    return format_event('appointments', {
+        'upserted': [appointment_to_dict(item) for item in upserted],
+        'deleted': deleted
+    }, cursor)
+
+
+def initial_events(last_event_id):
+    """Первые события потока: изменения после last_event_id или ready с текущим курсором.
+
+    Если курсор не принят или изменений больше APPOINTMENT_CHANGES_MAX - событие reset,
+    клиент загружает список заново. Вызывается в контексте приложения.
+    """
+    if not last_event_id:
+        return [format_event('ready', {}, current_change_cursor())]
+    try:
+        cursor, upserted, deleted = appointment_changes(
+            validate_cursor(last_event_id), current_app.config['APPOINTMENT_CHANGES_MAX']
+        )
+    except (ValueError, TooManyChanges, CursorExpired):
+        return [format_event('reset', {}, current_change_cursor())]
+    if upserted or deleted:
+        return [changes_event(cursor, upserted, deleted)]
+    return [format_event('ready', {}, cursor)]
+
+
+class Subscriber:
+    """Очередь событий одного подключения.
+
+    Если клиент не успевает читать и очередь переполнена, подписчик помечается overflowed:
+    поток закрывается событием reset вместо того, чтобы копить события в памяти.
+    """
+
+    def __init__(self, size):
+        self.queue = queue.Queue(size)
+        self.overflowed = False
+
+    def deliver(self, message):
+        """Кладет событие в очередь; False - подписчик больше не принимает события"""
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+        return True
+
+
+class EventBroker:
+    """Рассыльщик событий процесса.
+
+    Один поток читает журнал appointment_changes и раздает готовые события подписчикам:
+    запрос к базе и сериализация выполняются один раз на пачку изменений, сколько бы ни было
+    подключений, а сами подключения не держат соединений с базой.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        # Курсор, с которого читается следующая пачка; None - подписчиков нет, журнал не читается
+        self.cursor = None
+        self.thread = None
+        self.notify_supported = True
+
+    def subscribe(self, subscriber):
+        """Регистрирует подписчика; False - достигнут предел EVENTS_MAX_CONNECTIONS"""
+        cursor = None
+        while True:
+            with self.lock:
+                if len(self.subscribers) >= self.app.config['EVENTS_MAX_CONNECTIONS']:
+                    return False
+                if self.cursor is not None or cursor is not None:
+                    if self.cursor is None:
+                        self.cursor = cursor
+                    self.subscribers.add(subscriber)
+                    if self.thread is None:
+                        self.thread = threading.Thread(target=self.run, name='event-broker', daemon=True)
+                        self.thread.start()
+                    return True
+            # Первый подписчик: курсор читается из базы без блокировки рассыльщика. Он берется
+            # раньше, чем initial_events() подписчика, поэтому между ними нет пропуска
+            with self.app.app_context():
+                cursor = current_change_cursor()
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+            if not self.subscribers:
+                self.cursor = None
+
+    def listen(self):
+        """Отдельное (не из пула) соединение с LISTEN; None, если подключиться не удалось.
+
+        Ожидание уведомлений (select() по сокету, poll() и notifies) есть только у psycopg2;
+        с другими драйверами (pg8000) LISTEN не используется и журнал читается по интервалу.
+        """
+        try:
+            with self.app.app_context():
+                engine = db.engine
+                if engine.dialect.driver != 'psycopg2':
+                    self.notify_supported = False
+                    return None
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                connection = engine.dialect.loaded_dbapi.connect(*cargs, **cparams)
+            connection.autocommit = True
+            connection.cursor().execute(f"LISTEN {CHANNEL}")
+            return connection
+        except Exception as e:
+            print(f"Error in event broker LISTEN: {e}")
+            return None
+
+    def poll(self, since):
+        """Пачка изменений после since: (новый курсор, событие или None)"""
+        with self.app.app_context():
+            try:
+                cursor, upserted, deleted = appointment_changes(since, self.app.config['APPOINTMENT_CHANGES_MAX'])
+            except (TooManyChanges, CursorExpired):
+                cursor = current_change_cursor()
+                return cursor, format_event('reset', {}, cursor)
+            if not upserted and not deleted:
+                return cursor, None
+            return cursor, changes_event(cursor, upserted, deleted)
+
+    def run(self):
+        interval = self.app.config['EVENTS_POLL_INTERVAL']
+        listener = None
+        while True:
+            if listener is None and self.notify_supported:
+                listener = self.listen()
+            try:
+                if listener is None:
+                    time.sleep(interval)
+                elif select.select([listener], [], [], interval)[0]:
+                    listener.poll()
+                    listener.notifies.clear()
+            except Exception as e:
+                # Соединение потеряно - журнал читается по интервалу, пока LISTEN не восстановится
+                print(f"Error in event broker LISTEN: {e}")
+                listener.close()
+                listener = None
+
+            with self.lock:
+                since = self.cursor
+            if since is None:
+                continue
+            try:
+                cursor, message = self.poll(since)
+            except Exception as e:
+                print(f"Error in event broker: {e}")
+                continue
+
+            self.publish(cursor, message)
+
+    def publish(self, cursor, message):
+        """Раздает событие подписчикам и сдвигает курсор; отключившиеся подписчики удаляются"""
+        with self.lock:
+            if message:
+                for subscriber in list(self.subscribers):
+                    if not subscriber.deliver(message):
+                        self.subscribers.discard(subscriber)
+            self.cursor = cursor if self.subscribers else None
+
+
+def get_broker(app):
+    with _broker_lock:
+        if 'event_broker' not in app.extensions:
+            app.extensions['event_broker'] = EventBroker(app)
+        return app.extensions['event_broker']
+
+
+@events_bp.route('/events', methods=['GET'])
+@cached_jwt_required()
+def stream_events():
+    """Поток изменений записей (Server-Sent Events).
+
+    События appointments несут те же поля, что GET /appointment/changes; id события - курсор,
+    поэтому переподключение с Last-Event-ID продолжает поток без пропусков.
+    """
+    app = current_app._get_current_object()
+    broker = get_broker(app)
+    subscriber = Subscriber(app.config['EVENTS_QUEUE_SIZE'])
+    if not broker.subscribe(subscriber):
+        return jsonify({"message": "Слишком много подключений"}), 503
+
+    try:
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        first_events = initial_events(last_event_id)
+    except Exception as e:
+        broker.unsubscribe(subscriber)
+        print(f"Error in /events: {e}")
+        return jsonify({"message": "Ошибка на сервере"}), 500
+
+    heartbeat = app.config['EVENTS_HEARTBEAT']
+    reset = format_event('reset', {})
+
+    def generate():
+        # Без контекста запроса: сессия с базой закрывается до начала потока
+        yield from first_events
+        while True:
+            try:
+                message = subscriber.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield HEARTBEAT
+                continue
+            if subscriber.overflowed:
+                yield reset
+                return
+            yield message
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(lambda: broker.unsubscribe(subscriber))
+    return response
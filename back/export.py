@@ -0,0 +1,183 @@
+import csv
+import io
+from datetime import date, datetime, time, timedelta
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import text
+
+from back.db import db
+from back.encoding import choose_coding, compress_chunks
+from back.queries import APPOINTMENT_ORDER, APPOINTMENT_SELECT
+from back.tokens import cached_jwt_required
+from back.utils import format_amount, role_required
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet - необязательная возможность
+    pyarrow = None
+
+export_bp = Blueprint('export', __name__, url_prefix='/export')
+
+CSV_HEADER = ["ID", "Клиент", "Мастер", "Услуга", "Дата", "Статус", "Сумма", "Статус оплаты"]
+
+
+def export_row(item):
+    """Строка выгрузки из строки APPOINTMENT_SELECT"""
+    amount = format_amount(item['payment_amount'])
+    return [
+        item['appointment_id'],
+        item['client_name'],
+        item['master_name'],
+        item['service_name'],
+        item['appointment_date'],
+        item['status'],
+        amount,
+        "Оплачено" if amount else "Не оплачено"
+    ]
+
+
+def csv_chunks(partitions):
+    """CSV по частям: одна часть на партицию курсора"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for partition in partitions:
+        writer.writerows(export_row(item) for item in partition)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink:
+    """Файловый объект для ParquetWriter: накапливает записанные байты до выдачи клиенту.
+
+    Позиция (tell) считается от начала файла, поэтому смещения в метаданных Parquet остаются верными.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_chunks(partitions):
+    """Parquet по частям: группа строк на партицию курсора"""
+    schema = pyarrow.schema([
+        ('appointment_id', pyarrow.int64()),
+        ('client_name', pyarrow.string()),
+        ('master_name', pyarrow.string()),
+        ('service_name', pyarrow.string()),
+        ('appointment_date', pyarrow.timestamp('us')),
+        ('status', pyarrow.string()),
+        ('payment_amount', pyarrow.float64()),
+    ])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    for partition in partitions:
+        writer.write_table(pyarrow.Table.from_pylist([{
+            'appointment_id': item['appointment_id'],
+            'client_name': item['client_name'],
+            'master_name': item['master_name'],
+            'service_name': item['service_name'],
+            'appointment_date': item['appointment_date'],
+            'status': item['status'],
+            'payment_amount': format_amount(item['payment_amount'])
+        } for item in partition], schema=schema))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def parse_range():
+    """Границы выгрузки по from/to (YYYY-MM-DD, включительно); отсутствующая граница - None"""
+    bounds = []
+    for name in ('from', 'to'):
+        value = request.args.get(name)
+        bounds.append(date.fromisoformat(value) if value else None)
+    return bounds
+
+
+@export_bp.route('/appointments', methods=['GET'])
+@cached_jwt_required()
+@role_required([1, 2])
+def export_appointments():
+    """Выгрузка записей в CSV или Parquet потоком из курсора на стороне сервера.
+
+    Ни сервер, ни клиент не держат выборку в памяти целиком; CSV сжимается gzip или deflate,
+    если клиент их принимает.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'parquet'):
+        return jsonify({"message": "format должен быть csv или parquet"}), 400
+    if export_format == 'parquet' and pyarrow is None:
+        return jsonify({"message": "Выгрузка в Parquet недоступна: на сервере не установлен pyarrow"}), 501
+    try:
+        date_from, date_to = parse_range()
+    except ValueError:
+        return jsonify({"message": "Неверный формат даты"}), 400
+
+    conditions = []
+    params = {}
+    if date_from:
+        conditions.append("a.appointment_date >= :range_start")
+        params['range_start'] = datetime.combine(date_from, time.min)
+    if date_to:
+        conditions.append("a.appointment_date < :range_end")
+        params['range_end'] = datetime.combine(date_to + timedelta(days=1), time.min)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    chunk_size = current_app.config['APPOINTMENT_STREAM_CHUNK']
+    coding = choose_coding(request.headers.get('Accept-Encoding', '')) if export_format == 'csv' else None
+    level = current_app.config['RESPONSE_COMPRESS_LEVEL']
+
+    def generate():
+        try:
+            result = db.session.execute(
+                text(f"{APPOINTMENT_SELECT} {where} {APPOINTMENT_ORDER}"),
+                params,
+                execution_options={'stream_results': True, 'yield_per': chunk_size}
+            )
+            partitions = result.mappings().partitions(chunk_size)
+            chunks = csv_chunks(partitions) if export_format == 'csv' else parquet_chunks(partitions)
+            if coding:
+                chunks = compress_chunks(chunks, coding, level)
+            yield from chunks
+        except Exception as e:
+            # Заголовки уже отправлены - клиент получит оборванный файл
+            print(f"Error while streaming /export/appointments: {e}")
+
+    if export_format == 'csv':
+        mimetype, filename = 'text/csv', 'appointments.csv'
+    else:
+        mimetype, filename = 'application/vnd.apache.parquet', 'appointments.parquet'
+
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if coding:
+        response.headers['Content-Encoding'] = coding
+    return response
@@ -0,0 +1,74 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from flask import current_app
+
+
+class PoolSaturated(Exception):
+    """Пул хеширования занят и очередь заполнена: запрос нужно повторить позже"""
+
+
+# Пул процессов создается лениво в каждом рабочем процессе (после fork) и
+# пересоздается, если изменились настройки размера пула или очереди.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+
+def _get_pool():
+    global _pool
+    key = (os.getpid(), current_app.config['BCRYPT_POOL_SIZE'], current_app.config['BCRYPT_QUEUE_LIMIT'])
+    with _pool_lock:
+        if _pool is None or _pool[0] != key:
+            if _pool is not None and _pool[0][0] == os.getpid():
+                _pool[1].shutdown(wait=False)
+            _, size, queue_limit = key
+            executor = ProcessPoolExecutor(max_workers=size)
+            # Одновременно в пуле (выполняются + ждут) не больше size + queue_limit задач
+            _pool = (key, executor, threading.BoundedSemaphore(size + queue_limit))
+        return _pool[1], _pool[2]
+
+
+def _run(func, *args):
+    """Выполняет func в пуле процессов; без пула (BCRYPT_POOL_SIZE = 0) - в текущем потоке"""
+    if current_app.config['BCRYPT_POOL_SIZE'] <= 0:
+        return func(*args)
+
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PoolSaturated()
+    try:
+        future = executor.submit(func, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result(timeout=current_app.config['BCRYPT_TIMEOUT'])
+
+
+def hash_password(password):
+    """bcrypt-хеш пароля с текущей стоимостью BCRYPT_ROUNDS"""
+    password_hash = _run(_hashpw, password.encode('utf-8'), current_app.config['BCRYPT_ROUNDS'])
+    return password_hash.decode('utf-8')
+
+
+def check_password(password, password_hash):
+    return _run(_checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def needs_rehash(password_hash):
+    """True, если хеш посчитан с другой стоимостью, чем BCRYPT_ROUNDS"""
+    try:
+        rounds = int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return False
+    return rounds != current_app.config['BCRYPT_ROUNDS']
@@ -0,0 +1,177 @@
+import hmac
+import threading
+import time
+
+from flask import Blueprint, Response, current_app, g, jsonify, request
+from sqlalchemy import event
+
+from back.db import db
+from back.tokens import bearer_token, cached_jwt_required
+from back.utils import role_required
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Границы корзин гистограмм
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+HISTOGRAMS = {
+    'nail_salon_request_duration_seconds': ('Время обработки запроса', SECONDS_BUCKETS),
+    'nail_salon_request_db_seconds': ('Время в базе данных за запрос', SECONDS_BUCKETS),
+    'nail_salon_request_statements': ('SQL-запросов за запрос', STATEMENT_BUCKETS),
+    'nail_salon_request_rows': ('Строк, возвращенных базой за запрос', ROW_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Registry:
+    """Гистограммы по (метрика, маршрут, метод) и счетчик ответов по коду"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.responses = {}
+
+    def observe(self, route, method, status, values):
+        with self._lock:
+            for name, value in values.items():
+                key = (name, route, method)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(HISTOGRAMS[name][1])
+                self.histograms[key].observe(value)
+            key = (route, method, str(status))
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self):
+        """Текстовый формат Prometheus"""
+        lines = []
+        with self._lock:
+            for name, (help_text, _) in HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, route, method), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'route="{route}",method="{method}"'
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+            lines.append("# HELP nail_salon_responses_total Ответы по маршруту и коду")
+            lines.append("# TYPE nail_salon_responses_total counter")
+            for (route, method, status), count in sorted(self.responses.items()):
+                lines.append(f'nail_salon_responses_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _start_request():
+    g.request_metrics = {'started': time.perf_counter(), 'db_seconds': 0.0, 'rows': 0, 'statements': []}
+
+
+def _finish_request(response):
+    stats = g.get('request_metrics')
+    if stats is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    method = request.method
+    app = current_app._get_current_object()
+
+    if response.mimetype == 'text/event-stream':
+        # Поток событий открыт, пока клиент подключен, - это не время обработки запроса:
+        # после закрытия учитывается только ответ
+        response.call_on_close(lambda: registry.observe(route, method, response.status_code, {}))
+        return response
+
+    def record():
+        # Вызывается после отправки тела, поэтому потоковые ответы учитываются целиком
+        wall = time.perf_counter() - stats['started']
+        registry.observe(route, method, response.status_code, {
+            'nail_salon_request_duration_seconds': wall,
+            'nail_salon_request_db_seconds': stats['db_seconds'],
+            'nail_salon_request_statements': len(stats['statements']),
+            'nail_salon_request_rows': stats['rows'],
+        })
+        if wall * 1000 >= app.config['SLOW_REQUEST_MS']:
+            statements = '\n'.join(
+                f"    {duration * 1000:.1f} ms: {' '.join(statement.split())[:500]}"
+                for statement, duration in stats['statements']
+            )
+            app.logger.warning(
+                f"Slow request {method} {route}: {wall * 1000:.1f} ms, "
+                f"db {stats['db_seconds'] * 1000:.1f} ms, {len(stats['statements'])} statements\n{statements}"
+            )
+
+    response.call_on_close(record)
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_started'].pop()
+    stats = g.get('request_metrics') if g else None
+    if stats is not None:
+        stats['db_seconds'] += duration
+        stats['rows'] += max(cursor.rowcount, 0)
+        stats['statements'].append((statement, duration))
+
+
+def _handle_error(context):
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def init_metrics(app):
+    """Подключает замеры запросов и SQL к приложению и регистрирует /metrics"""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(db.engine, 'handle_error', _handle_error)
+    app.register_blueprint(metrics_bp)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Метрики в формате Prometheus. Если задан METRICS_TOKEN, доступ - только по нему
+    (Authorization: Bearer, для сборщика метрик), иначе - администратору по JWT
+    """
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        return _admin_metrics()
+    if not hmac.compare_digest((bearer_token() or '').encode('utf-8'), token.encode('utf-8')):
+        return jsonify({"message": "Доступ запрещен"}), 401
+    return _render_metrics()
+
+
+@cached_jwt_required()
+@role_required([1])
+def _admin_metrics():
+    return _render_metrics()
+
+
+def _render_metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
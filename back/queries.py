@@ -0,0 +1,209 @@
+from datetime import date, datetime, time, timedelta
+
+from back.availability import OVERLAP_CONDITION
+from back.schedule import ADD_TO_SCHEDULE
+from back.utils import format_amount
+
+# Общая выборка записей на услуги. Сумма оплат считается через LATERAL-подзапрос,
+# чтобы на каждую запись приходилась ровно одна строка (важно для курсорной пагинации).
+APPOINTMENT_SELECT = """
+    SELECT
+        a.appointment_id,
+        c.client_name,
+        m.master_name,
+        s.service_name,
+        a.appointment_date,
+        a.status,
+        p.payment_amount,
+        a.master_id,
+        a.client_id
+    FROM appointments a
+    LEFT JOIN LATERAL (
+        SELECT SUM(payment_amount) AS payment_amount
+        FROM payments
+        WHERE payments.appointment_id = a.appointment_id
+    ) p ON TRUE
+    LEFT JOIN clients c ON a.client_id = c.client_id
+    LEFT JOIN masters m ON a.master_id = m.master_id
+    LEFT JOIN services s ON a.service_id = s.service_id
+"""
+
+APPOINTMENT_ORDER = "ORDER BY a.appointment_date, a.appointment_id"
+
+# Условие продолжения выборки после курсора (appointment_date, appointment_id)
+APPOINTMENT_AFTER = "(a.appointment_date, a.appointment_id) > (:after_date, :after_id)"
+
+# Обратный порядок (sort=-date) и условие продолжения для него
+APPOINTMENT_ORDER_DESC = "ORDER BY a.appointment_date DESC, a.appointment_id DESC"
+APPOINTMENT_BEFORE = "(a.appointment_date, a.appointment_id) < (:after_date, :after_id)"
+
+# Значение параметра sort -> (ORDER BY, условие продолжения после курсора)
+APPOINTMENT_SORTS = {
+    'date': (APPOINTMENT_ORDER, APPOINTMENT_AFTER),
+    '-date': (APPOINTMENT_ORDER_DESC, APPOINTMENT_BEFORE),
+}
+
+# Фильтры списка записей: параметр запроса -> условие. Каждое условие опирается на индекс:
+# даты - ix_appointments_date_id, мастер - ix_appointments_master_date,
+# клиент - ix_appointments_client_date, статус - ix_appointments_status_date
+APPOINTMENT_FILTERS = {
+    'date_from': "a.appointment_date >= :range_start",
+    'date_to': "a.appointment_date < :range_end",
+    'master_id': "a.master_id = :master_id",
+    'client_id': "a.client_id = :client_id",
+    'status': "a.status = :status",
+}
+
+
+def appointment_filters(args):
+    """Условия и параметры выборки записей по фильтрам запроса (словарь параметров строкой).
+
+    date_from/date_to - YYYY-MM-DD включительно, master_id/client_id - целые, status - точное
+    значение. Пустые параметры не учитываются; неверное значение - ValueError.
+    """
+    conditions = []
+    params = {}
+    for name, condition in APPOINTMENT_FILTERS.items():
+        value = args.get(name)
+        if not value:
+            continue
+        if name == 'date_from':
+            params['range_start'] = datetime.combine(date.fromisoformat(value), time.min)
+        elif name == 'date_to':
+            params['range_end'] = datetime.combine(date.fromisoformat(value) + timedelta(days=1), time.min)
+        elif name == 'status':
+            params['status'] = value
+        else:
+            params[name] = int(value)
+        conditions.append(condition)
+    return conditions, params
+
+
+def appointment_list(conditions, order):
+    """Выборка APPOINTMENT_SELECT с условиями (через AND) в заданном порядке"""
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"{APPOINTMENT_SELECT} {where} {order}"
+
+# Создание записи одним запросом: проверки клиента, мастера, услуги и занятости мастера
+# выполняются в CTE, INSERT срабатывает только если все проверки прошли.
+# Флаги *_found и master_busy позволяют вернуть клиенту ту же ошибку, что и раньше.
+# CTE scheduled в том же запросе добавляет запись в расписание дня мастера (master_schedule).
+CREATE_APPOINTMENT = f"""
+    WITH client AS (
+        SELECT client_id FROM clients WHERE client_id = :client_id
+    ),
+    master AS (
+        SELECT master_id FROM masters WHERE master_id = :master_id
+    ),
+    service AS (
+        SELECT service_id, duration FROM services WHERE service_id = :service_id
+    ),
+    conflict AS (
+        SELECT 1
+        FROM appointments busy
+        JOIN services busy_s ON busy.service_id = busy_s.service_id
+        CROSS JOIN service
+        WHERE {OVERLAP_CONDITION.format(master=':master_id', start=':appointment_date', duration='service.duration')}
+        LIMIT 1
+    ),
+    created AS (
+        INSERT INTO appointments (client_id, master_id, service_id, appointment_date)
+        SELECT client.client_id, master.master_id, service.service_id, :appointment_date
+        FROM client, master, service
+        WHERE NOT EXISTS (SELECT 1 FROM conflict)
+        RETURNING appointment_id, master_id, appointment_date
+    ),
+    scheduled AS ({ADD_TO_SCHEDULE.format(
+        source='(SELECT created.master_id, created.appointment_date, service.duration FROM created, service)'
+    )})
+    SELECT
+        (SELECT appointment_id FROM created) AS appointment_id,
+        EXISTS (SELECT 1 FROM client) AS client_found,
+        EXISTS (SELECT 1 FROM master) AS master_found,
+        EXISTS (SELECT 1 FROM service) AS service_found,
+        EXISTS (SELECT 1 FROM conflict) AS master_busy
+"""
+
+
+# Поля списков в ответах API. Функции *_values принимают строку выборки как кортеж (Row без
+# .mappings()) и возвращают значения полей по порядку: списки кодируются из этих кортежей
+# (back/encoding.py), а словарь на строку строят только JSON-ответы.
+
+APPOINTMENT_FIELDS = ('appointment_id', 'client_name', 'master_name', 'service_name', 'appointment_date',
+                      'status', 'payment_amount', 'master_id', 'client_id')
+
+
+def appointment_values(row):
+    """Значения APPOINTMENT_FIELDS из строки выборки APPOINTMENT_SELECT"""
+    (appointment_id, client_name, master_name, service_name, appointment_date, status, payment_amount,
+     master_id, client_id) = row
+    return (appointment_id, client_name, master_name, service_name, appointment_date, status,
+            format_amount(payment_amount), master_id, client_id)
+
+
+def appointment_to_dict(row):
+    """Преобразует строку выборки APPOINTMENT_SELECT в словарь для ответа API"""
+    return dict(zip(APPOINTMENT_FIELDS, appointment_values(row)))
+
+
+CLIENT_LIST = "SELECT client_id, client_name, phone, birth_date FROM clients"
+
+# Поиск клиентов (GET /clients/search). Префиксы сравниваются в COLLATE "C", чтобы LIKE 'префикс%'
+# и ORDER BY ... LIMIT шли по индексам ix_clients_phone_prefix и ix_clients_name_prefix (миграция 0006)
+CLIENT_SEARCH_PHONE = """
+    SELECT client_id, client_name, phone, birth_date
+    FROM clients
+    WHERE phone COLLATE "C" LIKE :prefix
+    ORDER BY phone COLLATE "C"
+    LIMIT :limit
+"""
+
+CLIENT_SEARCH_NAME_PREFIX = """
+    SELECT client_id, client_name, phone, birth_date
+    FROM clients
+    WHERE lower(client_name) COLLATE "C" LIKE :prefix
+    ORDER BY lower(client_name) COLLATE "C"
+    LIMIT :limit
+"""
+
+# Нечеткий поиск по имени через pg_trgm (GIN-индекс ix_clients_name_trgm): подстрока или похожее
+# слово (опечатки); сначала совпадения с начала имени, затем по убыванию сходства
+CLIENT_SEARCH_NAME_FUZZY = """
+    SELECT client_id, client_name, phone, birth_date
+    FROM clients
+    WHERE client_name ILIKE :contains OR :q <% client_name
+    ORDER BY lower(client_name) LIKE :prefix DESC, word_similarity(:q, client_name) DESC, client_name
+    LIMIT :limit
+"""
+
+SERVICE_LIST = "SELECT service_id, service_name, description, price, duration FROM services"
+
+MASTER_LIST = "SELECT master_id, master_name, phone FROM masters"
+
+
+CLIENT_FIELDS = ('client_id', 'name', 'phone', 'birth_date')
+
+SERVICE_FIELDS = ('service_id', 'name', 'description', 'price', 'duration')
+
+MASTER_FIELDS = ('master_id', 'name', 'phone')
+
+
+def client_values(row):
+    """Строка CLIENT_LIST или поиска клиентов; колонки совпадают с CLIENT_FIELDS"""
+    return tuple(row)
+
+
+def service_values(row):
+    """Строка SERVICE_LIST; колонки совпадают с SERVICE_FIELDS"""
+    return tuple(row)
+
+
+def master_values(row):
+    """Строка MASTER_LIST; колонки совпадают с MASTER_FIELDS"""
+    return tuple(row)
+
+
+def client_to_dict(row):
+    """Строка поиска клиентов в словарь для JSON-ответа"""
+    return dict(zip(CLIENT_FIELDS, row))
+
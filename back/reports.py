@@ -0,0 +1,200 @@
+from datetime import date, datetime, time, timedelta
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+
+from back.availability import parse_time
+from back.db import db
+from back.tokens import cached_jwt_required
+from back.utils import format_amount, role_required
+
+reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
+
+GROUP_BY = ('day', 'master', 'service', 'payment_method')
+
+# Добавляет оплаты в дневную сводку revenue_daily. Ключ - день оплаты, мастер, услуга и способ
+# оплаты; 0 и '' обозначают оплату без записи (или запись без мастера/услуги) и пустой способ.
+ADD_TO_REVENUE = """
+    INSERT INTO revenue_daily (revenue_date, master_id, service_id, payment_method, payment_count, revenue)
+    SELECT CAST(p.payment_date AS date),
+           COALESCE(a.master_id, 0),
+           COALESCE(a.service_id, 0),
+           COALESCE(p.payment_method, ''),
+           COUNT(*),
+           SUM(p.payment_amount)
+    FROM payments p
+    LEFT JOIN appointments a ON p.appointment_id = a.appointment_id
+    WHERE p.payment_id = ANY(:payment_ids)
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (revenue_date, master_id, service_id, payment_method) DO UPDATE SET
+        payment_count = revenue_daily.payment_count + EXCLUDED.payment_count,
+        revenue = revenue_daily.revenue + EXCLUDED.revenue
+"""
+
+# group_by -> (колонки ключа в revenue_daily r, соединение для названий, колонки ответа)
+REVENUE_GROUPS = {
+    'day': ("r.revenue_date", "", "r.revenue_date AS day"),
+    'master': ("r.master_id, m.master_name", "LEFT JOIN masters m ON r.master_id = m.master_id",
+               "r.master_id, m.master_name"),
+    'service': ("r.service_id, s.service_name", "LEFT JOIN services s ON r.service_id = s.service_id",
+                "r.service_id, s.service_name"),
+    'payment_method': ("r.payment_method", "", "r.payment_method"),
+}
+
+# Загрузка по дням и мастерам берется из master_schedule. Рабочее время - open_minutes на каждую
+# строку расписания с занятыми минутами: мастер без записей в этот день (выходной, еще не нанят
+# или уже уволен) не добавляет свободных минут. По услугам сводки нет: группировка читает записи
+# диапазона по индексу (appointment_date, appointment_id), поэтому ее время растет с числом
+# записей в периоде, а не с числом дней.
+UTILIZATION_QUERIES = {
+    'day': """
+        SELECT schedule_date AS day,
+               SUM(booked_minutes) AS booked_minutes,
+               SUM(appointment_count) AS appointment_count,
+               COUNT(*) * :open_minutes AS available_minutes
+        FROM master_schedule
+        WHERE schedule_date >= :date_from AND schedule_date <= :date_to AND booked_minutes > 0
+        GROUP BY schedule_date
+        ORDER BY schedule_date
+    """,
+    'master': """
+        SELECT ms.master_id, m.master_name,
+               SUM(ms.booked_minutes) AS booked_minutes,
+               SUM(ms.appointment_count) AS appointment_count,
+               COUNT(*) * :open_minutes AS available_minutes
+        FROM master_schedule ms
+        LEFT JOIN masters m ON ms.master_id = m.master_id
+        WHERE ms.schedule_date >= :date_from AND ms.schedule_date <= :date_to AND ms.booked_minutes > 0
+        GROUP BY ms.master_id, m.master_name
+        ORDER BY ms.master_id
+    """,
+    'service': """
+        SELECT a.service_id, s.service_name,
+               SUM(s.duration) AS booked_minutes,
+               COUNT(*) AS appointment_count,
+               (SELECT COUNT(*) FROM master_schedule
+                WHERE schedule_date >= :date_from AND schedule_date <= :date_to AND booked_minutes > 0
+               ) * :open_minutes AS available_minutes
+        FROM appointments a
+        JOIN services s ON a.service_id = s.service_id
+        WHERE a.appointment_date >= :range_start AND a.appointment_date < :range_end
+        GROUP BY a.service_id, s.service_name
+        ORDER BY a.service_id
+    """,
+}
+
+
+def add_to_revenue(payment_ids):
+    """Учитывает новые оплаты в revenue_daily в текущей транзакции"""
+    if payment_ids:
+        db.session.execute(text(ADD_TO_REVENUE), {'payment_ids': list(payment_ids)})
+
+
+def report_params():
+    """Разбирает from, to и group_by: ((date_from, date_to, group_by), None) или (None, ответ с ошибкой)"""
+    try:
+        date_from = date.fromisoformat(request.args['from'])
+        date_to = date.fromisoformat(request.args['to'])
+    except (KeyError, ValueError):
+        return None, (jsonify({"message": "Укажите from и to в формате YYYY-MM-DD"}), 400)
+    if date_from > date_to:
+        return None, (jsonify({"message": "from не может быть позже to"}), 400)
+
+    group_by = request.args.get('group_by', 'day')
+    if group_by not in GROUP_BY:
+        return None, (jsonify({"message": f"group_by должен быть одним из: {', '.join(GROUP_BY)}"}), 400)
+    return (date_from, date_to, group_by), None
+
+
+def row_key(row):
+    """Ключ группы строки отчета: все колонки, кроме показателей"""
+    return {key: value.isoformat() if isinstance(value, date) else value
+            for key, value in row.items()
+            if key not in ('payment_count', 'revenue', 'booked_minutes', 'appointment_count', 'available_minutes')}
+
+
+@reports_bp.route('/revenue', methods=['GET'])
+@cached_jwt_required()
+@role_required([1, 2])
+def revenue_report():
+    """Выручка за период по дням, мастерам, услугам или способам оплаты из сводки revenue_daily"""
+    params, error = report_params()
+    if error:
+        return error
+    date_from, date_to, group_by = params
+    key_columns, join, select_columns = REVENUE_GROUPS[group_by]
+
+    try:
+        rows = db.session.execute(
+            text(f"""
+                SELECT {select_columns}, SUM(r.payment_count) AS payment_count, SUM(r.revenue) AS revenue
+                FROM revenue_daily r
+                {join}
+                WHERE r.revenue_date >= :date_from AND r.revenue_date <= :date_to
+                GROUP BY {key_columns}
+                ORDER BY {key_columns}
+            """),
+            {'date_from': date_from, 'date_to': date_to}
+        ).mappings().fetchall()
+
+        result = [{**row_key(row), 'payment_count': row['payment_count'], 'revenue': format_amount(row['revenue'])}
+                  for row in rows]
+        return jsonify({
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'group_by': group_by,
+            'rows': result,
+            'total': {
+                'payment_count': sum(row['payment_count'] for row in result),
+                'revenue': round(sum(row['revenue'] for row in result), 2)
+            }
+        }), 200
+    except Exception as e:
+        print(f"Error in /reports/revenue: {e}")
+        return jsonify({"message": "Ошибка на сервере"}), 500
+
+
+@reports_bp.route('/utilization', methods=['GET'])
+@cached_jwt_required()
+@role_required([1, 2])
+def utilization_report():
+    """Загрузка мастеров за период: занятые минуты относительно рабочего времени салона в дни с записями"""
+    params, error = report_params()
+    if error:
+        return error
+    date_from, date_to, group_by = params
+    if group_by not in UTILIZATION_QUERIES:
+        return jsonify({"message": "Загрузка не группируется по способу оплаты"}), 400
+
+    open_time = parse_time(current_app.config['SALON_OPEN_TIME'])
+    close_time = parse_time(current_app.config['SALON_CLOSE_TIME'])
+    open_minutes = (close_time.hour * 60 + close_time.minute) - (open_time.hour * 60 + open_time.minute)
+
+    try:
+        rows = db.session.execute(text(UTILIZATION_QUERIES[group_by]), {
+            'date_from': date_from,
+            'date_to': date_to,
+            'range_start': datetime.combine(date_from, time.min),
+            'range_end': datetime.combine(date_to + timedelta(days=1), time.min),
+            'open_minutes': open_minutes
+        }).mappings().fetchall()
+
+        result = []
+        for row in rows:
+            available = row['available_minutes'] or 0
+            result.append({
+                **row_key(row),
+                'appointment_count': row['appointment_count'],
+                'booked_minutes': row['booked_minutes'],
+                'available_minutes': available,
+                'utilization': round(row['booked_minutes'] / available, 4) if available else None
+            })
+        return jsonify({
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'group_by': group_by,
+            'rows': result
+        }), 200
+    except Exception as e:
+        print(f"Error in /reports/utilization: {e}")
+        return jsonify({"message": "Ошибка на сервере"}), 500
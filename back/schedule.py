@@ -0,0 +1,175 @@
+from datetime import date
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import text
+
+from back.availability import LOOKBACK
+from back.db import db
+from back.tokens import cached_jwt_required
+
+schedule_bp = Blueprint('schedule', __name__)
+
+# Сетка расписания: сутки делятся на 96 слотов по 15 минут, бит слота равен 1,
+# если хотя бы одна запись мастера его занимает
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Маска bit(96) для интервала с началом {start} и длительностью {duration} минут внутри одних
+# суток; интервал, который заканчивается после полуночи, обрезается концом суток.
+_MINUTE_OF_DAY = "(EXTRACT(EPOCH FROM CAST({start} AS time)) / 60)"
+SLOT_MASK = f"""
+    CAST(
+        repeat('0', FLOOR({_MINUTE_OF_DAY} / {SLOT_MINUTES})::int)
+        || repeat('1', LEAST({SLOTS_PER_DAY}, CEIL(({_MINUTE_OF_DAY} + {{duration}}) / {SLOT_MINUTES})::int)
+                       - FLOOR({_MINUTE_OF_DAY} / {SLOT_MINUTES})::int)
+        || repeat('0', {SLOTS_PER_DAY} - LEAST({SLOTS_PER_DAY}, CEIL(({_MINUTE_OF_DAY} + {{duration}}) / {SLOT_MINUTES})::int))
+        AS bit({SLOTS_PER_DAY})
+    )
+"""
+
+EMPTY_MASK = f"CAST(repeat('0', {SLOTS_PER_DAY}) AS bit({SLOTS_PER_DAY}))"
+
+# Запись, которая заканчивается после полуночи, делится по суткам: каждый день получает свою часть
+# минут и слотов, а сама запись (appointment_count, completed_count) считается в дне начала.
+# DAYS - начала суток, которые занимает запись с началом {start} и длительностью {duration};
+# PIECE_START и PIECE_MINUTES - ее часть в сутках, начинающихся в {day}.
+DAYS = (
+    "generate_series(date_trunc('day', {start}),"
+    " {start} + GREATEST({duration}, 1) * INTERVAL '1 minute' - INTERVAL '1 microsecond', INTERVAL '1 day')"
+)
+PIECE_START = "GREATEST({start}, CAST({day} AS timestamp))"
+PIECE_MINUTES = (
+    "CAST(EXTRACT(EPOCH FROM LEAST({start} + {duration} * INTERVAL '1 minute', CAST({day} AS timestamp) + INTERVAL '1 day')"
+    " - GREATEST({start}, CAST({day} AS timestamp))) / 60 AS integer)"
+)
+
+
+def _piece_mask(start, duration, day):
+    """Маска части записи в сутках {day}"""
+    return SLOT_MASK.format(
+        start=PIECE_START.format(start=start, day=day),
+        duration=PIECE_MINUTES.format(start=start, duration=duration, day=day)
+    )
+
+
+# Добавляет одну новую запись в расписание дня (и следующего, если запись переходит через
+# полночь). {source} - выборка с колонками master_id, appointment_date и duration
+# (в create_appointment - CTE только что вставленной записи).
+ADD_TO_SCHEDULE = f"""
+    INSERT INTO master_schedule (schedule_date, master_id, booked_minutes, slot_bitmap, appointment_count)
+    SELECT CAST(day.day_start AS date), source.master_id,
+           {PIECE_MINUTES.format(start='source.appointment_date', duration='source.duration', day='day.day_start')},
+           {_piece_mask('source.appointment_date', 'source.duration', 'day.day_start')},
+           CASE WHEN day.day_start = date_trunc('day', source.appointment_date) THEN 1 ELSE 0 END
+    FROM {{source}} source
+    CROSS JOIN LATERAL {DAYS.format(start='source.appointment_date', duration='source.duration')} AS day(day_start)
+    ON CONFLICT (schedule_date, master_id) DO UPDATE SET
+        booked_minutes = master_schedule.booked_minutes + EXCLUDED.booked_minutes,
+        slot_bitmap = master_schedule.slot_bitmap | EXCLUDED.slot_bitmap,
+        appointment_count = master_schedule.appointment_count + EXCLUDED.appointment_count
+"""
+
+# Оплата переводит записи в "Завершено"; счетчик завершенных растет только при смене статуса
+COMPLETE_APPOINTMENTS = """
+    WITH completed AS (
+        UPDATE appointments
+        SET status = 'Завершено'
+        WHERE appointment_id = ANY(:appointment_ids) AND status IS DISTINCT FROM 'Завершено'
+        RETURNING master_id, appointment_date
+    ),
+    per_day AS (
+        SELECT master_id, CAST(appointment_date AS date) AS schedule_date, COUNT(*) AS completed
+        FROM completed
+        GROUP BY 1, 2
+    )
+    UPDATE master_schedule
+    SET completed_count = master_schedule.completed_count + per_day.completed
+    FROM per_day
+    WHERE master_schedule.master_id = per_day.master_id
+      AND master_schedule.schedule_date = per_day.schedule_date
+"""
+
+
+# Пересчитывает расписание для пар (мастер, день) целиком по таблице appointments, а также дни,
+# на которые переходят записи, начатые в эти дни. В день попадают и записи предыдущих суток,
+# которые заканчиваются после полуночи.
+REFRESH_SCHEDULE = f"""
+    WITH keys AS (
+        SELECT * FROM unnest(CAST(:master_ids AS integer[]), CAST(:dates AS date[])) AS k(master_id, schedule_date)
+    ),
+    days AS (
+        SELECT master_id, schedule_date FROM keys
+        UNION
+        SELECT keys.master_id, CAST(day.day_start AS date)
+        FROM keys
+        JOIN appointments a
+            ON a.master_id = keys.master_id
+            AND a.appointment_date >= keys.schedule_date
+            AND a.appointment_date < keys.schedule_date + 1
+        JOIN services s ON a.service_id = s.service_id
+        CROSS JOIN LATERAL {DAYS.format(start='a.appointment_date', duration='s.duration')} AS day(day_start)
+    )
+    INSERT INTO master_schedule
+        (schedule_date, master_id, booked_minutes, slot_bitmap, appointment_count, completed_count)
+    SELECT days.schedule_date, days.master_id,
+           COALESCE(SUM({PIECE_MINUTES.format(start='a.appointment_date', duration='s.duration', day='days.schedule_date')}), 0),
+           COALESCE(bit_or({_piece_mask('a.appointment_date', 's.duration', 'days.schedule_date')}), {EMPTY_MASK}),
+           COUNT(a.appointment_id) FILTER (WHERE a.appointment_date >= days.schedule_date),
+           COUNT(a.appointment_id) FILTER (WHERE a.appointment_date >= days.schedule_date AND a.status = 'Завершено')
+    FROM days
+    LEFT JOIN (appointments a LEFT JOIN services s ON a.service_id = s.service_id)
+        ON a.master_id = days.master_id
+        AND a.appointment_date >= days.schedule_date - {LOOKBACK}
+        AND a.appointment_date < days.schedule_date + 1
+        AND (a.appointment_date >= days.schedule_date
+             OR a.appointment_date + s.duration * INTERVAL '1 minute' > days.schedule_date)
+    GROUP BY days.schedule_date, days.master_id
+    ON CONFLICT (schedule_date, master_id) DO UPDATE SET
+        booked_minutes = EXCLUDED.booked_minutes,
+        slot_bitmap = EXCLUDED.slot_bitmap,
+        appointment_count = EXCLUDED.appointment_count,
+        completed_count = EXCLUDED.completed_count
+"""
+
+SCHEDULE_FOR_DATE = """
+    SELECT master_id, booked_minutes, slot_bitmap, appointment_count, completed_count
+    FROM master_schedule
+    WHERE schedule_date = :schedule_date
+    ORDER BY master_id
+"""
+
+
+def refresh_schedule(keys):
+    """Пересчитывает расписание для пар (master_id, date) и дней, на которые переходят их записи"""
+    keys = list(keys)
+    if not keys:
+        return
+    master_ids, dates = zip(*keys)
+    db.session.execute(text(REFRESH_SCHEDULE), {'master_ids': list(master_ids), 'dates': list(dates)})
+
+
+@schedule_bp.route('/schedule', methods=['GET'])
+@cached_jwt_required()
+def get_schedule():
+    """Расписание всех мастеров на день из master_schedule - один поиск по первичному ключу"""
+    try:
+        schedule_date = date.fromisoformat(request.args.get('date', ''))
+    except ValueError:
+        return jsonify({"message": "Неверный формат даты"}), 400
+
+    try:
+        rows = db.session.execute(text(SCHEDULE_FOR_DATE), {'schedule_date': schedule_date}).fetchall()
+        return jsonify({
+            'date': schedule_date.isoformat(),
+            'slot_minutes': SLOT_MINUTES,
+            'masters': [{
+                'master_id': row.master_id,
+                'booked_minutes': row.booked_minutes,
+                'appointment_count': row.appointment_count,
+                'completed_count': row.completed_count,
+                'slots': row.slot_bitmap
+            } for row in rows]
+        }), 200
+    except Exception as e:
+        print(f"Error in /schedule: {e}")
+        return jsonify({"message": "Ошибка на сервере"}), 500
@@ -0,0 +1,135 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt, get_jwt_header, verify_jwt_in_request
+from flask_jwt_extended.exceptions import RevokedTokenError
+
+
+class TokenCache:
+    """Ограниченный LRU-кэш проверенных токенов: sha256(токен) -> (заголовок, claims).
+
+    Запись живет не дольше самого токена (claim exp).
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            header, claims = entry
+            if 'exp' in claims and claims['exp'] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, token, header, claims):
+        with self._lock:
+            self._entries[self.key(token)] = (header, claims)
+            self._entries.move_to_end(self.key(token))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, token):
+        with self._lock:
+            self._entries.pop(self.key(token), None)
+
+
+class RevokedTokens:
+    """Отозванные токены: jti -> exp. После истечения срока токен отклоняется и так,
+    поэтому просроченные записи удаляются при каждом новом отзыве.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, exp):
+        now = time.time()
+        with self._lock:
+            for expired in [key for key, value in self._entries.items() if value is not None and value <= now]:
+                del self._entries[expired]
+            self._entries[jti] = exp
+
+    def __contains__(self, jti):
+        with self._lock:
+            return jti in self._entries
+
+
+def init_tokens(app):
+    """Кэш проверенных токенов и список отозванных - свои у каждого приложения (app.extensions)"""
+    app.extensions['token_cache'] = TokenCache(app.config['AUTH_TOKEN_CACHE_SIZE'])
+    app.extensions['revoked_tokens'] = RevokedTokens()
+
+
+def get_token_cache():
+    return current_app.extensions['token_cache']
+
+
+def revoke_token(claims, token=None):
+    """Отзывает токен по jti и убирает его из кэша"""
+    current_app.extensions['revoked_tokens'].add(claims['jti'], claims.get('exp'))
+    if token:
+        get_token_cache().discard(token)
+
+
+def is_revoked(claims):
+    return claims.get('jti') in current_app.extensions['revoked_tokens']
+
+
+def get_claims():
+    """Claims токена текущего запроса: из cached_jwt_required() или, для маршрутов
+    с jwt_required() из flask_jwt_extended, из get_jwt()
+    """
+    claims = g.get('jwt_claims')
+    return claims if claims is not None else get_jwt()
+
+
+def bearer_token():
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):].strip()
+    return None
+
+
+def cached_jwt_required():
+    """Аналог jwt_required() из flask_jwt_extended с кэшем проверенных токенов.
+
+    Если токен уже проверялся и еще не истек, подпись не проверяется повторно: claims берутся
+    из кэша. На обоих путях claims кладутся в g.jwt_claims (читать через get_claims()), отзыв
+    токена проверяется тоже на обоих.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            token = bearer_token()
+            entry = get_token_cache().get(token) if token else None
+
+            if entry is None:
+                verify_jwt_in_request()
+                claims = get_jwt()
+                if token:
+                    get_token_cache().put(token, get_jwt_header(), claims)
+            else:
+                header, claims = entry
+                if is_revoked(claims):
+                    raise RevokedTokenError(header, claims)
+            g.jwt_claims = claims
+
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
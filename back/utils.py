@@ -1,20 +1,54 @@
+import base64
 import json
+from datetime import datetime
 from functools import wraps
 
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
+
+from back.tokens import get_claims
+
+
+def get_role_id(claims):
+    """role_id из claims токена. Токены старого формата хранят роль в JSON-строке identity"""
+    role_id = claims.get('role_id')
+    if role_id is None and isinstance(claims.get('sub'), str) and claims['sub'].startswith('{'):
+        role_id = json.loads(claims['sub']).get('role_id')
+    return role_id
 
 
 def role_required(required_role_ids):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            identity = get_jwt_identity()
-            if isinstance(identity, str):
-                identity = json.loads(identity)
-            if identity and identity['role_id'] in required_role_ids:
+            if get_role_id(get_claims()) in required_role_ids:
                 return f(*args, **kwargs)
             else:
                 return jsonify({"message": "Доступ запрещен"}), 403
         return decorated_function
     return decorator
+
+
+def format_amount(amount):
+    """Приводит сумму из БД (Decimal или None) к числу для JSON"""
+    return float(amount) if amount else 0.0
+
+
+def escape_like(value):
+    """Экранирует %, _ и \\ для подстановки пользовательского текста в шаблон LIKE"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def encode_cursor(appointment_date, appointment_id):
+    """Кодирует позицию (appointment_date, appointment_id) в непрозрачную строку курсора"""
+    raw = f"{appointment_date.isoformat()}|{appointment_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор, созданный encode_cursor. Бросает ValueError, если курсор поврежден"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        date_part, id_part = raw.split('|')
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
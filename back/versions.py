@@ -0,0 +1,97 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from back.db import db
+from back.encoding import negotiated, representation_tag
+
+# Таблицы справочников, для которых ведется счетчик версий
+VERSIONED_TABLES = ('clients', 'masters', 'services')
+
+# Версии, прочитанные этим процессом: table -> (version, время чтения)
+_cached_versions = {}
+_cache_lock = threading.Lock()
+
+
+def bump_version(table):
+    """Увеличивает версию таблицы в текущей транзакции.
+
+    Локальный кэш версии сбрасывается после commit, поэтому этот процесс сразу отдает
+    новый ETag; остальные процессы увидят новую версию не позже чем через TABLE_VERSION_TTL.
+    """
+    db.session.execute(
+        text("""
+            INSERT INTO table_versions (table_name, version) VALUES (:table_name, 1)
+            ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1
+        """),
+        {'table_name': table}
+    )
+    db.session.info.setdefault('bumped_tables', set()).add(table)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_bumped(session):
+    tables = session.info.pop('bumped_tables', ())
+    with _cache_lock:
+        for table in tables:
+            _cached_versions.pop(table, None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_bumped(session):
+    session.info.pop('bumped_tables', None)
+
+
+VERSION_SELECT = "SELECT version FROM table_versions WHERE table_name = :table_name"
+
+
+def cached_version(table, ttl):
+    """Версия из памяти процесса, если она прочитана не раньше чем ttl секунд назад, иначе None"""
+    with _cache_lock:
+        cached = _cached_versions.get(table)
+    if cached and time.monotonic() - cached[1] < ttl:
+        return cached[0]
+    return None
+
+
+def remember_version(table, version):
+    with _cache_lock:
+        _cached_versions[table] = (version, time.monotonic())
+
+
+def current_version(table):
+    """Версия таблицы; в пределах TABLE_VERSION_TTL берется из памяти без обращения к базе"""
+    version = cached_version(table, current_app.config['TABLE_VERSION_TTL'])
+    if version is None:
+        version = db.session.execute(text(VERSION_SELECT), {'table_name': table}).scalar() or 0
+        remember_version(table, version)
+    return version
+
+
+def conditional_get(table):
+    """Декоратор GET-обработчика: ETag по версии таблицы и 304 при совпадении If-None-Match.
+
+    ETag включает формат и сжатие ответа (representation_tag): JSON, MessagePack и сжатые тела
+    одного URL - разные представления, и 304 не должен подтверждать чужое. If-None-Match
+    сравнивается слабо, как требует RFC 9110.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            etag = f"{table}-{current_version(table)}-{representation_tag(*negotiated())}"
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.vary.update(('Accept', 'Accept-Encoding'))
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,174 @@
+"""Чтение справочников и записей при сотнях одновременных клиентов: Flask (WSGI) против ASGI-режима.
+
+Поднимает по одному рабочему процессу каждого вида на базе бенчмарка - многопоточный WSGI-сервер
+werkzeug и uvicorn с back.asgi - и держит --concurrency открытых keep-alive соединений, каждое
+из которых по кругу запрашивает GET /appointment?limit=100, /clients и /services:
+
+    python -m bench.async_reads --db-url postgresql://... --concurrency 200 --requests 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from flask_jwt_extended import create_access_token
+
+from bench.common import make_app, seed_calendar, summarize
+
+PATHS = ['/appointment?limit=100', '/clients', '/services']
+
+
+def serve(mode, db_url, port, threads):
+    """Запускает сервер в текущем процессе (вызывается в дочернем процессе бенчмарка)"""
+    config = {'ASYNC_POOL_SIZE': threads, 'ASYNC_MAX_OVERFLOW': 0}
+    if mode == 'sync':
+        from werkzeug.serving import make_server
+
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        app = make_app(db_url, SQLALCHEMY_ENGINE_OPTIONS={'pool_size': threads, 'max_overflow': 0}, **config)
+        make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+
+        from back.asgi import AsyncReadApp
+
+        app = AsyncReadApp(make_app(db_url, **config))
+        uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+
+
+async def read_response(reader):
+    """Статус ответа; тело читается по Content-Length или chunked"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def run_client(host, port, token, requests, durations, statuses):
+    reader = writer = None
+    for i in range(requests):
+        path = PATHS[i % len(PATHS)]
+        request = (f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n\r\n").encode('ascii')
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            status, keep_alive = 'error', False
+        durations[path].append((time.perf_counter() - started) * 1000)
+        statuses[path][str(status)] += 1
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url, token, concurrency, requests):
+    parts = urlsplit(url)
+    durations = defaultdict(list)
+    statuses = defaultdict(Counter)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(parts.hostname, parts.port, token, requests, durations, statuses)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    total = sum(len(values) for values in durations.values())
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'total_rps': round(total / elapsed, 2),
+        'endpoints': {
+            path: {**summarize(durations[path]), 'statuses': dict(statuses[path])} for path in PATHS
+        },
+    }
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), 1))
+            return
+        except (OSError, asyncio.TimeoutError):
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--appointments', type=int, default=50_000)
+    parser.add_argument('--no-seed', action='store_true', help='использовать уже заполненную базу')
+    parser.add_argument('--concurrency', type=int, default=200, help='одновременных клиентов')
+    parser.add_argument('--requests', type=int, default=20, help='запросов на клиента')
+    parser.add_argument('--threads', type=int, default=20,
+                        help='соединений с БД на сервер (и пул движка, и пул asyncpg)')
+    parser.add_argument('--port', type=int, default=8750)
+    parser.add_argument('--serve', choices=['sync', 'async'], help=argparse.SUPPRESS)
+    parser.add_argument('--output', help='файл для JSON-отчета (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.db_url, args.port, args.threads)
+        return
+
+    app = make_app(args.db_url)
+    with app.app_context():
+        if not args.no_seed:
+            seed_calendar(args.appointments)
+        token = create_access_token(identity='1', additional_claims={'role_id': 1})
+
+    report = {'concurrency': args.concurrency, 'requests_per_client': args.requests, 'servers': {}}
+    for offset, mode in enumerate(['sync', 'async']):
+        port = args.port + offset
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'bench.async_reads', '--serve', mode, '--db-url', args.db_url,
+             '--port', str(port), '--threads', str(args.threads)],
+            stdout=subprocess.DEVNULL
+        )
+        try:
+            wait_for_port(port)
+            report['servers'][mode] = asyncio.run(
+                run_load(f'http://127.0.0.1:{port}', token, args.concurrency, args.requests)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Накладные расходы авторизации на один запрос.
+
+Сравнивает исходную схему (jwt_required + роль в JSON-строке identity) с нативными claims
+и кэшем проверенных токенов (cached_jwt_required):
+
+    python -m bench.auth --db-url postgresql://... --iterations 5000
+"""
+import argparse
+import json
+
+from flask import jsonify
+from flask_jwt_extended import create_access_token, jwt_required
+
+from back.tokens import cached_jwt_required
+from back.utils import role_required
+from bench.common import make_app, summarize, timed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    app = make_app(args.db_url)
+
+    @app.route('/_bench/none')
+    def bench_none():
+        return jsonify(ok=True)
+
+    @app.route('/_bench/legacy')
+    @jwt_required()
+    @role_required([1])
+    def bench_legacy():
+        return jsonify(ok=True)
+
+    @app.route('/_bench/cached')
+    @cached_jwt_required()
+    @role_required([1])
+    def bench_cached():
+        return jsonify(ok=True)
+
+    with app.app_context():
+        legacy_token = create_access_token(identity=json.dumps({'user_id': '1', 'role_id': 1}))
+        token = create_access_token(identity='1', additional_claims={'role_id': 1})
+
+    client = app.test_client()
+
+    def request(path, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+
+        def run(_):
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, response.status_code
+        return run
+
+    baseline = summarize(timed(request('/_bench/none'), args.iterations))
+    legacy = summarize(timed(request('/_bench/legacy', legacy_token), args.iterations))
+    cached = summarize(timed(request('/_bench/cached', token), args.iterations))
+
+    report = {
+        'iterations': args.iterations,
+        'no_auth': baseline,
+        'legacy': legacy,
+        'cached': cached,
+        'overhead_p50_ms': {
+            'legacy': round(legacy['p50_ms'] - baseline['p50_ms'], 3),
+            'cached': round(cached['p50_ms'] - baseline['p50_ms'], 3),
+        },
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Бенчмарк движка занятости мастеров на календаре со 100k+ записями.
+
+Свободные окна (GET /masters/<id>/free-slots) и создание записи запросом CREATE_APPOINTMENT,
+как в POST /appointment; созданные записи откатываются, календарь не меняется:
+
+    python -m bench.availability --db-url postgresql://... --appointments 100000
+"""
+import argparse
+import json
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from back.availability import busy_intervals, day_bounds, free_slots, parse_time
+from back.db import db
+from back.queries import CREATE_APPOINTMENT
+from bench.common import make_app, seed_calendar, summarize, timed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--appointments', type=int, default=100_000)
+    parser.add_argument('--masters', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--no-seed', action='store_true', help='использовать уже заполненную базу')
+    args = parser.parse_args(argv)
+
+    app = make_app(args.db_url)
+    with app.app_context():
+        if not args.no_seed:
+            seed_calendar(args.appointments, masters=args.masters)
+
+        masters = [row.master_id for row in db.session.execute(text("SELECT master_id FROM masters"))]
+        client_id = db.session.execute(text("SELECT MIN(client_id) FROM clients")).scalar()
+        services = [row.service_id for row in db.session.execute(text("SELECT service_id FROM services"))]
+        first_day, last_day = db.session.execute(
+            text("SELECT MIN(appointment_date)::date, MAX(appointment_date)::date FROM appointments")
+        ).fetchone()
+        total = db.session.execute(text("SELECT COUNT(*) FROM appointments")).scalar()
+        days = max((last_day - first_day).days, 1)
+        open_time = parse_time(app.config['SALON_OPEN_TIME'])
+        close_time = parse_time(app.config['SALON_CLOSE_TIME'])
+        step = app.config['SLOT_STEP_MINUTES']
+
+        def pick(i):
+            return masters[i % len(masters)], first_day + timedelta(days=(i * 7919) % days)
+
+        def run_free_slots(i):
+            master_id, day = pick(i)
+            day_start, day_end = day_bounds(day, open_time, close_time)
+            free_slots(busy_intervals(master_id, day_start, day_end), day_start, day_end, 60, step)
+
+        outcomes = {'created': 0, 'busy': 0}
+
+        def run_create(i):
+            master_id, day = pick(i)
+            day_start, _ = day_bounds(day, open_time, close_time)
+            created = db.session.execute(text(CREATE_APPOINTMENT), {
+                'client_id': client_id,
+                'master_id': master_id,
+                'service_id': services[i % len(services)],
+                'appointment_date': day_start + timedelta(minutes=15 * (i % 40))
+            }).fetchone()
+            db.session.rollback()
+            outcomes['created' if created.appointment_id else 'busy'] += 1
+
+        report = {
+            'appointments': total,
+            'masters': len(masters),
+            'free_slots': summarize(timed(run_free_slots, args.iterations)),
+            'create_appointment': summarize(timed(run_create, args.iterations)),
+        }
+        # Доля занятых слотов: проверка конфликта и вставка измерены в обоих исходах
+        report['create_appointment'].update(outcomes)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
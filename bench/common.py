@@ -0,0 +1,109 @@
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from back.app import create_app
+from back.db import db
+from back.reports import add_to_revenue
+from back.schedule import refresh_schedule
+
+
+def make_app(db_url, **config):
+    """Приложение, подключенное к базе бенчмарка"""
+    return create_app({'SQLALCHEMY_DATABASE_URI': db_url, **config})
+
+
+def seed_calendar(appointments, masters=20, clients=1000, start='2024-01-01 09:00'):
+    """Заполняет базу синтетическим календарем: мастера, клиенты, услуги, записи и оплаты.
+
+    Записи раскладываются по мастерам подряд, с шагом 30-120 минут в рабочее время,
+    поэтому у каждого мастера получается плотное многомесячное расписание. Если в базе уже
+    есть записи, календарь начинается на следующий день после последней из них, чтобы не
+    пересечься с ними. master_schedule и revenue_daily заполняются теми же функциями, что
+    и импорт пачкой. Вызывать внутри app_context().
+    """
+    start = datetime.fromisoformat(start)
+    latest = db.session.execute(text("SELECT MAX(appointment_date) FROM appointments")).scalar()
+    if latest is not None and latest >= start:
+        start = datetime.combine(latest.date() + timedelta(days=1), start.time())
+    first_id = db.session.execute(text("SELECT COALESCE(MAX(appointment_id), 0) FROM appointments")).scalar()
+    db.session.execute(text("""
+        INSERT INTO masters (master_name, phone)
+        SELECT 'Мастер ' || g, 'bm' || g FROM generate_series(1, :masters) g
+        ON CONFLICT DO NOTHING
+    """), {'masters': masters})
+    db.session.execute(text("""
+        INSERT INTO clients (client_name, phone)
+        SELECT 'Клиент ' || g, 'bc' || g FROM generate_series(1, :clients) g
+        ON CONFLICT DO NOTHING
+    """), {'clients': clients})
+    db.session.execute(text("""
+        INSERT INTO services (service_name, description, price, duration)
+        SELECT 'Услуга ' || g, '', 100 + g * 50, (ARRAY[30, 45, 60, 75, 90, 120])[1 + g % 6]
+        FROM generate_series(1, 10) g
+    """))
+    db.session.execute(text("""
+        WITH m AS (SELECT array_agg(master_id ORDER BY master_id) AS ids FROM masters),
+             c AS (SELECT array_agg(client_id ORDER BY client_id) AS ids FROM clients),
+             s AS (SELECT array_agg(service_id ORDER BY service_id) AS ids FROM services)
+        INSERT INTO appointments (client_id, master_id, service_id, appointment_date, status)
+        SELECT c.ids[1 + g % array_length(c.ids, 1)],
+               m.ids[1 + g % array_length(m.ids, 1)],
+               s.ids[1 + (g / array_length(m.ids, 1)) % array_length(s.ids, 1)],
+               CAST(:start AS timestamp)
+                   + ((g / array_length(m.ids, 1)) / 6) * INTERVAL '1 day'
+                   + ((g / array_length(m.ids, 1)) % 6) * INTERVAL '2 hours',
+               'Запланировано'
+        FROM generate_series(0, :appointments - 1) g, m, c, s
+    """), {'appointments': appointments, 'start': start})
+    # Оплачена примерно половина записей
+    payment_ids = db.session.execute(text("""
+        WITH paid AS (
+            UPDATE appointments a SET status = 'Завершено'
+            WHERE a.appointment_id % 2 = 0 AND a.appointment_id > :first_id
+            RETURNING a.appointment_id, a.client_id, a.service_id, a.appointment_date
+        )
+        INSERT INTO payments (client_id, appointment_id, payment_amount, payment_date, payment_method)
+        SELECT paid.client_id, paid.appointment_id, s.price, paid.appointment_date,
+               (ARRAY['Карта', 'Наличные'])[1 + paid.appointment_id % 4 / 2]
+        FROM paid
+        JOIN services s ON s.service_id = paid.service_id
+        RETURNING payment_id
+    """), {'first_id': first_id}).scalars().all()
+    keys = db.session.execute(text("""
+        SELECT DISTINCT master_id, CAST(appointment_date AS date)
+        FROM appointments
+        WHERE appointment_id > :first_id
+    """), {'first_id': first_id}).fetchall()
+    refresh_schedule(keys)
+    add_to_revenue(payment_ids)
+    db.session.commit()
+    db.session.execute(text("ANALYZE"))
+
+
+def timed(func, iterations):
+    """Выполняет func iterations раз и возвращает список длительностей в миллисекундах"""
+    durations = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        func(i)
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+
+def summarize(durations):
+    """p50/p95/p99 и среднее по списку длительностей в миллисекундах"""
+    ordered = sorted(durations)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'p50_ms': round(percentile(50), 3),
+        'p95_ms': round(percentile(95), 3),
+        'p99_ms': round(percentile(99), 3),
+    }
@@ -0,0 +1,171 @@
+"""Размер и время кодирования полного списка записей (GET /appointment) в разных форматах.
+
+Читает --appointments записей из базы бенчмарка один раз и кодирует их по частям так же, как
+потоковый ответ сервера: прежним способом (RowMapping + провайдер JSON Flask) и через
+back/encoding.py - JSON (orjson) и MessagePack, без сжатия, с gzip и с deflate:
+
+    python -m bench.encoding --db-url postgresql://... --appointments 100000 --levels 1,6
+
+Время - процессорное (process_time), лучшее из --repeat прогонов; decode_ms - разбор ответа клиентом.
+"""
+import argparse
+import json
+import sys
+import time
+import zlib
+
+from sqlalchemy import text
+
+from back.db import db
+from back.encoding import CODINGS, JSON_MIMETYPE, MSGPACK_MIMETYPE, StreamEncoder, msgpack, orjson
+from back.queries import (
+    APPOINTMENT_FIELDS, APPOINTMENT_ORDER, APPOINTMENT_SELECT, appointment_to_dict, appointment_values
+)
+from back.utils import format_amount
+from bench.common import make_app, seed_calendar
+
+
+def mapping_to_dict(item):
+    """Прежнее преобразование строки: обращение к RowMapping по имени колонки"""
+    return {
+        'appointment_id': item['appointment_id'],
+        'client_name': item['client_name'],
+        'master_name': item['master_name'],
+        'payment_amount': format_amount(item['payment_amount']),
+        'service_name': item['service_name'],
+        'appointment_date': item['appointment_date'],
+        'status': item['status'],
+        'master_id': item['master_id'],
+        'client_id': item['client_id']
+    }
+
+
+def partitioned(rows, size):
+    return [rows[start:start + size] for start in range(0, len(rows), size)]
+
+
+def best_cpu_ms(function, repeat):
+    """Лучшее процессорное время вызова function() и его результат"""
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = function()
+        elapsed = (time.process_time() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 1), result
+
+
+def legacy_body(app, partitions):
+    """Прежний потоковый ответ: по одному json.dumps на запись, части склеиваются строками"""
+    chunks = ['[']
+    separator = ''
+    for partition in partitions:
+        chunks.append(separator + ','.join(app.json.dumps(mapping_to_dict(item)) for item in partition))
+        separator = ','
+    chunks.append(']')
+    return ''.join(chunks).encode('utf-8')
+
+
+def encoded_body(rows_partitions, mimetype, coding, level):
+    encoder = StreamEncoder(mimetype, coding, level, APPOINTMENT_FIELDS)
+    return b''.join([encoder.encode(rows) for rows in rows_partitions] + [encoder.finish()])
+
+
+def decode(body, mimetype, coding):
+    if coding == 'gzip':
+        body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    elif coding == 'deflate':
+        body = zlib.decompress(body)
+    if mimetype == MSGPACK_MIMETYPE:
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(body)
+        # Как client/api.py: имена полей, затем строки-массивы
+        fields, *parts = unpacker
+        return [dict(zip(fields, row)) for part in parts for row in part]
+    return json.loads(body)
+
+
+def run(app, rows, mapping_rows, chunk_size, levels, repeat):
+    tuple_partitions = partitioned(rows, chunk_size)
+    mapping_partitions = partitioned(mapping_rows, chunk_size)
+
+    build_mapping_ms, _ = best_cpu_ms(
+        lambda: [[mapping_to_dict(item) for item in partition] for partition in mapping_partitions], repeat
+    )
+    build_tuple_ms, _ = best_cpu_ms(
+        lambda: [[appointment_to_dict(item) for item in partition] for partition in tuple_partitions], repeat
+    )
+    build_values_ms, _ = best_cpu_ms(
+        lambda: [[appointment_values(item) for item in partition] for partition in tuple_partitions], repeat
+    )
+    report = {
+        'rows': len(rows),
+        'orjson': orjson is not None,
+        'msgpack': msgpack is not None,
+        # Только преобразование строк: словари из RowMapping по имени и из кортежа, кортежи значений
+        'build_ms': {'mapping': build_mapping_ms, 'tuple': build_tuple_ms, 'values': build_values_ms},
+        'variants': {}
+    }
+
+    legacy_ms, legacy = best_cpu_ms(lambda: legacy_body(app, mapping_partitions), repeat)
+    decode_ms, _ = best_cpu_ms(lambda: decode(legacy, JSON_MIMETYPE, None), repeat)
+    report['variants']['legacy-json'] = {'bytes': len(legacy), 'encode_ms': legacy_ms, 'decode_ms': decode_ms}
+
+    mimetypes = [JSON_MIMETYPE] + ([MSGPACK_MIMETYPE] if msgpack is not None else [])
+    for mimetype in mimetypes:
+        name = 'json' if mimetype == JSON_MIMETYPE else 'msgpack'
+        variants = [(None, None)] + [(coding, level) for coding in CODINGS for level in levels]
+        for coding, level in variants:
+            # encode_ms включает подготовку строк, как в ответе сервера
+            encode_ms, body = best_cpu_ms(
+                lambda: encoded_body(
+                    [[appointment_values(item) for item in partition] for partition in tuple_partitions],
+                    mimetype, coding, level
+                ),
+                repeat
+            )
+            decode_ms, decoded = best_cpu_ms(lambda: decode(body, mimetype, coding), repeat)
+            if len(decoded) != len(rows):
+                raise RuntimeError(f"{name}/{coding}: decoded {len(decoded)} of {len(rows)} rows")
+            label = name if coding is None else f"{name}+{coding}-{level}"
+            report['variants'][label] = {
+                'bytes': len(body),
+                'ratio': round(len(body) / len(legacy), 3),
+                'encode_ms': encode_ms,
+                'decode_ms': decode_ms
+            }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--appointments', type=int, default=100_000)
+    parser.add_argument('--no-seed', action='store_true', help='использовать уже заполненную базу')
+    parser.add_argument('--levels', default='1,6', help='уровни zlib через запятую')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='файл для JSON-отчета (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    app = make_app(args.db_url)
+    with app.app_context():
+        if not args.no_seed:
+            seed_calendar(args.appointments, clients=args.appointments // 10)
+        sql = text(f"{APPOINTMENT_SELECT} {APPOINTMENT_ORDER} LIMIT :limit")
+        rows = db.session.execute(sql, {'limit': args.appointments}).fetchall()
+        mapping_rows = db.session.execute(sql, {'limit': args.appointments}).mappings().fetchall()
+        if len(rows) < args.appointments:
+            print(f"Warning: only {len(rows)} appointments in the database", file=sys.stderr)
+        report = run(app, rows, mapping_rows, app.config['APPOINTMENT_STREAM_CHUNK'],
+                     [int(level) for level in args.levels.split(',')], args.repeat)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
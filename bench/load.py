@@ -0,0 +1,267 @@
+"""Нагрузочный тест API: параллельные «рабочие станции» по всем маршрутам.
+
+Строит create_app() на отдельной базе, заполняет ее синтетическими данными и гоняет смесь
+запросов из нескольких потоков. Отчет (JSON) - по каждому маршруту p50/p95/p99, пропускная
+способность, коды ответов и число SQL-запросов на вызов; отчеты разных коммитов можно сравнивать diff'ом:
+
+    python -m bench --db-url postgresql://... --workstations 8 --iterations 200 --output report.json
+"""
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+from back.db import db
+from back.hashing import hash_password
+from bench.common import make_app, seed_calendar, summarize
+
+BENCH_USER = 'bench_workstation'
+BENCH_PASSWORD = 'bench_password'
+
+# Доля каждого действия в смеси запросов рабочей станции
+SCENARIO = {
+    'GET /clients': 10,
+    'GET /services': 10,
+    'GET /masters': 10,
+    'GET /appointment?limit': 20,
+    'GET /appointment': 1,
+    'GET /masters/<id>/free-slots': 10,
+    'GET /schedule': 5,
+    'POST /appointment': 10,
+    'POST /payment': 5,
+    'POST+DELETE /client': 3,
+    'POST+DELETE /master': 2,
+    'POST+DELETE /service': 2,
+    'POST /auth/login': 1,
+}
+
+_current = threading.local()
+
+
+class Recorder:
+    """Собирает длительности, коды ответов и число SQL-запросов по маршрутам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.queries = defaultdict(int)
+
+    def add(self, label, duration_ms, status, queries):
+        with self._lock:
+            self.durations[label].append(duration_ms)
+            self.statuses[label][str(status)] += 1
+            self.queries[label] += queries
+
+    def report(self, elapsed):
+        endpoints = {}
+        for label in sorted(self.durations):
+            count = len(self.durations[label])
+            endpoints[label] = {
+                **summarize(self.durations[label]),
+                'throughput_rps': round(count / elapsed, 2),
+                'statuses': dict(sorted(self.statuses[label].items())),
+                'queries_per_request': round(self.queries[label] / count, 2),
+            }
+        return endpoints
+
+
+def count_query(*_):
+    if getattr(_current, 'queries', None) is not None:
+        _current.queries += 1
+
+
+class Workstation:
+    def __init__(self, app, recorder, number, seed, ids):
+        self.client = app.test_client()
+        self.recorder = recorder
+        self.number = number
+        self.random = random.Random(seed + number)
+        self.ids = ids
+        self.headers = {}
+        self.counter = 0
+        self.appointments = []
+
+    def call(self, label, method, path, **kwargs):
+        _current.queries = 0
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, headers=self.headers, **kwargs)
+        response.get_data()  # потоковые ответы выполняют запросы при чтении тела
+        duration = (time.perf_counter() - started) * 1000
+        self.recorder.add(label, duration, response.status_code, _current.queries)
+        _current.queries = None
+        return response
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.number}n{self.counter}"
+
+    def login(self):
+        response = self.call('POST /auth/login', 'POST', '/auth/login',
+                             json={'username': BENCH_USER, 'password': BENCH_PASSWORD})
+        token = response.get_json().get('access_token')
+        if token:
+            self.headers = {'Authorization': f'Bearer {token}'}
+
+    def step(self, action):
+        pick = self.random.choice
+        if action == 'POST /auth/login':
+            self.login()
+        elif action == 'GET /appointment?limit':
+            self.call(action, 'GET', '/appointment?limit=100')
+        elif action == 'GET /masters/<id>/free-slots':
+            day = self.ids['first_day'] + timedelta(days=self.random.randrange(self.ids['days']))
+            self.call(action, 'GET', f"/masters/{pick(self.ids['masters'])}/free-slots",
+                      query_string={'date': day.isoformat(), 'service_id': pick(self.ids['services'])})
+        elif action == 'GET /schedule':
+            day = self.ids['first_day'] + timedelta(days=self.random.randrange(self.ids['days']))
+            self.call(action, 'GET', '/schedule', query_string={'date': day.isoformat()})
+        elif action == 'POST /appointment':
+            # Будущие даты: часть попадет на занятое время и получит 400, как у живой стойки
+            start = datetime(2035, 1, 1, 9) + timedelta(days=self.random.randrange(365),
+                                                        minutes=15 * self.random.randrange(40))
+            response = self.call(action, 'POST', '/appointment', json={
+                'client_id': pick(self.ids['clients']),
+                'master_id': pick(self.ids['masters']),
+                'service_id': pick(self.ids['services']),
+                'appointment_date': start.isoformat()
+            })
+            if response.status_code == 201:
+                self.appointments.append(response.get_json()['appointment_id'])
+        elif action == 'POST /payment':
+            if self.appointments:
+                self.call(action, 'POST', '/payment', json={
+                    'client_id': pick(self.ids['clients']),
+                    'appointment_id': self.appointments.pop(),
+                    'payment_amount': 500,
+                    'payment_method': pick(['Карта', 'Наличные'])
+                })
+        elif action == 'POST+DELETE /client':
+            phone = self.unique('lc')
+            self.call('POST /client', 'POST', '/client', json={'client_name': 'Нагрузка', 'phone': phone})
+            client_id = db_scalar("SELECT client_id FROM clients WHERE phone = :phone", phone=phone)
+            if client_id:
+                self.call('DELETE /client/<id>', 'DELETE', f'/client/{client_id}')
+        elif action == 'POST+DELETE /master':
+            phone = self.unique('lm')
+            self.call('POST /master', 'POST', '/master', json={'master_name': 'Нагрузка', 'phone': phone})
+            master_id = db_scalar("SELECT master_id FROM masters WHERE phone = :phone", phone=phone)
+            if master_id:
+                self.call('DELETE /master/<id>', 'DELETE', f'/master/{master_id}')
+        elif action == 'POST+DELETE /service':
+            name = self.unique('Нагрузочная услуга ')
+            self.call('POST /service', 'POST', '/service',
+                      json={'service_name': name, 'price': 100, 'duration': 30})
+            service_id = db_scalar("SELECT service_id FROM services WHERE service_name = :name", name=name)
+            if service_id:
+                self.call('DELETE /service/<id>', 'DELETE', f'/service/{service_id}')
+        else:
+            method, path = action.split(' ', 1)
+            self.call(action, method, path)
+
+    def run(self, iterations):
+        self.login()
+        actions = list(SCENARIO)
+        weights = list(SCENARIO.values())
+        for _ in range(iterations):
+            self.step(self.random.choices(actions, weights)[0])
+
+
+_app = None
+
+
+def db_scalar(sql, **params):
+    """Вспомогательный запрос бенчмарка (не учитывается в отчете)"""
+    with _app.app_context():
+        return db.session.execute(text(sql), params).scalar()
+
+
+def prepare(app, args):
+    with app.app_context():
+        if not args.no_seed:
+            seed_calendar(args.appointments, masters=args.masters, clients=args.clients)
+        db.session.execute(text("DELETE FROM users WHERE username = :username"), {'username': BENCH_USER})
+        db.session.execute(
+            text("INSERT INTO users (username, password_hash, role_id) VALUES (:username, :password_hash, 1)"),
+            {'username': BENCH_USER, 'password_hash': hash_password(BENCH_PASSWORD)}
+        )
+        db.session.commit()
+
+        first_day, last_day = db.session.execute(
+            text("SELECT MIN(appointment_date)::date, MAX(appointment_date)::date FROM appointments")
+        ).fetchone()
+        return {
+            'clients': [row[0] for row in db.session.execute(text("SELECT client_id FROM clients LIMIT 1000"))],
+            'masters': [row[0] for row in db.session.execute(text("SELECT master_id FROM masters"))],
+            'services': [row[0] for row in db.session.execute(text("SELECT service_id FROM services"))],
+            'first_day': first_day,
+            'days': max((last_day - first_day).days, 1),
+            'total_appointments': db.session.execute(text("SELECT COUNT(*) FROM appointments")).scalar(),
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    global _app
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--appointments', type=int, default=50_000)
+    parser.add_argument('--clients', type=int, default=5_000)
+    parser.add_argument('--masters', type=int, default=20)
+    parser.add_argument('--no-seed', action='store_true', help='использовать уже заполненную базу')
+    parser.add_argument('--workstations', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=200, help='действий на рабочую станцию')
+    parser.add_argument('--bcrypt-rounds', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1, help='seed генератора смеси запросов')
+    parser.add_argument('--output', help='файл для JSON-отчета (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    _app = make_app(args.db_url, BCRYPT_ROUNDS=args.bcrypt_rounds)
+    ids = prepare(_app, args)
+
+    recorder = Recorder()
+    with _app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+
+    workstations = [Workstation(_app, recorder, number, args.seed, ids) for number in range(args.workstations)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workstations) as executor:
+        list(executor.map(lambda workstation: workstation.run(args.iterations), workstations))
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'commit': git_commit(),
+        'dataset': {
+            'appointments': ids['total_appointments'],
+            'masters': len(ids['masters']),
+            'services': len(ids['services']),
+        },
+        'workstations': args.workstations,
+        'iterations': args.iterations,
+        'elapsed_s': round(elapsed, 2),
+        'total_rps': round(sum(len(d) for d in recorder.durations.values()) / elapsed, 2),
+        'endpoints': recorder.report(elapsed),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Пропускная способность POST /auth/login при разных размерах пула bcrypt.
+
+    python -m bench.login --db-url postgresql://... --pool-sizes 0,1,2,4 --workstations 32
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from back.db import db
+from back.hashing import hash_password
+from bench.common import make_app, summarize
+
+BENCH_USER = 'bench_login'
+BENCH_PASSWORD = 'bench_password'
+
+
+def run(app, workstations, requests_per_workstation):
+    """Каждая «рабочая станция» последовательно логинится; возвращает длительности и коды ответов"""
+    def workstation(_):
+        client = app.test_client()
+        results = []
+        for _ in range(requests_per_workstation):
+            started = time.perf_counter()
+            response = client.post('/auth/login', json={'username': BENCH_USER, 'password': BENCH_PASSWORD})
+            results.append(((time.perf_counter() - started) * 1000, response.status_code))
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workstations) as executor:
+        results = [result for chunk in executor.map(workstation, range(workstations)) for result in chunk]
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(results),
+        'throughput_rps': round(len(results) / elapsed, 2),
+        'statuses': statuses,
+        'latency': summarize([duration for duration, status in results if status == 200] or [0]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--pool-sizes', default='0,1,2,4')
+    parser.add_argument('--queue-limit', type=int, default=64)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--workstations', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=4, help='входов на рабочую станцию')
+    args = parser.parse_args(argv)
+
+    report = {'rounds': args.rounds, 'workstations': args.workstations, 'pool_sizes': {}}
+    for pool_size in (int(size) for size in args.pool_sizes.split(',')):
+        app = make_app(args.db_url, BCRYPT_POOL_SIZE=pool_size,
+                       BCRYPT_QUEUE_LIMIT=args.queue_limit, BCRYPT_ROUNDS=args.rounds)
+        with app.app_context():
+            db.session.execute(text("DELETE FROM users WHERE username = :username"), {'username': BENCH_USER})
+            db.session.execute(
+                text("INSERT INTO users (username, password_hash, role_id) VALUES (:username, :password_hash, 1)"),
+                {'username': BENCH_USER, 'password_hash': hash_password(BENCH_PASSWORD)}
+            )
+            db.session.commit()
+        report['pool_sizes'][str(pool_size)] = run(app, args.workstations, args.requests)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
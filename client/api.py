@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import msgpack
+except ImportError:  # без msgpack клиент запрашивает JSON
+    msgpack = None
+
+# Адрес сервера и таймауты (секунды) переопределяются переменными окружения
+BASE_URL = os.environ.get('NAIL_SALON_API_URL', 'http://localhost:5000')
+CONNECT_TIMEOUT = float(os.environ.get('NAIL_SALON_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.environ.get('NAIL_SALON_READ_TIMEOUT', 30))
+# Вызовы дольше этого порога пишутся в лог с уровнем WARNING, остальные - DEBUG
+SLOW_CALL_MS = float(os.environ.get('NAIL_SALON_SLOW_CALL_MS', 1000))
+# Сколько секунд справочник берется из памяти без запроса к серверу
+REFERENCE_TTL = float(os.environ.get('NAIL_SALON_REFERENCE_TTL', 60))
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+logger = logging.getLogger('nail_salon.api')
+
+
+class ApiClient:
+    """Клиент API сервера: одна сессия requests с пулом keep-alive соединений на все окна и потоки.
+
+    Заголовок авторизации задается один раз в set_token(). Ошибки соединения повторяются с
+    нарастающей паузой для любых запросов, а обрывы чтения и ответы 502/503/504 - только для GET:
+    повтор POST мог бы провести операцию дважды.
+    """
+
+    def __init__(self, base_url=BASE_URL, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=3, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        # Списки сервер отдает в MessagePack, если клиент его предпочитает; ошибки всегда в JSON
+        if msgpack is not None:
+            self.session.headers['Accept'] = f'{MSGPACK_MIMETYPE}, application/json;q=0.9'
+
+        # Справочники с ETag: path -> (etag, данные, время проверки)
+        self.reference_cache = {}
+        self.lock = threading.Lock()
+
+    def set_token(self, token):
+        with self.lock:
+            if token:
+                self.session.headers['Authorization'] = f'Bearer {token}'
+            else:
+                self.session.headers.pop('Authorization', None)
+
+    def request(self, method, path, **kwargs):
+        """Запрос к серверу с замером времени; для stream=True - время до получения заголовков"""
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        except requests.exceptions.RequestException as e:
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.warning(f"{method} {path} failed after {elapsed:.1f} ms: {e}")
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+        level = logging.WARNING if elapsed >= SLOW_CALL_MS else logging.DEBUG
+        logger.log(level, f"{method} {path} -> {response.status_code} in {elapsed:.1f} ms")
+        return response
+
+    @staticmethod
+    def decode(response):
+        """Тело ответа в JSON или MessagePack (по Content-Type).
+
+        Список в MessagePack - массив имен полей, затем массивы строк (значения по позициям полей);
+        строки склеиваются в один список словарей, как в JSON.
+        """
+        if not response.headers.get('Content-Type', '').startswith(MSGPACK_MIMETYPE):
+            return response.json()
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(response.content)
+        fields, *parts = unpacker
+        return [dict(zip(fields, row)) for part in parts for row in part]
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def cached_reference(self, path, ttl=REFERENCE_TTL):
+        """Справочник из памяти, если он проверен на сервере не раньше чем ttl секунд назад, иначе None"""
+        with self.lock:
+            cached = self.reference_cache.get(path)
+        if cached and time.monotonic() - cached[2] < ttl:
+            return cached[1]
+        return None
+
+    def reference_entry(self, path):
+        """Сохраненная копия справочника (etag, данные) или None"""
+        with self.lock:
+            cached = self.reference_cache.get(path)
+        return cached[:2] if cached else None
+
+    def restore_reference(self, path, etag, data):
+        """Копия справочника из локального кэша: считается устаревшей, но дает If-None-Match"""
+        with self.lock:
+            self.reference_cache.setdefault(path, (etag, data, float('-inf')))
+
+    def get_reference(self, path, ttl=REFERENCE_TTL):
+        """Справочник: (код ответа, данные).
+
+        Свежая копия (моложе ttl) возвращается без запроса; иначе GET с If-None-Match,
+        и при ответе 304 возвращается сохраненная копия с кодом 200.
+        """
+        data = self.cached_reference(path, ttl)
+        if data is not None:
+            return 200, data
+        with self.lock:
+            cached = self.reference_cache.get(path)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+
+        response = self.get(path, headers=headers)
+        if response.status_code == 304 and cached:
+            with self.lock:
+                self.reference_cache[path] = (cached[0], cached[1], time.monotonic())
+            return 200, cached[1]
+        data = self.decode(response)
+        etag = response.headers.get('ETag')
+        if response.status_code == 200 and etag:
+            with self.lock:
+                self.reference_cache[path] = (etag, data, time.monotonic())
+        return response.status_code, data
+
+api = ApiClient()
@@ -0,0 +1,221 @@
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+HEADERS = ["ID", "Клиент", "Мастер", "Услуга", "Дата", "Статус", "Сумма", "Статус оплаты"]
+
+# Колонки хранилища в порядке HEADERS
+COLUMNS = ('appointment_id', 'client_name', 'master_name', 'service_name',
+           'appointment_date', 'status', 'payment_amount', 'payment_status')
+
+DATE_COLUMN = COLUMNS.index('appointment_date')
+AMOUNT_COLUMN = COLUMNS.index('payment_amount')
+
+
+def parse_date(value):
+    """Дата из ответа сервера (HTTP-дата jsonify или ISO); None, если разобрать не удалось"""
+    if not value:
+        return None
+    if value[:1].isdigit():
+        # ISO из локального кэша
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    try:
+        return parsedate_to_datetime(value).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
+
+
+def matches_filters(item, filters):
+    """Подходит ли запись API под фильтры списка - те же параметры, что уходят в GET /appointment.
+
+    Как и на сервере, пустые параметры не учитываются.
+    """
+    filters = {name: value for name, value in filters.items() if value}
+    for name in ('master_id', 'client_id'):
+        if name in filters and item.get(name) != int(filters[name]):
+            return False
+    if 'status' in filters and item.get('status') != filters['status']:
+        return False
+    if 'date_from' in filters or 'date_to' in filters:
+        appointment_date = parse_date(item.get('appointment_date'))
+        if appointment_date is None:
+            return False
+        # Даты фильтра - YYYY-MM-DD, поэтому сравниваются как строки
+        day = appointment_date.date().isoformat()
+        if day < filters.get('date_from', day) or day > filters.get('date_to', day):
+            return False
+    return True
+
+
+def row_values(item):
+    """Значения строки в порядке COLUMNS из словаря записи API"""
+    amount = item.get('payment_amount')
+    return (
+        item.get('appointment_id'),
+        item.get('client_name') or '',
+        item.get('master_name') or '',
+        item.get('service_name') or '',
+        parse_date(item.get('appointment_date')),
+        item.get('status') or '',
+        amount,
+        "Оплачено" if amount else "Не оплачено"
+    )
+
+
+class AppointmentsModel(QAbstractTableModel):
+    """Записи на услуги в колоночном хранилище: по списку на колонку и индекс ID -> строка.
+
+    Представление запрашивает только видимые ячейки, поэтому загрузка списка не создает
+    объектов на каждую ячейку; добавление и обновление строк не перестраивают модель.
+    Сортирует сама модель: одна перестановка строк по ключу колонки вместо сравнений через Qt.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = [[] for _ in COLUMNS]
+        # Строка в нижнем регистре для поиска по клиенту, мастеру, услуге и статусу
+        self.search_text = []
+        self.rows_by_id = {}
+        self.sort_column = None
+        self.sort_order = Qt.AscendingOrder
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.search_text)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.columns[index.column()][index.row()]
+        if role == Qt.DisplayRole:
+            if value is None:
+                return ''
+            if index.column() == DATE_COLUMN:
+                return value.strftime('%d.%m.%Y %H:%M')
+            if index.column() == AMOUNT_COLUMN:
+                return f"{value:.2f}"
+            return str(value)
+        if role == Qt.TextAlignmentRole and index.column() in (0, AMOUNT_COLUMN):
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def _append_values(self, values):
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        self.search_text.append(' '.join(str(value) for value in values[1:4] + values[5:6]).lower())
+
+    def _set_values(self, row, values):
+        for column, value in zip(self.columns, values):
+            column[row] = value
+        self.search_text[row] = ' '.join(str(value) for value in values[1:4] + values[5:6]).lower()
+
+    def sorted_rows(self):
+        """Порядок строк по текущей колонке сортировки; пустые значения - в начале"""
+        values = self.columns[self.sort_column]
+        return sorted(range(len(values)), key=lambda row: (values[row] is not None, values[row]),
+                      reverse=self.sort_order == Qt.DescendingOrder)
+
+    def _reorder(self, order):
+        self.columns = [[column[row] for row in order] for column in self.columns]
+        self.search_text = [self.search_text[row] for row in order]
+        self.rows_by_id = {appointment_id: row for row, appointment_id in enumerate(self.columns[0])}
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self._resort()
+
+    def _resort(self):
+        if self.sort_column is None:
+            return
+        order = self.sorted_rows()
+        self.layoutAboutToBeChanged.emit()
+        new_rows = [0] * len(order)
+        for new_row, old_row in enumerate(order):
+            new_rows[old_row] = new_row
+        self._reorder(order)
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(
+            persistent, [self.index(new_rows[index.row()], index.column()) for index in persistent]
+        )
+        self.layoutChanged.emit()
+
+    def reset(self, appointments):
+        """Заменяет все строки модели"""
+        self.beginResetModel()
+        self.columns = [[] for _ in COLUMNS]
+        self.search_text = []
+        for item in appointments:
+            self._append_values(row_values(item))
+        if self.sort_column is None:
+            self.rows_by_id = {appointment_id: row for row, appointment_id in enumerate(self.columns[0])}
+        else:
+            self._reorder(self.sorted_rows())
+        self.endResetModel()
+
+    def append(self, appointments):
+        """Добавляет строки в конец модели"""
+        if not appointments:
+            return
+        first = len(self.search_text)
+        self.beginInsertRows(QModelIndex(), first, first + len(appointments) - 1)
+        for row, item in enumerate(appointments, first):
+            values = row_values(item)
+            self._append_values(values)
+            self.rows_by_id[values[0]] = row
+        self.endInsertRows()
+
+    def apply_changes(self, upserted, deleted):
+        """Изменения записей: известные строки обновляются на месте, новые добавляются, удаленные убираются"""
+        new_items = []
+        for item in upserted:
+            row = self.rows_by_id.get(item.get('appointment_id'))
+            if row is None:
+                new_items.append(item)
+                continue
+            self._set_values(row, row_values(item))
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+        self.append(new_items)
+
+        removed = sorted((self.rows_by_id[appointment_id] for appointment_id in deleted
+                          if appointment_id in self.rows_by_id), reverse=True)
+        for row in removed:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            for column in self.columns:
+                del column[row]
+            del self.search_text[row]
+            self.endRemoveRows()
+        if removed:
+            self.rows_by_id = {appointment_id: row for row, appointment_id in enumerate(self.columns[0])}
+        if upserted:
+            # Новые и измененные строки встают на место по текущей сортировке
+            self._resort()
+
+
+class AppointmentsProxyModel(QSortFilterProxyModel):
+    """Поиск поверх AppointmentsModel без копирования строк; сортировку выполняет исходная модель"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.needle = ''
+
+    def set_search(self, text):
+        self.needle = text.strip().lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return not self.needle or self.needle in self.sourceModel().search_text[source_row]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
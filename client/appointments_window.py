@@ -1,33 +1,146 @@
-import csv
 import json
+import os
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 
 import jwt 
 import requests
-from PyQt5.QtCore import pyqtSignal, QObject, Qt
+from PyQt5.QtCore import pyqtSignal, QDate, QObject, Qt, QTimer
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-    QLabel, QComboBox, QMessageBox, QDateEdit, QDialog
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView, QHeaderView, QLineEdit,
+    QLabel, QComboBox, QMessageBox, QDateEdit, QDialog, QFileDialog, QCompleter
 )
 
+from client.api import api
+from client.appointments_model import AppointmentsModel, AppointmentsProxyModel, matches_filters
+from client.local_cache import open_cache
+
+# Справочники окна записи: path -> (сообщение об ошибке, текст элемента списка, ключ ID).
+# Клиентов целиком окно не загружает: их подсказывает поиск GET /clients/search
+REFERENCES = {
+    '/masters': ("Ошибка загрузки мастеров",
+                 lambda master: f"{master.get('name', '')} - {master.get('phone', '')}", 'master_id'),
+    '/services': ("Ошибка загрузки услуг",
+                  lambda service: f"{service.get('name', '')} - {service.get('price', '')} руб.", 'service_id'),
+}
+
+# Пауза после последнего нажатия клавиши перед запросом подсказок клиентов (мс)
+CLIENT_SEARCH_DELAY_MS = 300
+
+# Периоды панели фильтров: (текст, ключ для period_range)
+PERIODS = (("Все записи", None), ("Сегодня", 'today'), ("Эта неделя", 'week'))
+
+
+def client_label(client):
+    return f"{client.get('name', '')} - {client.get('phone', '')}"
+
+
+def period_range(period, today=None):
+    """Границы периода (date_from, date_to) включительно; None - граница не задана"""
+    today = today or date.today()
+    if period == 'today':
+        return today, today
+    if period == 'week':
+        monday = today - timedelta(days=today.weekday())
+        return monday, monday + timedelta(days=6)
+    return None, None
+
 
 class Worker(QObject):
     """Класс для выполнения сетевых запросов в отдельном потоке."""
     appointments_updated = pyqtSignal(list)
+    appointments_changed = pyqtSignal(list, list)
+    export_finished = pyqtSignal(str)
+    reference_loaded = pyqtSignal(str, object)
+    clients_found = pyqtSignal(str, object)
+    slots_loaded = pyqtSignal(object, object)
+    appointment_submitted = pyqtSignal(bool, str)
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, token):
+    def __init__(self, cache=None):
         super().__init__()
-        self.token = token
+        # Локальный кэш (LocalCache) получает все, что пришло с сервера; None - работа без кэша
+        self.cache = cache
+        # Курсор изменений из последнего ответа сервера (X-Change-Cursor или id события)
+        self.change_cursor = None
+        # Фильтры списка - параметры GET /appointment; пустой словарь - весь список.
+        # Задаются из потока окна новым словарем, поэтому устаревший ответ узнается по ссылке
+        self.filters = {}
+        self.events_thread = None
+        self.stopped = threading.Event()
+
+    def refresh_appointments(self):
+        """Обновление списка: только изменения, если курсор уже известен, иначе полный список"""
+        if self.change_cursor is None:
+            self.fetch_appointments()
+        else:
+            self.fetch_changes()
+
+    def reload_appointments(self):
+        """Загрузка списка после смены фильтров: из полного кэша с теми же фильтрами, затем изменения"""
+        filters = self.filters
+        if self.cache:
+            cursor, appointments = self.cache.load_appointments(filters)
+            if filters is not self.filters:
+                return
+            if cursor is not None:
+                self.change_cursor = cursor
+                self.appointments_updated.emit(appointments)
+                self.fetch_changes()
+                return
+        self.fetch_appointments()
 
     def fetch_appointments(self):
-        """Получение списка записей на услуги."""
-        headers = {'Authorization': f'Bearer {self.token}'}
+        """Получение списка записей на услуги с текущими фильтрами.
+
+        Нужно, если кэша нет или он неполон. Кэш хранит только полный список, отфильтрованный
+        ответ его не заменяет: изменения всех записей по-прежнему приходят в кэш, а в таблицу -
+        только подходящие под фильтры.
+        """
+        filters = self.filters
         try:
-            response = requests.get('http://localhost:5000/appointment', headers=headers)
+            response = api.get('/appointment', params=filters)
             if response.status_code == 200:
-                appointments = response.json()
+                appointments = api.decode(response)
+                if filters is not self.filters:
+                    # Пока шел запрос, фильтры сменились - ответ уже не нужен
+                    return
+                cursor = response.headers.get('X-Change-Cursor')
+                if not filters:
+                    self.change_cursor = cursor
+                    if self.cache:
+                        self.cache.replace_appointments(appointments, cursor)
+                elif self.change_cursor is None:
+                    # Изменения до этого курсора кэш пропустил - при запуске он загрузится заново
+                    self.change_cursor = cursor
+                    if self.cache:
+                        self.cache.invalidate()
                 self.appointments_updated.emit(appointments)
+                self.start_events()
+            else:
+                message = response.json().get('message', 'Ошибка получения данных')
+                self.error_occurred.emit(message)
+        except requests.exceptions.ConnectionError:
+            self.error_occurred.emit("Не удалось подключиться к серверу")
+        except requests.exceptions.RequestException as e:
+            self.error_occurred.emit(f"Ошибка запроса: {e}")
+
+    def fetch_changes(self):
+        """Получение изменений после курсора; если сервер их не отдает, загружается весь список"""
+        try:
+            response = api.get('/appointment/changes', params={'since': self.change_cursor})
+            if response.status_code == 200:
+                changes = response.json()
+                self.change_cursor = changes['cursor']
+                self.emit_changes(changes['upserted'], changes['deleted'])
+                self.save_changes(changes['upserted'], changes['deleted'])
+                # После запуска из кэша подписка начинается с первой сверки
+                self.start_events()
+            elif response.status_code in (400, 409):
+                # Курсор не принят или изменений слишком много
+                self.change_cursor = None
+                self.fetch_appointments()
             else:
                 message = response.json().get('message', 'Ошибка получения данных')
                 self.error_occurred.emit(message)
@@ -36,11 +149,156 @@ class Worker(QObject):
         except requests.exceptions.RequestException as e:
             self.error_occurred.emit(f"Ошибка запроса: {e}")
 
+    def emit_changes(self, upserted, deleted):
+        """Изменения для таблицы: при фильтрах записи, которые под них не подходят, из нее убираются"""
+        filters = self.filters
+        if filters:
+            hidden = [item.get('appointment_id') for item in upserted if not matches_filters(item, filters)]
+            upserted = [item for item in upserted if matches_filters(item, filters)]
+            deleted = deleted + hidden
+        self.appointments_changed.emit(upserted, deleted)
+
+    def save_changes(self, upserted, deleted):
+        if self.cache:
+            self.cache.apply_changes(upserted, deleted, self.change_cursor)
+
+    def start_events(self):
+        """Запускает подписку на события после первой загрузки или сверки списка"""
+        if self.events_thread is None and self.change_cursor is not None:
+            self.events_thread = threading.Thread(target=self.listen_events, daemon=True)
+            self.events_thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def listen_events(self):
+        """Подписка на GET /events: изменения приходят сразу, без опроса сервера.
+
+        При обрыве соединения переподключается с Last-Event-ID, и сервер досылает пропущенное.
+        """
+        while not self.stopped.is_set():
+            headers = {'Last-Event-ID': self.change_cursor} if self.change_cursor else {}
+            try:
+                # Сервер присылает пинг каждые 15 секунд, поэтому долгое молчание - обрыв
+                with api.get('/events', headers=headers, stream=True, timeout=(api.timeout[0], 60)) as response:
+                    if response.status_code in (401, 422):
+                        self.error_occurred.emit("Подписка на изменения отклонена, войдите заново")
+                        return
+                    if response.status_code == 200:
+                        self.read_events(response)
+            except requests.exceptions.RequestException:
+                pass
+            self.stopped.wait(3)
+
+    def read_events(self, response):
+        event = {}
+        for line in response.iter_lines(decode_unicode=True):
+            if self.stopped.is_set():
+                return
+            if line:
+                if not line.startswith(':'):
+                    field, _, value = line.partition(':')
+                    event[field] = value[1:] if value.startswith(' ') else value
+                continue
+            if event:
+                self.handle_event(event.get('event'), event.get('id'), event.get('data', '{}'))
+                event = {}
+
+    def handle_event(self, name, event_id, data):
+        if name == 'ready':
+            self.change_cursor = event_id
+            if self.cache:
+                self.cache.set_cursor(event_id)
+        elif name == 'appointments':
+            changes = json.loads(data)
+            self.change_cursor = event_id
+            self.emit_changes(changes['upserted'], changes['deleted'])
+            self.save_changes(changes['upserted'], changes['deleted'])
+        elif name == 'reset':
+            # Сервер не может дослать изменения - список загружается заново
+            self.change_cursor = None
+            self.fetch_appointments()
+
+    def load_reference(self, path, error_message):
+        """Загрузка справочника; None в сигнале - загрузить не удалось"""
+        try:
+            status, data = api.get_reference(path)
+            if status == 200:
+                self.reference_loaded.emit(path, data)
+                entry = api.reference_entry(path)
+                if self.cache and entry:
+                    self.cache.save_reference(path, *entry)
+                return
+            self.error_occurred.emit(data.get('message', error_message))
+        except requests.exceptions.RequestException as e:
+            self.error_occurred.emit(f"Ошибка запроса: {e}")
+        self.reference_loaded.emit(path, None)
+
+    def search_clients(self, query):
+        """Подсказки клиентов для текста query; None в сигнале - поиск не удался"""
+        try:
+            response = api.get('/clients/search', params={'q': query})
+            if response.status_code == 200:
+                clients = response.json()
+                self.clients_found.emit(query, clients)
+                if self.cache:
+                    self.cache.save_clients(clients)
+                return
+            self.error_occurred.emit(response.json().get('message', "Ошибка поиска клиентов"))
+        except requests.exceptions.RequestException as e:
+            self.error_occurred.emit(f"Ошибка запроса: {e}")
+        self.clients_found.emit(query, None)
+
+    def load_free_slots(self, key):
+        """Свободное время мастера на день; key - (master_id, service_id, дата), None в сигнале - загрузить не удалось"""
+        master_id, service_id, day = key
+        try:
+            response = api.get(f'/masters/{master_id}/free-slots', params={'service_id': service_id, 'date': day})
+            if response.status_code == 200:
+                # Начало окна '2031-06-02T10:00:00' -> '2031-06-02 10:00', как его принимает POST /appointment
+                starts = [slot['start'].replace('T', ' ')[:16] for slot in response.json().get('slots', [])]
+                self.slots_loaded.emit(key, starts)
+                return
+            self.error_occurred.emit(response.json().get('message', "Ошибка загрузки свободного времени"))
+        except requests.exceptions.RequestException as e:
+            self.error_occurred.emit(f"Ошибка запроса: {e}")
+        self.slots_loaded.emit(key, None)
+
+    def create_appointment(self, data):
+        try:
+            response = api.post('/appointment', json=data)
+            if response.status_code == 201:
+                self.appointment_submitted.emit(True, "Запись на услугу успешно создана.")
+            else:
+                self.appointment_submitted.emit(False, response.json().get('message', 'Ошибка создания записи'))
+        except requests.exceptions.RequestException as e:
+            self.appointment_submitted.emit(False, f"Ошибка запроса: {e}")
+
+    def export_appointments(self, path):
+        """Сохраняет серверную выгрузку записей в файл по частям, не загружая ее в память"""
+        part_path = f"{path}.part"
+        try:
+            with api.get('/export/appointments', params={'format': 'csv'}, stream=True) as response:
+                if response.status_code != 200:
+                    self.error_occurred.emit(response.json().get('message', 'Ошибка экспорта данных'))
+                    return
+                # requests сам распаковывает gzip при чтении iter_content
+                with open(part_path, 'wb') as file:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        file.write(chunk)
+            os.replace(part_path, path)
+            self.export_finished.emit(path)
+        except requests.exceptions.ConnectionError:
+            self.error_occurred.emit("Не удалось подключиться к серверу")
+        except (requests.exceptions.RequestException, OSError) as e:
+            self.error_occurred.emit(f"Ошибка экспорта: {e}")
+
 
 class NailSalonApp(QWidget):
     def __init__(self, token):
         super().__init__()
         self.token = token
+        api.set_token(token)
         self.setWindowTitle("Управление маникюрным салоном")
         self.setGeometry(100, 100, 1200, 600)
 
@@ -50,20 +308,47 @@ class NailSalonApp(QWidget):
             QWidget { background-color: #f7f7f7; font-family: Arial, sans-serif; font-size: 14px; }
             QPushButton { background-color: #0078d7; color: white; border: none; border-radius: 6px; padding: 8px 16px; }
             QPushButton:hover { background-color: #005bb5; }
-            QTableWidget { border: 1px solid #ddd; gridline-color: #ddd; background-color: white; font-size: 13px; }
+            QTableView { border: 1px solid #ddd; gridline-color: #ddd; background-color: white; font-size: 13px; }
             QHeaderView::section { background-color: #e7e7e7; color: #333; font-weight: bold; border: 1px solid #ccc; }
         """)
 
-        # Таблица записи на услуги
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Клиент", "Мастер", "Услуга", "Дата", "Статус", "Сумма", "Статус оплаты"
-        ])
+        # Таблица записи на услуги: модель хранит строки, представление рисует только видимые
+        self.model = AppointmentsModel(self)
+        self.proxy = AppointmentsProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+
+        # Панель фильтров: период и мастер отбираются на сервере, поиск - по загруженным строкам
+        self.period_filter = QComboBox()
+        for label, period in PERIODS:
+            self.period_filter.addItem(label, period)
+        self.period_filter.currentIndexChanged.connect(self.apply_filters)
+        self.master_filter = QComboBox()
+        self.master_filter.addItem("Все мастера", None)
+        self.master_filter.currentIndexChanged.connect(self.apply_filters)
+
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Поиск по клиенту, мастеру, услуге или статусу")
+        self.search.textChanged.connect(self.proxy.set_search)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(4, Qt.AscendingOrder)
         self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        # Фиксированная высота строк: представлению не нужно измерять каждую строку
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setStretchLastSection(True)
 
         # Основной макет
         layout = QVBoxLayout()
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.period_filter)
+        filter_layout.addWidget(self.master_filter)
+        filter_layout.addWidget(self.search, 1)
+        layout.addLayout(filter_layout)
         layout.addWidget(self.table)
 
         # Панель с кнопками
@@ -86,18 +371,40 @@ class NailSalonApp(QWidget):
         self.setLayout(layout)
 
         # Настройка рабочего потока
-        self.worker = Worker(self.token)
+        self.cache = open_cache()
+        self.worker = Worker(self.cache)
         self.worker.appointments_updated.connect(self.update_table)
+        self.worker.appointments_changed.connect(self.merge_changes)
         self.worker.error_occurred.connect(self.show_error)
-
-        # Загрузка начальных данных
+        self.worker.export_finished.connect(self.export_finished)
+        self.worker.reference_loaded.connect(self.fill_reference)
+        self.worker.clients_found.connect(self.show_client_matches)
+        self.worker.slots_loaded.connect(self.fill_free_slots)
+        self.worker.appointment_submitted.connect(self.appointment_submitted)
+
+        # Справочники загружаются параллельно в фоне; поиск клиентов и создание записи тоже не блокируют окно
+        self.pool = ThreadPoolExecutor(max_workers=len(REFERENCES) + 2, thread_name_prefix='api')
+        self.appointment_window = None
+        self.reference_combos = {}
+        self.reference_futures = {}
+        # Подсказки клиентов окна записи: текст подсказки -> client_id
+        self.client_matches = {}
+        # (master_id, service_id, дата), для которых запрошено свободное время окна записи
+        self.slots_key = None
+
+        # Загрузка начальных данных: сначала из локального кэша, затем сверка с сервером в фоне
+        self.load_cache()
         self.refresh_appointments()
+        # Мастера нужны панели фильтров всем ролям, услуги - только окну записи
+        self.prefetch_references(None if self.user_role_id in [1, 2] else ['/masters'])
 
     def get_user_role(self):
         try:
             decoded = jwt.decode(self.token, options={"verify_signature": False})
-            identity = json.loads(decoded.get('sub', '{}'))
-            role_id = identity.get('role_id')
+            role_id = decoded.get('role_id')
+            if role_id is None:
+                # Токен старого формата: роль упакована в JSON-строку sub
+                role_id = json.loads(decoded.get('sub', '{}')).get('role_id')
             if role_id is None:
                 raise ValueError("Token does not contain role_id")
             return int(role_id)
@@ -111,58 +418,140 @@ class NailSalonApp(QWidget):
             self.show_error(f"Ошибка определения роли пользователя: {e}")
             return None
 
+    def load_cache(self):
+        """Показывает записи из кэша; полный кэш дает курсор, и сервер досылает только изменения"""
+        if self.cache is None:
+            return
+        cursor, appointments = self.cache.load_appointments(self.worker.filters)
+        self.model.reset(appointments)
+        self.worker.change_cursor = cursor
+        for path, (etag, data) in self.cache.load_references().items():
+            api.restore_reference(path, etag, data)
+            if path == '/masters':
+                self.fill_master_filter(data)
+
+    def closeEvent(self, event):
+        self.worker.stop()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
+
     def show_error(self, message):
         """Показать ошибку пользователю"""
         QMessageBox.critical(self, "Ошибка", message)
 
     def refresh_appointments(self):
         """Обновить список записей на услуги"""
-        threading.Thread(target=self.worker.fetch_appointments, daemon=True).start()
+        threading.Thread(target=self.worker.refresh_appointments, daemon=True).start()
+
+    def apply_filters(self):
+        """Загружает список с фильтрами панели; таблица заменяется ответом сервера"""
+        date_from, date_to = period_range(self.period_filter.currentData())
+        filters = {}
+        if date_from:
+            filters['date_from'] = date_from.isoformat()
+        if date_to:
+            filters['date_to'] = date_to.isoformat()
+        master_id = self.master_filter.currentData()
+        if master_id is not None:
+            filters['master_id'] = str(master_id)
+        if filters == self.worker.filters:
+            return
+        # Новый словарь задается до запуска потока, чтобы ответ прошлого запроса был отброшен
+        self.worker.filters = filters
+        threading.Thread(target=self.worker.reload_appointments, daemon=True).start()
+
+    def fill_master_filter(self, masters):
+        """Список мастеров панели фильтров; выбранный мастер сохраняется"""
+        if masters is None:
+            return
+        selected = self.master_filter.currentData()
+        self.master_filter.blockSignals(True)
+        self.master_filter.clear()
+        self.master_filter.addItem("Все мастера", None)
+        for master in masters:
+            self.master_filter.addItem(master.get('name', ''), master.get('master_id'))
+        if selected is not None:
+            self.master_filter.setCurrentIndex(max(self.master_filter.findData(selected), 0))
+        self.master_filter.blockSignals(False)
+        if self.master_filter.currentData() != selected:
+            # Выбранного мастера больше нет в справочнике
+            self.apply_filters()
 
     def update_table(self, appointments):
         """Обновляет таблицу с записями"""
-        self.table.setRowCount(0)
-        for item in appointments:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-
-            self.table.setItem(row, 0, QTableWidgetItem(str(item.get('appointment_id', ''))))
-            self.table.setItem(row, 1, QTableWidgetItem(item.get('client_name', '')))
-            self.table.setItem(row, 2, QTableWidgetItem(item.get('master_name', '')))
-            self.table.setItem(row, 3, QTableWidgetItem(item.get('service_name', '')))
-            self.table.setItem(row, 4, QTableWidgetItem(str(item.get('appointment_date', ''))))
-            self.table.setItem(row, 5, QTableWidgetItem(item.get('appointment_status', '')))
-            self.table.setItem(row, 6, QTableWidgetItem(str(item.get('amount', ''))))
-            self.table.setItem(row, 7, QTableWidgetItem(item.get('payment_status', '')))
+        self.model.reset(appointments)
+
+    def merge_changes(self, upserted, deleted):
+        """Применяет изменения к таблице: строки обновляются и удаляются по ID, новые добавляются"""
+        self.model.apply_changes(upserted, deleted)
 
     def create_appointment_window(self):
-        """Окно для создания записи на услугу"""
+        """Окно для создания записи на услугу.
+
+        Открывается сразу: списки из кэша заполняются немедленно, остальные - по мере загрузки.
+        """
         self.appointment_window = QDialog(self)
         self.appointment_window.setWindowTitle("Создать запись")
         self.appointment_window.setModal(True)
         layout = QVBoxLayout()
 
         fields = {
-            "Клиент": QComboBox(),
+            "Клиент": QLineEdit(),
             "Мастер": QComboBox(),
             "Услуга": QComboBox(),
-            "Дата и время": QDateEdit(calendarPopup=True)
+            "Дата": QDateEdit(QDate.currentDate(), calendarPopup=True),
+            "Время": QComboBox()
         }
 
         for label, widget in fields.items():
             layout.addWidget(QLabel(label))
             layout.addWidget(widget)
 
-        self.load_clients(fields["Клиент"])
-        self.load_masters(fields["Мастер"])
-        self.load_services(fields["Услуга"])
+        # Клиент выбирается из подсказок: запрос уходит, когда пользователь перестал печатать
+        self.client_input = fields["Клиент"]
+        self.client_input.setPlaceholderText("Имя или телефон клиента")
+        self.client_matches = {}
+        self.client_completer = QCompleter([], self.client_input)
+        # Подсказки уже отобраны сервером - completer показывает их без своей фильтрации
+        self.client_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.client_input.setCompleter(self.client_completer)
+        self.client_search_timer = QTimer(self.appointment_window)
+        self.client_search_timer.setSingleShot(True)
+        self.client_search_timer.setInterval(CLIENT_SEARCH_DELAY_MS)
+        self.client_search_timer.timeout.connect(self.search_clients)
+        self.client_input.textEdited.connect(self.client_search_timer.start)
+
+        self.reference_combos = {
+            '/masters': fields["Мастер"],
+            '/services': fields["Услуга"]
+        }
+        missing = []
+        for path, combo_box in self.reference_combos.items():
+            data = api.cached_reference(path)
+            if data is None:
+                combo_box.addItem("Загрузка...")
+                combo_box.setEnabled(False)
+                missing.append(path)
+            else:
+                self.populate_reference(combo_box, path, data)
+        self.prefetch_references(missing)
+
+        # Время предлагается из свободных окон мастера под длительность услуги на выбранный день
+        self.date_input = fields["Дата"]
+        self.date_input.setMinimumDate(QDate.currentDate())
+        self.time_combo = fields["Время"]
+        self.slots_key = None
+        self.date_input.dateChanged.connect(self.request_free_slots)
+        fields["Мастер"].currentIndexChanged.connect(self.request_free_slots)
+        fields["Услуга"].currentIndexChanged.connect(self.request_free_slots)
+        self.request_free_slots()
 
         # Кнопка для создания записи
         def create_appointment():
-            client_id = fields["Клиент"].currentData()
+            client_id = self.client_matches.get(self.client_input.text())
             master_id = fields["Мастер"].currentData()
             service_id = fields["Услуга"].currentData()
-            appointment_date = fields["Дата и время"].date().toString('yyyy-MM-dd')
+            appointment_date = self.time_combo.currentData()
 
             if not all([client_id, master_id, service_id, appointment_date]):
                 QMessageBox.warning(self.appointment_window, "Предупреждение", "Пожалуйста, заполните все поля.")
@@ -174,117 +563,124 @@ class NailSalonApp(QWidget):
                 'service_id': service_id,
                 'appointment_date': appointment_date
             }
-            headers = {'Authorization': f'Bearer {self.token}'}
+            self.button_submit.setEnabled(False)
+            self.button_submit.setText("Создание...")
+            self.pool.submit(self.worker.create_appointment, data)
 
-            try:
-                response = requests.post('http://localhost:5000/appointment', json=data, headers=headers)
-                if response.status_code == 201:
-                    QMessageBox.information(self.appointment_window, "Успех", "Запись на услугу успешно создана.")
-                    self.refresh_appointments()
-                    self.appointment_window.close()
-                else:
-                    message = response.json().get('message', 'Ошибка создания записи')
-                    self.show_error(message)
-            except requests.exceptions.RequestException as e:
-                self.show_error(f"Ошибка запроса: {e}")
-
-        button_create = QPushButton("Создать запись")
-        button_create.clicked.connect(create_appointment)
-        layout.addWidget(button_create)
+        self.button_submit = QPushButton("Создать запись")
+        self.button_submit.clicked.connect(create_appointment)
+        layout.addWidget(self.button_submit)
 
         self.appointment_window.setLayout(layout)
         self.appointment_window.show()
 
-    def export_appointments_csv(self):
-        """Экспорт данных о записях на услуги в CSV файл"""
-        headers = {'Authorization': f'Bearer {self.token}'}
-        try:
-            # Отправляем GET-запрос на сервер для получения данных о записях
-            response = requests.get('http://localhost:5000/appointment', headers=headers)
-            if response.status_code == 200:
-                appointments = response.json()
-
-                # Создаем и открываем файл для записи
-                with open("appointments.csv", "w", newline='', encoding='utf-8') as file:
-                    writer = csv.writer(file)
-
-                    # Записываем заголовки
-                    writer.writerow([
-                        "ID", "Клиент", "Мастер", "Услуга", "Дата", "Статус", "Сумма", "Статус оплаты"
-                    ])
-
-                    # Записываем данные
-                    for item in appointments:
-                        writer.writerow([
-                            item.get('appointment_id', ''),
-                            item.get('client_name', ''),
-                            item.get('master_name', ''),
-                            item.get('service_name', ''),
-                            item.get('appointment_date', ''),
-                            item.get('appointment_status', ''),
-                            item.get('amount', ''),
-                            item.get('payment_status', '')
-                        ])
-
-                # Сообщение об успешном экспорте
-                QMessageBox.information(self, "Успех", "Данные экспортированы в appointments.csv")
-            else:
-                message = response.json().get('message', 'Ошибка экспорта данных')
-                self.show_error(message)
-
-        except requests.exceptions.RequestException as e:
-            self.show_error(f"Ошибка запроса: {e}")
-
-    def load_clients(self, combo_box):
-        """Загрузка списка клиентов в ComboBox"""
-        headers = {'Authorization': f'Bearer {self.token}'}
-        try:
-            response = requests.get('http://localhost:5000/clients', headers=headers)
-            if response.status_code == 200:
-                clients = response.json()
-                for client in clients:
-                    display_text = f"{client.get('name', '')} - {client.get('phone', '')}"
-                    combo_box.addItem(display_text, client.get('client_id'))
-            else:
-                self.show_error(response.json().get('message', 'Ошибка загрузки клиентов'))
-        except requests.exceptions.RequestException as e:
-            self.show_error(f"Ошибка запроса: {e}")
+    def appointment_submitted(self, created, message):
+        """Результат создания записи из фонового потока"""
+        if self.appointment_window is None or not self.appointment_window.isVisible():
+            return
+        if created:
+            QMessageBox.information(self.appointment_window, "Успех", message)
+            self.refresh_appointments()
+            self.appointment_window.close()
+        else:
+            self.button_submit.setEnabled(True)
+            self.button_submit.setText("Создать запись")
+            # Выбранное время могли занять - список обновляется
+            self.slots_key = None
+            self.request_free_slots()
+            self.show_error(message)
 
-    def load_masters(self, combo_box):
-        """Загрузка списка мастеров в ComboBox"""
-        headers = {'Authorization': f'Bearer {self.token}'}
-        try:
-            response = requests.get('http://localhost:5000/masters', headers=headers)
-            if response.status_code == 200:
-                masters = response.json()
-                for master in masters:
-                    display_text = f"{master.get('name', '')} - {master.get('specialty', '')}"
-                    combo_box.addItem(display_text, master.get('master_id'))
-            else:
-                self.show_error(response.json().get('message', 'Ошибка загрузки мастеров'))
-        except requests.exceptions.RequestException as e:
-            self.show_error(f"Ошибка запроса: {e}")
-
-    def load_services(self, combo_box):
-        """Загрузка списка услуг в ComboBox"""
-        headers = {'Authorization': f'Bearer {self.token}'}
-        try:
-            response = requests.get('http://localhost:5000/services', headers=headers)
-            if response.status_code == 200:
-                services = response.json()
-                for service in services:
-                    display_text = f"{service.get('name', '')} - {service.get('price', '')} руб."
-                    combo_box.addItem(display_text, service.get('service_id'))
-            else:
-                self.show_error(response.json().get('message', 'Ошибка загрузки услуг'))
-        except requests.exceptions.RequestException as e:
-            self.show_error(f"Ошибка запроса: {e}")
-
-    def load_masters(self, combo_box):
-        """Загрузка списка мастеров в ComboBox"""
-        headers = {'Authorization': f'Bearer {self.token}'}
-        response = requests.get('http://localhost:5000/clients', headers=headers)
-        if response.status_code == 200:
-            masters = response.json()
-            for master in masters:
-                combo_box.addItem(f"{master['name']} - {master['phone']}", master['client_id'])
+    def export_appointments_csv(self):
+        """Экспорт записей на услуги в CSV файл: выгрузка сохраняется на диск потоком в фоне"""
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт в CSV", "appointments.csv", "CSV (*.csv)")
+        if path:
+            threading.Thread(target=self.worker.export_appointments, args=(path,), daemon=True).start()
+
+    def export_finished(self, path):
+        QMessageBox.information(self, "Успех", f"Данные экспортированы в {path}")
+
+    def search_clients(self):
+        """Запрос подсказок для текста поля клиента; результат приходит в show_client_matches"""
+        query = self.client_input.text().strip()
+        if query and query not in self.client_matches:
+            known = self.cache.find_clients(query) if self.cache else []
+            if known:
+                # Знакомые клиенты подсказываются сразу, ответ сервера затем заменит список
+                self.show_client_matches(query, known)
+            self.pool.submit(self.worker.search_clients, query)
+
+    def show_client_matches(self, query, clients):
+        """Показывает подсказки, если текст поля с тех пор не изменился"""
+        if self.appointment_window is None or not self.appointment_window.isVisible():
+            return
+        if clients is None or query != self.client_input.text().strip():
+            return
+        self.client_matches = {client_label(client): client.get('client_id') for client in clients}
+        self.client_completer.model().setStringList(list(self.client_matches))
+        if self.client_input.hasFocus():
+            self.client_completer.complete()
+
+    def request_free_slots(self):
+        """Запрос свободного времени для выбранных мастера, услуги и дня; результат приходит в fill_free_slots"""
+        master_id = self.reference_combos['/masters'].currentData()
+        service_id = self.reference_combos['/services'].currentData()
+        key = None
+        if master_id is not None and service_id is not None:
+            key = (master_id, service_id, self.date_input.date().toString('yyyy-MM-dd'))
+        if key == self.slots_key:
+            return
+        self.slots_key = key
+        self.time_combo.clear()
+        self.time_combo.setEnabled(False)
+        if key is None:
+            self.time_combo.addItem("Выберите мастера и услугу")
+            return
+        self.time_combo.addItem("Загрузка...")
+        self.pool.submit(self.worker.load_free_slots, key)
+
+    def fill_free_slots(self, key, starts):
+        """Заполняет список времени, если окно открыто и мастер, услуга и день с тех пор не изменились"""
+        if self.appointment_window is None or not self.appointment_window.isVisible():
+            return
+        if key != self.slots_key:
+            return
+        self.time_combo.clear()
+        if starts is None:
+            # Следующая смена мастера, услуги или дня запросит время заново
+            self.slots_key = None
+            self.time_combo.addItem("Не удалось загрузить")
+            return
+        if not starts:
+            self.time_combo.addItem("Нет свободного времени")
+            return
+        for start in starts:
+            self.time_combo.addItem(start[11:], start)
+        self.time_combo.setEnabled(True)
+
+    def prefetch_references(self, paths=None):
+        """Параллельная загрузка справочников в пуле потоков; результат приходит в fill_reference"""
+        for path in paths if paths is not None else REFERENCES:
+            future = self.reference_futures.get(path)
+            if future is None or future.done():
+                self.reference_futures[path] = self.pool.submit(self.worker.load_reference, path, REFERENCES[path][0])
+
+    def fill_reference(self, path, data):
+        """Заполняет список окна записи, если оно открыто; None - справочник загрузить не удалось"""
+        if path == '/masters':
+            self.fill_master_filter(data)
+        combo_box = self.reference_combos.get(path)
+        if combo_box is None or self.appointment_window is None or not self.appointment_window.isVisible():
+            return
+        self.populate_reference(combo_box, path, data)
+
+    def populate_reference(self, combo_box, path, data):
+        selected = combo_box.currentData()
+        combo_box.clear()
+        if data is None:
+            combo_box.addItem("Не удалось загрузить")
+            return
+        format_item, id_key = REFERENCES[path][1:]
+        for item in data:
+            combo_box.addItem(format_item(item), item.get(id_key))
+        combo_box.setCurrentIndex(max(combo_box.findData(selected), 0))
+        combo_box.setEnabled(True)
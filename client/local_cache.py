@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from client.api import BASE_URL
+from client.appointments_model import parse_date
+
+# Файл кэша и его пределы переопределяются переменными окружения
+CACHE_PATH = os.environ.get(
+    'NAIL_SALON_CACHE_PATH', os.path.join(os.path.expanduser('~'), '.nail_salon', 'cache.sqlite3')
+)
+# Сверх этого числа записей хранятся только самые поздние, и кэш помечается неполным
+MAX_APPOINTMENTS = int(os.environ.get('NAIL_SALON_CACHE_MAX_APPOINTMENTS', 50000))
+# Клиенты из подсказок поиска: хранятся последние увиденные
+MAX_CLIENTS = int(os.environ.get('NAIL_SALON_CACHE_MAX_CLIENTS', 1000))
+
+# Версия схемы файла: при несовпадении кэш создается заново
+CACHE_VERSION = '2'
+
+SYNC_STATE = """
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key   TEXT PRIMARY KEY,
+        value TEXT
+    )
+"""
+
+# Таблицы данных; при смене CACHE_VERSION они пересоздаются
+DATA_TABLES = ('appointments', 'clients', 'reference_data')
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS appointments (
+        appointment_id   INTEGER PRIMARY KEY,
+        client_name      TEXT,
+        master_name      TEXT,
+        service_name     TEXT,
+        appointment_date TEXT,
+        status           TEXT,
+        payment_amount   REAL,
+        master_id        INTEGER,
+        client_id        INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS ix_appointments_date ON appointments (appointment_date, appointment_id);
+    CREATE INDEX IF NOT EXISTS ix_appointments_master ON appointments (master_id, appointment_date);
+    CREATE TABLE IF NOT EXISTS clients (
+        client_id   INTEGER PRIMARY KEY,
+        name        TEXT,
+        phone       TEXT,
+        birth_date  TEXT,
+        search_text TEXT,
+        seen_at     REAL
+    );
+    CREATE INDEX IF NOT EXISTS ix_clients_seen_at ON clients (seen_at);
+    CREATE TABLE IF NOT EXISTS reference_data (
+        path TEXT PRIMARY KEY,
+        etag TEXT,
+        data TEXT
+    );
+"""
+
+APPOINTMENT_COLUMNS = ('appointment_id', 'client_name', 'master_name', 'service_name',
+                       'appointment_date', 'status', 'payment_amount', 'master_id', 'client_id')
+
+# Фильтры панели (параметры GET /appointment) -> условие SQLite; даты хранятся в ISO
+FILTER_CONDITIONS = {
+    'master_id': "master_id = ?",
+    'client_id': "client_id = ?",
+    'status': "status = ?",
+    'date_from': "appointment_date >= ?",
+    'date_to': "appointment_date < date(?, '+1 day')",
+}
+
+logger = logging.getLogger('nail_salon.cache')
+
+
+def appointment_row(item):
+    """Строка таблицы appointments из записи API; дата хранится в ISO, чтобы сортироваться как текст"""
+    appointment_date = parse_date(item.get('appointment_date'))
+    return (
+        item.get('appointment_id'),
+        item.get('client_name'),
+        item.get('master_name'),
+        item.get('service_name'),
+        appointment_date.isoformat() if appointment_date else None,
+        item.get('status'),
+        item.get('payment_amount'),
+        item.get('master_id'),
+        item.get('client_id')
+    )
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class LocalCache:
+    """Локальная копия данных сервера в SQLite: записи, клиенты из подсказок, мастера и услуги.
+
+    Окно показывает записи из кэша сразу при запуске, а сервер догоняется в фоне по курсору
+    изменений из sync_state. Записи и клиенты ограничены MAX_APPOINTMENTS и MAX_CLIENTS;
+    если записи пришлось обрезать, кэш неполный, и при запуске список загружается целиком.
+    Методы вызываются из любых потоков.
+    """
+
+    def __init__(self, path=CACHE_PATH, server=BASE_URL, max_appointments=MAX_APPOINTMENTS, max_clients=MAX_CLIENTS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_appointments = max_appointments
+        self.max_clients = max_clients
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            # auto_vacuum действует только для нового файла: место после обрезки возвращается диску
+            self.connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+            self.connection.execute(SYNC_STATE)
+            if self._get_state('version') != CACHE_VERSION or self._get_state('server') != server:
+                # Данные другого сервера или старого формата не показываются
+                self._clear()
+                self._set_state('version', CACHE_VERSION)
+                self._set_state('server', server)
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def _get_state(self, key):
+        row = self.connection.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key, value):
+        self.connection.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, value)
+        )
+
+    def _clear(self):
+        self.connection.execute("DELETE FROM sync_state")
+        for table in DATA_TABLES:
+            self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def load_appointments(self, filters=None):
+        """Записи из кэша, подходящие под фильтры панели: (курсор изменений, список записей).
+
+        Курсор None - кэш пуст или неполон, список нужно загрузить с сервера целиком.
+        """
+        # Пустые параметры не учитываются, как и на сервере
+        names = [name for name in FILTER_CONDITIONS if (filters or {}).get(name)]
+        where = f"WHERE {' AND '.join(FILTER_CONDITIONS[name] for name in names)}" if names else ""
+        with self.lock:
+            cursor = self._get_state('change_cursor') if self._get_state('complete') == '1' else None
+            rows = self.connection.execute(
+                f"SELECT {', '.join(APPOINTMENT_COLUMNS)} FROM appointments {where} "
+                f"ORDER BY appointment_date, appointment_id", [filters[name] for name in names]
+            ).fetchall()
+        return cursor, [dict(zip(APPOINTMENT_COLUMNS, row)) for row in rows]
+
+    def replace_appointments(self, appointments, cursor):
+        """Сохраняет полный список записей с сервера и курсор, с которого продолжатся изменения"""
+        rows = [appointment_row(item) for item in appointments]
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM appointments")
+            self._insert_appointments(rows)
+            self._set_state('change_cursor', cursor)
+            self._set_state('complete', '1')
+            self._trim_appointments()
+
+    def apply_changes(self, upserted, deleted, cursor):
+        """Применяет изменения записей и сдвигает курсор"""
+        rows = [appointment_row(item) for item in upserted]
+        with self.lock, self.connection:
+            self._insert_appointments(rows)
+            self.connection.executemany(
+                "DELETE FROM appointments WHERE appointment_id = ?", [(appointment_id,) for appointment_id in deleted]
+            )
+            self._set_state('change_cursor', cursor)
+            self._trim_appointments()
+
+    def invalidate(self):
+        """Кэш перестает считаться полным: при следующем запуске список загрузится целиком"""
+        with self.lock, self.connection:
+            self._set_state('complete', '0')
+
+    def set_cursor(self, cursor):
+        with self.lock, self.connection:
+            self._set_state('change_cursor', cursor)
+
+    def _insert_appointments(self, rows):
+        placeholders = ', '.join('?' for _ in APPOINTMENT_COLUMNS)
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO appointments ({', '.join(APPOINTMENT_COLUMNS)}) VALUES ({placeholders})", rows
+        )
+
+    def _trim_appointments(self):
+        """Оставляет max_appointments самых поздних записей; обрезанный кэш помечается неполным"""
+        removed = self.connection.execute(
+            "DELETE FROM appointments WHERE appointment_id NOT IN ("
+            "SELECT appointment_id FROM appointments ORDER BY appointment_date DESC, appointment_id DESC LIMIT ?)",
+            (self.max_appointments,)
+        ).rowcount
+        if removed:
+            self._set_state('complete', '0')
+            self.connection.execute("PRAGMA incremental_vacuum")
+
+    def save_clients(self, clients):
+        """Запоминает клиентов из подсказок поиска; хранятся max_clients последних"""
+        now = time.time()
+        rows = [(
+            client.get('client_id'), client.get('name'), client.get('phone'), client.get('birth_date'),
+            f"{client.get('name') or ''} {client.get('phone') or ''}".lower(), now
+        ) for client in clients]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO clients (client_id, name, phone, birth_date, search_text, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self.connection.execute(
+                "DELETE FROM clients WHERE client_id NOT IN ("
+                "SELECT client_id FROM clients ORDER BY seen_at DESC LIMIT ?)", (self.max_clients,)
+            )
+
+    def find_clients(self, query, limit=20):
+        """Клиенты из кэша, у которых имя или телефон содержат query (без учета регистра)"""
+        pattern = f"%{escape_like(query.lower())}%"
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT client_id, name, phone, birth_date FROM clients WHERE search_text LIKE ? ESCAPE '\\' "
+                "ORDER BY seen_at DESC LIMIT ?", (pattern, limit)
+            ).fetchall()
+        return [dict(zip(('client_id', 'name', 'phone', 'birth_date'), row)) for row in rows]
+
+    def save_reference(self, path, etag, data):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO reference_data (path, etag, data) VALUES (?, ?, ?)",
+                (path, etag, json.dumps(data, ensure_ascii=False))
+            )
+
+    def load_references(self):
+        """Справочники из кэша: path -> (etag, данные)"""
+        with self.lock:
+            rows = self.connection.execute("SELECT path, etag, data FROM reference_data").fetchall()
+        return {path: (etag, json.loads(data)) for path, etag, data in rows}
+
+
+def open_cache():
+    """Кэш по умолчанию; None, если файл открыть не удалось - клиент работает без кэша"""
+    try:
+        return LocalCache()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Local cache disabled: {e}")
+        return None
@@ -2,6 +2,8 @@ import requests
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
 
+from client.api import api
+
 
 class LoginWindow(QWidget):
     def __init__(self, on_login_success):
@@ -81,7 +83,7 @@ class LoginWindow(QWidget):
             return
 
         try:
-            response = requests.post('http://localhost:5000/auth/login', json={
+            response = api.post('/auth/login', json={
                 'username': username,
                 'password': password
             })
@@ -1,9 +1,16 @@
+import logging
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
 from client.appointments_window import NailSalonApp
 from client.login_window import LoginWindow
 
 
+# NAIL_SALON_LOG_LEVEL=DEBUG выводит время каждого запроса к серверу
+logging.basicConfig(level=os.environ.get('NAIL_SALON_LOG_LEVEL', 'WARNING'),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+
 class MainApp:
     def __init__(self):
         self.app = QApplication(sys.argv)
@@ -0,0 +1,117 @@
+"""Начальная схема: исходные таблицы салона, индекс занятости мастера, версии справочников, роли
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+Для базы, уже созданной прежним скриптом scripts/init_db.sql, миграция безопасна: все объекты
+создаются с IF NOT EXISTS.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS roles
+        (
+            role_id     serial PRIMARY KEY,
+            role_name   varchar(50) NOT NULL UNIQUE,
+            permissions varchar(255)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS users
+        (
+            user_id       serial PRIMARY KEY,
+            username      varchar(50) NOT NULL UNIQUE,
+            password_hash varchar(255) NOT NULL,
+            role_id       integer REFERENCES roles(role_id)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS clients
+        (
+            client_id   serial PRIMARY KEY,
+            client_name varchar(100) NOT NULL,
+            phone       varchar(15) UNIQUE NOT NULL,
+            birth_date  date
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS masters
+        (
+            master_id   serial PRIMARY KEY,
+            master_name varchar(100) NOT NULL,
+            phone       varchar(15) UNIQUE
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS services
+        (
+            service_id   serial PRIMARY KEY,
+            service_name varchar(255) NOT NULL,
+            description  text,
+            price        numeric(10, 2) NOT NULL,
+            duration     integer NOT NULL
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS appointments
+        (
+            appointment_id   serial PRIMARY KEY,
+            client_id        integer REFERENCES clients(client_id),
+            master_id        integer REFERENCES masters(master_id),
+            service_id       integer REFERENCES services(service_id),
+            appointment_date timestamp NOT NULL,
+            status           varchar(50) DEFAULT 'Запланировано'
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS payments
+        (
+            payment_id     serial PRIMARY KEY,
+            client_id      integer REFERENCES clients(client_id),
+            appointment_id integer REFERENCES appointments(appointment_id),
+            payment_amount numeric(10, 2) NOT NULL,
+            payment_date   timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            payment_method varchar(50)
+        )
+    """)
+    # В ранних версиях init_db.sql у payments не было appointment_id
+    op.execute("ALTER TABLE payments ADD COLUMN IF NOT EXISTS appointment_id integer REFERENCES appointments(appointment_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_appointments_master_date ON appointments (master_id, appointment_date)")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions
+        (
+            table_name varchar(50) PRIMARY KEY,
+            version    bigint NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute("""
+        INSERT INTO table_versions (table_name, version)
+        VALUES ('clients', 0), ('masters', 0), ('services', 0)
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO roles (role_id, role_name, permissions)
+        VALUES (1, 'Администратор', 'all'), (2, 'Работник', 'edit'), (3, 'Пользователь', 'view')
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS table_versions")
+    op.execute("DROP TABLE IF EXISTS payments")
+    op.execute("DROP TABLE IF EXISTS appointments")
+    op.execute("DROP TABLE IF EXISTS services")
+    op.execute("DROP TABLE IF EXISTS masters")
+    op.execute("DROP TABLE IF EXISTS clients")
+    op.execute("DROP TABLE IF EXISTS users")
+    op.execute("DROP TABLE IF EXISTS roles")
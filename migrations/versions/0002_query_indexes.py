@@ -0,0 +1,37 @@
+"""Индексы для горячих запросов: оплаты по записи, порядок записей, внешние ключи, поиск услуги
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # LATERAL-сумма оплат в GET /appointment и проверка записи в POST /payment
+    op.execute("CREATE INDEX IF NOT EXISTS ix_payments_appointment_id ON payments (appointment_id)")
+    # Курсорная пагинация и потоковая выдача записей по (appointment_date, appointment_id)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_appointments_date_id ON appointments (appointment_date, appointment_id)")
+    # Проверки внешних ключей при удалении клиента и услуги
+    op.execute("CREATE INDEX IF NOT EXISTS ix_appointments_client_id ON appointments (client_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_appointments_service_id ON appointments (service_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_payments_client_id ON payments (client_id)")
+    # Проверка дубликата услуги по названию
+    op.execute("CREATE INDEX IF NOT EXISTS ix_services_service_name ON services (service_name)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_services_service_name")
+    op.execute("DROP INDEX IF EXISTS ix_payments_client_id")
+    op.execute("DROP INDEX IF EXISTS ix_appointments_service_id")
+    op.execute("DROP INDEX IF EXISTS ix_appointments_client_id")
+    op.execute("DROP INDEX IF EXISTS ix_appointments_date_id")
+    op.execute("DROP INDEX IF EXISTS ix_payments_appointment_id")
@@ -0,0 +1,59 @@
+"""Расписание мастеров по дням (master_schedule) с заполнением по существующим записям
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS master_schedule
+        (
+            schedule_date     date NOT NULL,
+            master_id         integer NOT NULL REFERENCES masters(master_id) ON DELETE CASCADE,
+            booked_minutes    integer NOT NULL DEFAULT 0,
+            slot_bitmap       bit(96) NOT NULL,
+            appointment_count integer NOT NULL DEFAULT 0,
+            completed_count   integer NOT NULL DEFAULT 0,
+            PRIMARY KEY (schedule_date, master_id)
+        )
+    """)
+    # Заполнение по всем записям; повторный запуск пересчитывает те же строки
+    op.execute("""
+        INSERT INTO master_schedule
+            (schedule_date, master_id, booked_minutes, slot_bitmap, appointment_count, completed_count)
+        SELECT CAST(a.appointment_date AS date), a.master_id,
+               COALESCE(SUM(s.duration), 0),
+               COALESCE(bit_or(CAST(
+                   repeat('0', FLOOR(EXTRACT(EPOCH FROM CAST(a.appointment_date AS time)) / 60 / 15)::int)
+                   || repeat('1', LEAST(96, CEIL((EXTRACT(EPOCH FROM CAST(a.appointment_date AS time)) / 60 + s.duration) / 15)::int)
+                                  - FLOOR(EXTRACT(EPOCH FROM CAST(a.appointment_date AS time)) / 60 / 15)::int)
+                   || repeat('0', 96 - LEAST(96, CEIL((EXTRACT(EPOCH FROM CAST(a.appointment_date AS time)) / 60 + s.duration) / 15)::int))
+                   AS bit(96)
+               )), CAST(repeat('0', 96) AS bit(96))),
+               COUNT(*),
+               COUNT(*) FILTER (WHERE a.status = 'Завершено')
+        FROM appointments a
+        LEFT JOIN services s ON a.service_id = s.service_id
+        WHERE a.master_id IS NOT NULL
+        GROUP BY CAST(a.appointment_date AS date), a.master_id
+        ON CONFLICT (schedule_date, master_id) DO UPDATE SET
+            booked_minutes = EXCLUDED.booked_minutes,
+            slot_bitmap = EXCLUDED.slot_bitmap,
+            appointment_count = EXCLUDED.appointment_count,
+            completed_count = EXCLUDED.completed_count
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS master_schedule")
@@ -0,0 +1,50 @@
+"""Дневная сводка выручки (revenue_daily) для отчетов с заполнением по существующим оплатам
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS revenue_daily
+        (
+            revenue_date   date NOT NULL,
+            master_id      integer NOT NULL,
+            service_id     integer NOT NULL,
+            payment_method varchar(50) NOT NULL,
+            payment_count  integer NOT NULL DEFAULT 0,
+            revenue        numeric(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (revenue_date, master_id, service_id, payment_method)
+        )
+    """)
+    # Заполнение по всем оплатам; повторный запуск пересчитывает те же строки
+    op.execute("""
+        INSERT INTO revenue_daily (revenue_date, master_id, service_id, payment_method, payment_count, revenue)
+        SELECT CAST(p.payment_date AS date),
+               COALESCE(a.master_id, 0),
+               COALESCE(a.service_id, 0),
+               COALESCE(p.payment_method, ''),
+               COUNT(*),
+               SUM(p.payment_amount)
+        FROM payments p
+        LEFT JOIN appointments a ON p.appointment_id = a.appointment_id
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (revenue_date, master_id, service_id, payment_method) DO UPDATE SET
+            payment_count = EXCLUDED.payment_count,
+            revenue = EXCLUDED.revenue
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS revenue_daily")
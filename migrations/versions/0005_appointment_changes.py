@@ -0,0 +1,82 @@
+"""Журнал изменений записей (appointment_changes) и триггеры на appointments и payments
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# (таблица, событие, переходные таблицы) - триггеры уровня оператора: COPY и многострочные
+# INSERT/UPDATE пишут журнал одним INSERT ... SELECT из переходной таблицы
+TRIGGERS = (
+    ('appointments', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('appointments', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('appointments', 'DELETE', 'OLD TABLE AS old_rows'),
+    ('payments', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('payments', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('payments', 'DELETE', 'OLD TABLE AS old_rows'),
+)
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS appointment_changes
+        (
+            change_id      bigserial PRIMARY KEY,
+            xid            xid8 NOT NULL DEFAULT pg_current_xact_id(),
+            appointment_id integer NOT NULL,
+            op             char(1) NOT NULL,
+            changed_at     timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_appointment_changes_xid ON appointment_changes (xid)")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION log_appointment_changes() RETURNS trigger AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'appointments' THEN
+                IF TG_OP = 'INSERT' THEN
+                    INSERT INTO appointment_changes (appointment_id, op) SELECT appointment_id, 'I' FROM new_rows;
+                ELSIF TG_OP = 'UPDATE' THEN
+                    INSERT INTO appointment_changes (appointment_id, op) SELECT appointment_id, 'U' FROM new_rows;
+                ELSE
+                    INSERT INTO appointment_changes (appointment_id, op) SELECT appointment_id, 'D' FROM old_rows;
+                END IF;
+            ELSE
+                -- Оплата меняет сумму в строке записи
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO appointment_changes (appointment_id, op)
+                    SELECT DISTINCT appointment_id, 'U' FROM new_rows WHERE appointment_id IS NOT NULL;
+                END IF;
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    INSERT INTO appointment_changes (appointment_id, op)
+                    SELECT DISTINCT appointment_id, 'U' FROM old_rows WHERE appointment_id IS NOT NULL;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table, event, transition in TRIGGERS:
+        name = f"trg_{table}_{event.lower()}_changes"
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON {table}
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION log_appointment_changes()
+        """)
+
+
+def downgrade():
+    for table, event, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_{event.lower()}_changes ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS log_appointment_changes()")
+    op.execute("DROP TABLE IF EXISTS appointment_changes")
@@ -0,0 +1,40 @@
+"""Индексы поиска клиентов: префикс телефона, префикс имени и триграммы имени (pg_trgm)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Сравнение в COLLATE "C" - побайтовое: индекс годится и для LIKE 'префикс%', и для ORDER BY ... LIMIT
+    op.execute('CREATE INDEX IF NOT EXISTS ix_clients_phone_prefix ON clients ((phone COLLATE "C"))')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_clients_name_prefix ON clients ((lower(client_name) COLLATE "C"))')
+    # Нечеткий поиск по имени - только если на сервере есть pg_trgm (пакет contrib);
+    # без него GET /clients/search ищет по префиксу имени
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                CREATE INDEX IF NOT EXISTS ix_clients_name_trgm ON clients USING gin (client_name gin_trgm_ops);
+            END IF;
+        END
+        $$
+    """)
+
+
+def downgrade():
+    # Расширение pg_trgm не удаляется: им могут пользоваться другие объекты базы
+    op.execute("DROP INDEX IF EXISTS ix_clients_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_clients_name_prefix")
+    op.execute("DROP INDEX IF EXISTS ix_clients_phone_prefix")
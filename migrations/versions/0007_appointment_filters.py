@@ -0,0 +1,33 @@
+"""Индексы фильтров списка записей: клиент и статус (GET /appointment?client_id=...&status=...)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # С датой и id в ключе выборка по клиенту или статусу идет по индексу в порядке курсорной пагинации
+    # (в обе стороны); индекс клиента по-прежнему покрывает проверки внешнего ключа
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_appointments_client_date ON appointments (client_id, appointment_date, appointment_id)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_appointments_client_id")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_appointments_status_date ON appointments (status, appointment_date, appointment_id)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_appointments_status_date")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_appointments_client_id ON appointments (client_id)")
+    op.execute("DROP INDEX IF EXISTS ix_appointments_client_date")
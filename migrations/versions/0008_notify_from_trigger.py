@@ -0,0 +1,53 @@
+"""Уведомление appointment_changes (NOTIFY) из триггера журнала изменений
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# Тело функции из миграции 0005; {notify} - строка уведомления или пусто
+FUNCTION = """
+    CREATE OR REPLACE FUNCTION log_appointment_changes() RETURNS trigger AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'appointments' THEN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO appointment_changes (appointment_id, op) SELECT appointment_id, 'I' FROM new_rows;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO appointment_changes (appointment_id, op) SELECT appointment_id, 'U' FROM new_rows;
+            ELSE
+                INSERT INTO appointment_changes (appointment_id, op) SELECT appointment_id, 'D' FROM old_rows;
+            END IF;
+        ELSE
+            -- Оплата меняет сумму в строке записи
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO appointment_changes (appointment_id, op)
+                SELECT DISTINCT appointment_id, 'U' FROM new_rows WHERE appointment_id IS NOT NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                INSERT INTO appointment_changes (appointment_id, op)
+                SELECT DISTINCT appointment_id, 'U' FROM old_rows WHERE appointment_id IS NOT NULL;
+            END IF;
+        END IF;{notify}
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    # Уведомление уходит при commit той же транзакции; одинаковые уведомления транзакции
+    # PostgreSQL склеивает в одно, поэтому многострочные операции будят рассыльщиков один раз
+    op.execute(FUNCTION.format(notify="\n        PERFORM pg_notify('appointment_changes', '');"))
+
+
+def downgrade():
+    op.execute(FUNCTION.format(notify=''))
@@ -0,0 +1,35 @@
+"""Граница очистки журнала appointment_changes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Одна строка: наибольший xid удаленной из журнала записи. Курсор не выше него мог
+    # пропустить очищенные изменения - такому клиенту нужно загрузить список заново
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS appointment_changes_horizon
+        (
+            pruned_xid xid8 NOT NULL
+        )
+    """)
+    op.execute("""
+        INSERT INTO appointment_changes_horizon (pruned_xid)
+        SELECT CAST('0' AS xid8)
+        WHERE NOT EXISTS (SELECT 1 FROM appointment_changes_horizon)
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS appointment_changes_horizon")
@@ -0,0 +1,25 @@
+"""Колонка masters.email
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # POST /master сохраняет email, а в таблице не было такой колонки. Раньше ее добавляла
+    # миграция 0002, поэтому в уже обновленных базах колонка есть - IF NOT EXISTS
+    op.execute("ALTER TABLE masters ADD COLUMN IF NOT EXISTS email varchar(100)")
+
+
+def downgrade():
+    op.execute("ALTER TABLE masters DROP COLUMN IF EXISTS email")
@@ -0,0 +1,65 @@
+"""Проверка пересечения записей мастера под блокировкой (триггер на appointments)
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Проверка conflict в CREATE_APPOINTMENT (и в импорте пачкой) читает снимок начала запроса:
+    # две транзакции READ COMMITTED не видят незафиксированные записи друг друга и обе проходят.
+    # Триггер уровня оператора берет advisory-блокировку на каждого мастера из вставленных строк
+    # (до commit) и проверяет пересечения новым снимком - вторая транзакция ждет первую и видит
+    # ее запись. Обновление master_id/appointment_date приложение не выполняет, поэтому
+    # триггер только на INSERT.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION check_appointment_overlap() RETURNS trigger AS $$
+        DECLARE
+            busy_master integer;
+        BEGIN
+            FOR busy_master IN SELECT DISTINCT master_id FROM new_rows ORDER BY master_id LOOP
+                PERFORM pg_advisory_xact_lock(CAST(CAST('appointments' AS regclass) AS integer), busy_master);
+            END LOOP;
+
+            SELECT created.master_id INTO busy_master
+            FROM new_rows created
+            JOIN services created_s ON created.service_id = created_s.service_id
+            JOIN appointments busy ON busy.master_id = created.master_id
+                AND busy.appointment_id <> created.appointment_id
+            JOIN services busy_s ON busy.service_id = busy_s.service_id
+            WHERE busy.appointment_date >= created.appointment_date
+                    - (SELECT COALESCE(MAX(duration), 0) FROM services) * INTERVAL '1 minute'
+                AND busy.appointment_date < created.appointment_date + created_s.duration * INTERVAL '1 minute'
+                AND busy.appointment_date + busy_s.duration * INTERVAL '1 minute' > created.appointment_date
+            LIMIT 1;
+
+            IF FOUND THEN
+                RAISE EXCEPTION 'Master % is busy at this time', busy_master
+                    USING ERRCODE = 'exclusion_violation';
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS trg_appointments_insert_overlap ON appointments")
+    op.execute("""
+        CREATE TRIGGER trg_appointments_insert_overlap
+        AFTER INSERT ON appointments
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION check_appointment_overlap()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_appointments_insert_overlap ON appointments")
+    op.execute("DROP FUNCTION IF EXISTS check_appointment_overlap()")
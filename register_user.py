@@ -1,15 +1,16 @@
 import requests
 
+from client.api import api
+
 def register_user(username, password, role_id):
     try:
-        url = "http://localhost:5000/auth/register"
         payload = {
             "username": username,
             "password": password,
             "role_id": role_id  # 1 - Admin, 2 - worker, 3 - User
         }
 
-        response = requests.post(url, json=payload)
+        response = api.post('/auth/register', json=payload)
 
         if response.status_code == 201:
             print(f"User '{username}' registered successfully.")
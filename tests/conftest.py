@@ -0,0 +1,70 @@
+"""Общие фикстуры тестов.
+
+Тесты работают с отдельной базой PostgreSQL, адрес которой задает NAIL_SALON_TEST_DATABASE_URL;
+схема накатывается миграциями. Без переменной тесты, которым нужна база, пропускаются.
+"""
+import os
+import uuid
+
+import pytest
+from flask_jwt_extended import create_access_token
+from flask_migrate import upgrade
+from sqlalchemy import text
+
+from back.app import create_app
+from back.db import db
+
+TEST_DATABASE_URL = os.environ.get('NAIL_SALON_TEST_DATABASE_URL')
+
+
+@pytest.fixture(scope='session')
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip("NAIL_SALON_TEST_DATABASE_URL не задан")
+    app = create_app({'SQLALCHEMY_DATABASE_URI': TEST_DATABASE_URL, 'TESTING': True})
+    with app.app_context():
+        upgrade()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def admin_headers(app):
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role_id': 1})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def booking(app):
+    """Клиент, мастер и услуга на 60 минут; удаляются вместе с записями и оплатами после теста"""
+    suffix = uuid.uuid4().hex[:12]
+    with app.app_context():
+        ids = db.session.execute(text("""
+            WITH client AS (
+                INSERT INTO clients (client_name, phone) VALUES ('Тест', :phone) RETURNING client_id
+            ),
+            master AS (
+                INSERT INTO masters (master_name, phone) VALUES ('Тест', :phone) RETURNING master_id
+            ),
+            service AS (
+                INSERT INTO services (service_name, description, price, duration)
+                VALUES (:service_name, '', 100, 60) RETURNING service_id
+            )
+            SELECT client.client_id, master.master_id, service.service_id FROM client, master, service
+        """), {'phone': f't{suffix}', 'service_name': f'Тест {suffix}'}).fetchone()
+        db.session.commit()
+    yield {'client_id': ids.client_id, 'master_id': ids.master_id, 'service_id': ids.service_id}
+    with app.app_context():
+        db.session.execute(text("DELETE FROM payments WHERE client_id = :client_id"), {'client_id': ids.client_id})
+        db.session.execute(text("DELETE FROM revenue_daily WHERE master_id = :master_id"), {'master_id': ids.master_id})
+        db.session.execute(text("DELETE FROM appointments WHERE master_id = :master_id"), {'master_id': ids.master_id})
+        db.session.execute(text("DELETE FROM master_schedule WHERE master_id = :master_id"), {'master_id': ids.master_id})
+        db.session.execute(text("DELETE FROM masters WHERE master_id = :master_id"), {'master_id': ids.master_id})
+        db.session.execute(text("DELETE FROM clients WHERE client_id = :client_id"), {'client_id': ids.client_id})
+        db.session.execute(text("DELETE FROM services WHERE service_id = :service_id"), {'service_id': ids.service_id})
+        db.session.commit()
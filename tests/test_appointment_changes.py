@@ -0,0 +1,70 @@
+"""GET /appointment/changes и очистка журнала изменений (flask prune-changes)"""
+from sqlalchemy import text
+
+from back.db import db
+
+
+def change_cursor(client, headers):
+    response = client.get('/appointment?limit=1', headers=headers)
+    assert response.status_code == 200
+    return response.headers['X-Change-Cursor']
+
+
+def test_changes_since_cursor(client, admin_headers, booking):
+    since = change_cursor(client, admin_headers)
+    created = client.post('/appointment', json={**booking, 'appointment_date': '2030-02-10 10:00'},
+                          headers=admin_headers)
+    appointment_id = created.get_json()['appointment_id']
+
+    response = client.get('/appointment/changes', query_string={'since': since}, headers=admin_headers)
+    assert response.status_code == 200
+    changes = response.get_json()
+    assert appointment_id in [item['appointment_id'] for item in changes['upserted']]
+
+    # Повтор с тем же курсором отдает то же состояние записи - клиент применяет его как upsert
+    again = client.get('/appointment/changes', query_string={'since': since}, headers=admin_headers)
+    assert again.get_json()['upserted'] == changes['upserted']
+
+
+def test_pruned_cursor_expires(app, client, admin_headers, booking):
+    since = change_cursor(client, admin_headers)
+    created = client.post('/appointment', json={**booking, 'appointment_date': '2030-02-11 10:00'},
+                          headers=admin_headers)
+    appointment_id = created.get_json()['appointment_id']
+    with app.app_context():
+        db.session.execute(text("""
+            UPDATE appointment_changes SET changed_at = CURRENT_TIMESTAMP - interval '1 year'
+            WHERE appointment_id = :appointment_id
+        """), {'appointment_id': appointment_id})
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['prune-changes'])
+    assert result.exit_code == 0
+    assert 'Deleted' in result.output
+
+    response = client.get('/appointment/changes', query_string={'since': since}, headers=admin_headers)
+    assert response.status_code == 409
+    assert response.get_json()['message'] == "Курсор устарел, загрузите список заново"
+
+    fresh = change_cursor(client, admin_headers)
+    response = client.get('/appointment/changes', query_string={'since': fresh}, headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_too_many_changes(app, client, admin_headers, booking, monkeypatch):
+    since = change_cursor(client, admin_headers)
+    for hour in ('10:00', '12:00'):
+        created = client.post('/appointment', json={**booking, 'appointment_date': f'2030-02-12 {hour}'},
+                              headers=admin_headers)
+        assert created.status_code == 201
+
+    monkeypatch.setitem(app.config, 'APPOINTMENT_CHANGES_MAX', 1)
+    response = client.get('/appointment/changes', query_string={'since': since}, headers=admin_headers)
+    assert response.status_code == 409
+    assert response.get_json()['message'] == "Слишком много изменений, загрузите список заново"
+
+    # Ровно лимит изменений еще отдается
+    monkeypatch.setitem(app.config, 'APPOINTMENT_CHANGES_MAX', 2)
+    response = client.get('/appointment/changes', query_string={'since': since}, headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.get_json()['upserted']) == 2
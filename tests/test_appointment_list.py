@@ -0,0 +1,15 @@
+"""GET /appointment: неверный limit отклоняется, а не превращается в выдачу всего списка"""
+import pytest
+
+
+@pytest.mark.parametrize('limit', ['abc', '-5', '0', '', '1.5', '100000'])
+def test_invalid_limit_rejected(client, admin_headers, limit):
+    response = client.get(f'/appointment?limit={limit}', headers=admin_headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'].startswith("limit должен быть от 1 до")
+
+
+def test_valid_limit_returns_page(client, admin_headers):
+    response = client.get('/appointment?limit=5', headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.get_json()) <= 5
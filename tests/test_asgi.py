@@ -0,0 +1,76 @@
+"""ASGI-режим (back/asgi.py): проверка токена вне цикла событий и метрики асинхронных маршрутов"""
+import asyncio
+import threading
+
+from flask_jwt_extended import create_access_token
+
+from back.asgi import AsyncReadApp
+from back.metrics import registry
+
+
+async def call(asgi, path, headers=None):
+    """Выполняет GET через ASGI-приложение; возвращает (статус, тело)"""
+    messages = []
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()],
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi(scope, receive, send)
+    body = b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+    return messages[0]['status'], body
+
+
+def run(asgi, *calls):
+    async def main():
+        try:
+            return [await call(asgi, *arguments) for arguments in calls]
+        finally:
+            await asgi.engine.dispose()
+    return asyncio.run(main())
+
+
+def test_new_token_verified_off_event_loop(app, monkeypatch):
+    asgi = AsyncReadApp(app)
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role_id': 1})
+    headers = {'Authorization': f'Bearer {token}'}
+    loop_thread = threading.get_ident()
+    verified_in = []
+    verify_token = asgi.verify_token
+
+    def recording_verify(token):
+        verified_in.append(threading.get_ident())
+        return verify_token(token)
+
+    monkeypatch.setattr(asgi, 'verify_token', recording_verify)
+    # Второй запрос берет claims из кэша и подпись не проверяет
+    (first, _), (second, _) = run(asgi, ('/services', headers), ('/services', headers))
+    assert (first, second) == (200, 200)
+    assert len(verified_in) == 1
+    assert verified_in[0] != loop_thread
+
+
+def test_async_routes_recorded_in_metrics(app, admin_headers):
+    asgi = AsyncReadApp(app)
+    key = ('nail_salon_request_duration_seconds', '/clients', 'GET')
+    before = registry.histograms[key].count if key in registry.histograms else 0
+    ok_before = registry.responses.get(('/clients', 'GET', '200'), 0)
+    denied_before = registry.responses.get(('/clients', 'GET', '401'), 0)
+
+    (ok, body), (denied, _) = run(asgi, ('/clients', admin_headers), ('/clients', None))
+    assert ok == 200 and body
+    assert denied == 401
+
+    assert registry.histograms[key].count == before + 2
+    assert registry.responses[('/clients', 'GET', '200')] == ok_before + 1
+    assert registry.responses[('/clients', 'GET', '401')] == denied_before + 1
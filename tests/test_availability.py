@@ -0,0 +1,68 @@
+"""merge_intervals и free_slots: расчет свободных окон без базы"""
+from datetime import datetime, time
+
+import pytest
+
+from back.availability import day_bounds, free_slots, merge_intervals
+
+DAY = '2030-01-10'
+OPEN, CLOSE = day_bounds(DAY, time(9, 0), time(18, 0))
+
+
+def at(hhmm):
+    return datetime.fromisoformat(f'{DAY} {hhmm}')
+
+
+def starts(slots):
+    return [start.strftime('%H:%M') for start, _ in slots]
+
+
+@pytest.mark.parametrize('intervals, expected', [
+    # Смежные интервалы сливаются: окно между ними нулевой длины
+    ([('10:00', '11:00'), ('11:00', '12:00')], [('10:00', '12:00')]),
+    ([('10:00', '11:30'), ('11:00', '12:00')], [('10:00', '12:00')]),
+    # Интервал внутри предыдущего не сдвигает конец
+    ([('10:00', '13:00'), ('11:00', '12:00')], [('10:00', '13:00')]),
+    ([('10:00', '11:00'), ('11:15', '12:00')], [('10:00', '11:00'), ('11:15', '12:00')]),
+    ([], []),
+])
+def test_merge_intervals(intervals, expected):
+    merged = merge_intervals((at(start), at(end)) for start, end in intervals)
+    assert merged == [(at(start), at(end)) for start, end in expected]
+
+
+def test_free_day_ends_exactly_at_close():
+    slots = free_slots([], OPEN, CLOSE, duration=60, step=30)
+    assert slots[0] == (at('09:00'), at('10:00'))
+    assert slots[-1] == (at('17:00'), CLOSE)
+    assert len(slots) == 17
+
+
+def test_busy_ending_on_step_boundary():
+    busy = [(at('09:00'), at('10:00'))]
+    assert starts(free_slots(busy, OPEN, CLOSE, duration=60, step=30))[:2] == ['10:00', '10:30']
+
+
+def test_busy_ending_between_steps_rounds_up():
+    busy = [(at('09:00'), at('10:10'))]
+    assert starts(free_slots(busy, OPEN, CLOSE, duration=60, step=30))[0] == '10:30'
+
+
+def test_adjacent_busy_intervals_leave_no_gap():
+    busy = merge_intervals([(at('10:00'), at('11:00')), (at('11:00'), at('12:00'))])
+    slots = starts(free_slots(busy, OPEN, CLOSE, duration=60, step=30))
+    assert slots[:3] == ['09:00', '12:00', '12:30']
+
+
+def test_window_between_busy_intervals_fits_exactly():
+    busy = [(at('09:00'), at('10:00')), (at('11:00'), at('18:00'))]
+    assert free_slots(busy, OPEN, CLOSE, duration=60, step=30) == [(at('10:00'), at('11:00'))]
+
+
+def test_busy_until_close_leaves_nothing_after():
+    busy = [(at('16:30'), CLOSE)]
+    assert starts(free_slots(busy, OPEN, CLOSE, duration=60, step=30))[-1] == '15:30'
+
+
+def test_duration_longer_than_working_day():
+    assert free_slots([], OPEN, CLOSE, duration=10 * 60, step=30) == []
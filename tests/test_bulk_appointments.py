@@ -0,0 +1,24 @@
+"""POST /appointments/bulk: занятость мастера проверяется с учетом длительности услуг"""
+import pytest
+
+BUSY = "Мастер занят в это время"
+
+
+@pytest.mark.parametrize('batch_size', [100, 2])
+def test_overlapping_rows_rejected(client, admin_headers, booking, batch_size):
+    # Услуга длится 60 минут; в базе уже есть запись на 10:00
+    created = client.post('/appointment', json={**booking, 'appointment_date': '2030-02-01 10:00'},
+                          headers=admin_headers)
+    assert created.status_code == 201
+
+    starts = ['2030-02-01 10:30', '2030-02-01 12:00', '2030-02-01 12:30', '2030-02-01 13:00', '2030-02-01 11:00']
+    response = client.post(
+        f'/appointments/bulk?batch_size={batch_size}',
+        json=[{**booking, 'appointment_date': start} for start in starts],
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    report = response.get_json()
+    # 10:30 пересекается с записью в базе, 12:30 - с 12:00 из того же импорта
+    assert sorted((error['index'], error['message']) for error in report['errors']) == [(0, BUSY), (2, BUSY)]
+    assert report['inserted'] == 3
@@ -0,0 +1,77 @@
+"""Фильтры списка в клиенте без базы: кэш (LocalCache) и matches_filters отбирают те же записи, что сервер"""
+from datetime import datetime
+
+import pytest
+from werkzeug.http import http_date
+
+from back.queries import APPOINTMENT_FILTERS, appointment_filters
+from client.appointments_model import matches_filters
+from client.local_cache import LocalCache
+
+# Записи у границ дней; appointment_date - как в ответе GET /appointment
+APPOINTMENTS = [
+    (1, datetime(2031, 5, 4, 23, 59), 1, 10, 'Запланировано'),
+    (2, datetime(2031, 5, 5, 0, 0), 1, 11, 'Завершено'),
+    (3, datetime(2031, 5, 5, 10, 0), 2, 10, 'Запланировано'),
+    (4, datetime(2031, 5, 6, 23, 59, 59), 2, 11, 'Запланировано'),
+    (5, datetime(2031, 5, 7, 0, 0), 1, 10, 'Завершено'),
+]
+
+ITEMS = [
+    {'appointment_id': appointment_id, 'client_name': 'Клиент', 'master_name': 'Мастер', 'service_name': 'Услуга',
+     'appointment_date': http_date(appointment_date), 'status': status, 'payment_amount': None,
+     'master_id': master_id, 'client_id': client_id}
+    for appointment_id, appointment_date, master_id, client_id, status in APPOINTMENTS
+]
+
+# Фильтры - строки, как в параметрах GET /appointment
+FILTERS = [
+    {},
+    {'date_from': '2031-05-05'},
+    {'date_to': '2031-05-06'},
+    {'date_from': '2031-05-05', 'date_to': '2031-05-05'},
+    {'date_from': '2031-05-05', 'date_to': '2031-05-06'},
+    {'date_from': '2031-05-06', 'date_to': '2031-05-05'},
+    {'master_id': '1'},
+    {'client_id': '11'},
+    {'status': 'Завершено'},
+    {'master_id': '2', 'date_from': '2031-05-06'},
+    {'master_id': '1', 'client_id': '10', 'status': 'Завершено', 'date_to': '2031-05-07'},
+    {'master_id': '3'},
+    {'master_id': '', 'status': '', 'date_from': ''},
+]
+
+
+def server_ids(filters):
+    """ID записей, которые отобрал бы сервер: условия appointment_filters, вычисленные над APPOINTMENTS"""
+    conditions, params = appointment_filters(filters)
+    checks = {
+        APPOINTMENT_FILTERS['date_from']: lambda row: row[1] >= params['range_start'],
+        APPOINTMENT_FILTERS['date_to']: lambda row: row[1] < params['range_end'],
+        APPOINTMENT_FILTERS['master_id']: lambda row: row[2] == params['master_id'],
+        APPOINTMENT_FILTERS['client_id']: lambda row: row[3] == params['client_id'],
+        APPOINTMENT_FILTERS['status']: lambda row: row[4] == params['status'],
+    }
+    return [row[0] for row in APPOINTMENTS if all(checks[condition](row) for condition in conditions)]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LocalCache(str(tmp_path / 'cache.sqlite3'))
+    cache.replace_appointments(ITEMS, '100')
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_matches_filters_like_server(filters):
+    assert [item['appointment_id'] for item in ITEMS if matches_filters(item, filters)] == server_ids(filters)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_cache_filters_like_server(cache, filters):
+    cursor, appointments = cache.load_appointments(filters)
+    assert cursor == '100'
+    assert [item['appointment_id'] for item in appointments] == server_ids(filters)
+    # Записи из кэша проходят тот же фильтр, что и изменения с сервера
+    assert all(matches_filters(item, filters) for item in appointments)
@@ -0,0 +1,37 @@
+"""ETag справочников различает формат и сжатие ответа"""
+import pytest
+
+JSON = {'Accept': 'application/json', 'Accept-Encoding': 'identity'}
+GZIP_JSON = {'Accept': 'application/json', 'Accept-Encoding': 'gzip'}
+
+
+def get(client, headers, extra):
+    return client.get('/services', headers={**headers, **extra})
+
+
+def test_etag_differs_per_representation(client, admin_headers):
+    plain = get(client, admin_headers, JSON)
+    gzipped = get(client, admin_headers, GZIP_JSON)
+    assert plain.status_code == gzipped.status_code == 200
+    assert plain.headers['ETag'] != gzipped.headers['ETag']
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    # ETag несжатого тела не подтверждает сжатое
+    response = get(client, admin_headers, {**GZIP_JSON, 'If-None-Match': plain.headers['ETag']})
+    assert response.status_code == 200
+
+
+def test_etag_differs_for_msgpack(client, admin_headers):
+    pytest.importorskip('msgpack')
+    plain = get(client, admin_headers, JSON)
+    packed = get(client, admin_headers, {'Accept': 'application/msgpack', 'Accept-Encoding': 'identity'})
+    assert packed.mimetype == 'application/msgpack'
+    assert plain.headers['ETag'] != packed.headers['ETag']
+
+
+def test_weak_if_none_match(client, admin_headers):
+    etag = get(client, admin_headers, JSON).headers['ETag']
+    for tag in (etag, f'W/{etag}'):
+        response = get(client, admin_headers, {**JSON, 'If-None-Match': tag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
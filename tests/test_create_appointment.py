@@ -0,0 +1,100 @@
+"""POST /appointment: создание записи и все ответы с ошибкой выполняются одним запросом к базе"""
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, text
+
+from back.db import db
+from back.queries import CREATE_APPOINTMENT
+
+
+@contextmanager
+def count_statements(app):
+    """Список SQL, отправленных в базу внутри блока"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def post_appointment(app, client, headers, data):
+    with count_statements(app) as statements:
+        response = client.post('/appointment', json=data, headers=headers)
+    return response, statements
+
+
+def test_created_in_one_statement(app, client, admin_headers, booking):
+    response, statements = post_appointment(
+        app, client, admin_headers, {**booking, 'appointment_date': '2030-01-10 10:00'}
+    )
+    assert response.status_code == 201
+    assert response.get_json()['appointment_id']
+    assert len(statements) == 1
+
+
+def test_busy_master_in_one_statement(app, client, admin_headers, booking):
+    first, _ = post_appointment(app, client, admin_headers, {**booking, 'appointment_date': '2030-01-10 10:00'})
+    assert first.status_code == 201
+
+    # Услуга длится 60 минут: 10:30 пересекается с записью на 10:00
+    response, statements = post_appointment(
+        app, client, admin_headers, {**booking, 'appointment_date': '2030-01-10 10:30'}
+    )
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Мастер занят в это время"
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize('field, message', [
+    ('client_id', "Клиент не найден"),
+    ('master_id', "Мастер не найден"),
+    ('service_id', "Услуга не найдена"),
+])
+def test_not_found_in_one_statement(app, client, admin_headers, booking, field, message):
+    data = {**booking, field: 2_000_000_000, 'appointment_date': '2030-01-10 10:00'}
+    response, statements = post_appointment(app, client, admin_headers, data)
+    assert response.status_code == 404
+    assert response.get_json()['message'] == message
+    assert len(statements) == 1
+
+
+def test_concurrent_booking_waits_for_first(app, admin_headers, booking):
+    """Вторая запись на пересекающееся время ждет незафиксированную первую и получает 400"""
+    with app.app_context():
+        engine = db.engine
+    responses = []
+
+    def post_second():
+        responses.append(app.test_client().post(
+            '/appointment', json={**booking, 'appointment_date': '2030-01-10 10:30'}, headers=admin_headers
+        ))
+
+    with engine.connect() as first, engine.connect() as observer:
+        first.execute(text(CREATE_APPOINTMENT), {**booking, 'appointment_date': '2030-01-10 10:00'})
+        second = threading.Thread(target=post_second)
+        second.start()
+
+        # Ждем, пока вторая транзакция встанет в ожидание первой (строка расписания или
+        # блокировка мастера в триггере); без ожидания обе записи прошли бы проверку
+        deadline = time.monotonic() + 10
+        waiting = False
+        while not waiting and second.is_alive() and time.monotonic() < deadline:
+            waiting = observer.execute(text("SELECT EXISTS (SELECT 1 FROM pg_locks WHERE NOT granted)")).scalar()
+            observer.rollback()
+            time.sleep(0.05)
+        first.commit()
+        second.join(10)
+
+    assert waiting
+    assert responses[0].status_code == 400
+    assert responses[0].get_json()['message'] == "Мастер занят в это время"
@@ -0,0 +1,49 @@
+"""Списки в MessagePack (имена полей и строки-массивы) совпадают с JSON-ответом"""
+import pytest
+
+msgpack = pytest.importorskip('msgpack')
+
+JSON = {'Accept': 'application/json', 'Accept-Encoding': 'identity'}
+MSGPACK = {'Accept': 'application/msgpack', 'Accept-Encoding': 'identity'}
+
+
+def unpack(body):
+    """Разбор так же, как в client/api.py: массив имен полей, затем массивы строк"""
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(body)
+    fields, *parts = unpacker
+    return [dict(zip(fields, row)) for part in parts for row in part]
+
+
+def both(client, headers, path):
+    # Потоковое тело читается до следующего запроса: оно выполняется в контексте своего запроса
+    response = client.get(path, headers={**headers, **JSON})
+    assert response.status_code == 200
+    expected = response.get_json()
+    response = client.get(path, headers={**headers, **MSGPACK})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/msgpack'
+    return expected, unpack(response.get_data())
+
+
+def test_lists_match_json(client, admin_headers, booking):
+    for date in ('2030-03-01 10:00', '2030-03-01 12:00'):
+        client.post('/appointment', json={**booking, 'appointment_date': date}, headers=admin_headers)
+    paths = ('/services', '/clients', '/masters', '/appointment?limit=5',
+             f"/appointment?master_id={booking['master_id']}")
+    for path in paths:
+        expected, decoded = both(client, admin_headers, path)
+        assert decoded == expected, path
+    assert len(decoded) == 2
+
+
+def test_masters_fields(client, admin_headers, booking):
+    expected, decoded = both(client, admin_headers, '/masters')
+    master = next(item for item in decoded if item['master_id'] == booking['master_id'])
+    assert set(master) == {'master_id', 'name', 'phone'}
+    assert master['name'] == 'Тест'
+
+
+def test_empty_list(client, admin_headers, booking):
+    expected, decoded = both(client, admin_headers, f"/appointment?client_id={booking['client_id']}")
+    assert expected == decoded == []
@@ -0,0 +1,72 @@
+"""Рассыльщик событий /events без базы: подписка, раздача и отключение подписчиков"""
+import asyncio
+
+from flask import Flask
+
+import back.events
+from back.asgi import AsyncSubscriber
+from back.events import EventBroker, Subscriber
+
+
+def make_broker(max_connections=10):
+    app = Flask(__name__)
+    app.config['EVENTS_MAX_CONNECTIONS'] = max_connections
+    broker = EventBroker(app)
+    # Поток рассыльщика в этих тестах не нужен
+    broker.thread = object()
+    return broker
+
+
+def test_first_subscriber_reads_cursor_outside_lock(monkeypatch):
+    broker = make_broker()
+    calls = []
+
+    def current_change_cursor():
+        assert not broker.lock.locked()
+        calls.append(1)
+        return '100'
+
+    monkeypatch.setattr(back.events, 'current_change_cursor', current_change_cursor)
+    assert broker.subscribe(Subscriber(10))
+    assert broker.subscribe(Subscriber(10))
+    assert broker.cursor == '100'
+    assert len(calls) == 1
+
+
+def test_subscribe_limit(monkeypatch):
+    broker = make_broker(max_connections=1)
+    monkeypatch.setattr(back.events, 'current_change_cursor', lambda: '100')
+    assert broker.subscribe(Subscriber(10))
+    assert not broker.subscribe(Subscriber(10))
+
+
+def test_publish_drops_closed_async_subscriber():
+    broker = make_broker()
+    alive = Subscriber(10)
+    loop = asyncio.new_event_loop()
+    closed = AsyncSubscriber(10, loop)
+    loop.close()
+    broker.subscribers = {alive, closed}
+    broker.cursor = '100'
+
+    broker.publish('101', 'event')
+    assert broker.subscribers == {alive}
+    assert broker.cursor == '101'
+    assert alive.queue.get_nowait() == 'event'
+
+
+def test_overflowed_subscriber_stays_until_reset():
+    broker = make_broker()
+    subscriber = Subscriber(1)
+    broker.subscribers = {subscriber}
+    broker.publish('101', 'first')
+    broker.publish('102', 'second')
+    assert subscriber.overflowed
+    assert broker.subscribers == {subscriber}
+
+
+def test_cursor_reset_without_subscribers():
+    broker = make_broker()
+    broker.cursor = '100'
+    broker.publish('101', None)
+    assert broker.cursor is None
@@ -0,0 +1,102 @@
+"""Хеширование паролей в пуле процессов (back/hashing.py): перегрузка пула, таймаут и пересчет хеша при входе"""
+import time
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+import back.auth
+import back.hashing
+from back.db import db
+from back.hashing import PoolSaturated, check_password
+
+PASSWORD = 'secret'
+
+
+def slow_checkpw(password, password_hash):
+    """Заглушка bcrypt.checkpw для пула: держит процесс пула дольше BCRYPT_TIMEOUT"""
+    time.sleep(0.5)
+    return True
+
+
+@pytest.fixture
+def user(app, client, monkeypatch):
+    """Пользователь с хешем стоимости 4; хеш считается в текущем потоке"""
+    username = f'test-{uuid.uuid4().hex[:12]}'
+    with monkeypatch.context() as patch:
+        patch.setitem(app.config, 'BCRYPT_POOL_SIZE', 0)
+        patch.setitem(app.config, 'BCRYPT_ROUNDS', 4)
+        response = client.post('/auth/register', json={'username': username, 'password': PASSWORD})
+    assert response.status_code == 201
+    yield username
+    with app.app_context():
+        db.session.execute(text("DELETE FROM users WHERE username = :username"), {'username': username})
+        db.session.commit()
+
+
+def password_hash(app, username):
+    with app.app_context():
+        return db.session.execute(
+            text("SELECT password_hash FROM users WHERE username = :username"), {'username': username}
+        ).scalar()
+
+
+def login(client, username):
+    return client.post('/auth/login', json={'username': username, 'password': PASSWORD})
+
+
+def assert_busy(response):
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_timeout_and_saturated_pool(app, client, user, monkeypatch):
+    # Пул из одного процесса без очереди; проверка пароля дольше таймаута
+    monkeypatch.setitem(app.config, 'BCRYPT_POOL_SIZE', 1)
+    monkeypatch.setitem(app.config, 'BCRYPT_QUEUE_LIMIT', 0)
+    monkeypatch.setitem(app.config, 'BCRYPT_ROUNDS', 4)
+    monkeypatch.setitem(app.config, 'BCRYPT_TIMEOUT', 0.05)
+    monkeypatch.setattr(back.hashing, '_checkpw', slow_checkpw)
+
+    # Первый вход не дождался пула (HashTimeout), но его задача еще занимает единственный процесс
+    assert_busy(login(client, user))
+    with app.app_context():
+        with pytest.raises(PoolSaturated):
+            check_password(PASSWORD, password_hash(app, user))
+    assert_busy(login(client, user))
+
+    # Задача завершилась - место в пуле освободилось
+    time.sleep(0.6)
+    monkeypatch.setitem(app.config, 'BCRYPT_TIMEOUT', 5)
+    assert login(client, user).status_code == 200
+
+
+def test_rehash_on_login(app, client, user, monkeypatch):
+    monkeypatch.setitem(app.config, 'BCRYPT_POOL_SIZE', 1)
+    monkeypatch.setitem(app.config, 'BCRYPT_ROUNDS', 5)
+    old_hash = password_hash(app, user)
+    assert old_hash.startswith('$2b$04$')
+
+    response = login(client, user)
+    assert response.status_code == 200
+    assert 'access_token' in response.get_json()
+    new_hash = password_hash(app, user)
+    assert new_hash.startswith('$2b$05$')
+
+    # Стоимость совпадает с настройкой - хеш больше не меняется
+    assert login(client, user).status_code == 200
+    assert password_hash(app, user) == new_hash
+
+
+def test_rehash_deferred_when_pool_busy(app, client, user, monkeypatch):
+    monkeypatch.setitem(app.config, 'BCRYPT_POOL_SIZE', 0)
+    monkeypatch.setitem(app.config, 'BCRYPT_ROUNDS', 5)
+    old_hash = password_hash(app, user)
+
+    def saturated(password):
+        raise PoolSaturated()
+
+    monkeypatch.setattr(back.auth, 'hash_password', saturated)
+    # Вход проходит, пересчет откладывается до следующего входа
+    assert login(client, user).status_code == 200
+    assert password_hash(app, user) == old_hash
@@ -0,0 +1,62 @@
+"""GET /metrics: доступ по токену или роли и учет потоковых ответов после отправки тела"""
+from flask_jwt_extended import create_access_token
+
+from back.metrics import registry
+
+
+def observed(name, route, method='GET'):
+    """(count, sum) гистограммы маршрута или (0, 0), если наблюдений не было"""
+    histogram = registry.histograms.get((name, route, method))
+    return (histogram.count, histogram.sum) if histogram else (0, 0)
+
+
+def test_metrics_require_admin(app, client, admin_headers):
+    assert client.get('/metrics').status_code == 401
+
+    with app.app_context():
+        token = create_access_token(identity='2', additional_claims={'role_id': 2})
+    assert client.get('/metrics', headers={'Authorization': f'Bearer {token}'}).status_code == 403
+
+    response = client.get('/metrics', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert '# TYPE nail_salon_request_duration_seconds histogram' in response.get_data(as_text=True)
+
+
+def test_metrics_token(app, client, admin_headers, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'scrape-secret')
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    # С токеном сборщика JWT администратора не подходит
+    assert client.get('/metrics', headers=admin_headers).status_code == 401
+
+
+def test_streamed_response_recorded_after_body(client, admin_headers, booking):
+    created = client.post('/appointment', json={**booking, 'appointment_date': '2031-07-01 10:00'},
+                          headers=admin_headers)
+    assert created.status_code == 201
+    count, rows = observed('nail_salon_request_rows', '/appointment')
+
+    # Без limit список отдается потоком: запросы к базе выполняются во время отправки тела
+    response = client.get('/appointment', headers=admin_headers)
+    assert observed('nail_salon_request_rows', '/appointment') == (count, rows)
+    body = response.get_data()
+    response.close()
+
+    assert body
+    new_count, new_rows = observed('nail_salon_request_rows', '/appointment')
+    assert new_count == count + 1
+    assert new_rows > rows
+
+
+def test_event_stream_counted_without_duration(client, admin_headers):
+    key = ('/events', 'GET', '200')
+    responses = registry.responses.get(key, 0)
+
+    response = client.get('/events', headers=admin_headers)
+    assert response.status_code == 200
+    assert next(response.response)
+    response.close()
+
+    assert registry.responses.get(key, 0) == responses + 1
+    assert observed('nail_salon_request_duration_seconds', '/events') == (0, 0)
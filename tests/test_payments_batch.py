@@ -0,0 +1,122 @@
+"""POST /payments/batch: ошибочные оплаты пропускаются, остальные проводятся и попадают в revenue_daily"""
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from back.db import db
+
+# Таких ID в тестовой базе нет
+MISSING_ID = 2 ** 31 - 1
+
+
+@pytest.fixture
+def booked(client, admin_headers, booking):
+    """Две записи мастера на 2031-08-01"""
+    ids = []
+    for appointment_date in ('2031-08-01 10:00', '2031-08-01 12:00'):
+        response = client.post('/appointment', json={**booking, 'appointment_date': appointment_date},
+                               headers=admin_headers)
+        assert response.status_code == 201
+        ids.append(response.get_json()['appointment_id'])
+    return ids
+
+
+def payment(booking, appointment_id, amount=100, method='Карта', **fields):
+    return {'client_id': booking['client_id'], 'appointment_id': appointment_id, 'payment_amount': amount,
+            'payment_method': method, **fields}
+
+
+def post_batch(client, headers, payments):
+    response = client.post('/payments/batch', json=payments, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def statuses(app, appointment_ids):
+    with app.app_context():
+        rows = db.session.execute(
+            text("SELECT appointment_id, status FROM appointments WHERE appointment_id = ANY(:ids)"),
+            {'ids': appointment_ids}
+        )
+        return dict(rows.fetchall())
+
+
+def payment_count(app, client_id):
+    with app.app_context():
+        return db.session.execute(
+            text("SELECT COUNT(*) FROM payments WHERE client_id = :client_id"), {'client_id': client_id}
+        ).scalar()
+
+
+def test_partial_failure(app, client, admin_headers, booking, booked):
+    incomplete = payment(booking, booked[1])
+    del incomplete['payment_method']
+    report = post_batch(client, admin_headers, [
+        payment(booking, booked[0]),
+        payment(booking, booked[1], amount='сто'),
+        incomplete,
+    ])
+
+    assert report['received'] == 3
+    assert report['posted'] == 1
+    assert report['results'][0] == {'index': 0, 'status': 'ok', 'appointment_id': booked[0]}
+    assert [result['status'] for result in report['results'][1:]] == ['error', 'error']
+    assert report['results'][1]['message'] == "Поле payment_amount должно быть числом"
+
+    # Проведена только верная оплата, и завершена только ее запись
+    assert payment_count(app, booking['client_id']) == 1
+    assert statuses(app, booked)[booked[0]] == 'Завершено'
+    assert statuses(app, booked)[booked[1]] != 'Завершено'
+
+
+def test_missing_appointments_and_clients(app, client, admin_headers, booking, booked):
+    report = post_batch(client, admin_headers, [
+        payment(booking, MISSING_ID),
+        payment(booking, booked[0], client_id=MISSING_ID),
+        payment(booking, booked[1]),
+    ])
+
+    assert report['posted'] == 1
+    assert [(result['status'], result.get('message')) for result in report['results']] == [
+        ('error', "Запись не найдена"),
+        ('error', "Клиент не найден"),
+        ('ok', None),
+    ]
+    assert payment_count(app, booking['client_id']) == 1
+    assert statuses(app, booked)[booked[0]] != 'Завершено'
+
+
+def test_all_payments_rejected(app, client, admin_headers, booking):
+    report = post_batch(client, admin_headers, [payment(booking, MISSING_ID)])
+    assert report['posted'] == 0
+    assert payment_count(app, booking['client_id']) == 0
+
+
+def test_revenue_daily_after_batch(app, client, admin_headers, booking, booked):
+    post_batch(client, admin_headers, [
+        payment(booking, booked[0], amount=100),
+        payment(booking, booked[1], amount=150),
+        payment(booking, booked[1], amount=30, method='Наличные'),
+        payment(booking, MISSING_ID, amount=1000),
+    ])
+
+    with app.app_context():
+        rows = db.session.execute(text("""
+            SELECT revenue_date, service_id, payment_method, payment_count, revenue
+            FROM revenue_daily
+            WHERE master_id = :master_id
+            ORDER BY payment_method
+        """), {'master_id': booking['master_id']}).fetchall()
+    # Сводка ведется по дню оплаты, а не по дню записи
+    today = date.today()
+    assert [tuple(row) for row in rows] == [
+        (today, booking['service_id'], 'Карта', 2, 250),
+        (today, booking['service_id'], 'Наличные', 1, 30),
+    ]
+
+    response = client.get('/reports/revenue', query_string={'from': today.isoformat(), 'to': today.isoformat(),
+                                                             'group_by': 'master'}, headers=admin_headers)
+    assert response.status_code == 200
+    row = next(row for row in response.get_json()['rows'] if row['master_id'] == booking['master_id'])
+    assert (row['payment_count'], row['revenue']) == (3, 280.0)
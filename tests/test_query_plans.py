@@ -0,0 +1,185 @@
+"""Планы запросов: ни один запрос API не должен читать большие таблицы целиком.
+
+SQL собирается из вызовов text(...) в модулях back/ (строковые литералы и константы) и из
+составных запросов (пагинация записей); для каждого выполняется EXPLAIN на базе с календарем
+из PLAN_APPOINTMENTS записей. Тест падает, если в плане есть Seq Scan по большой таблице.
+Запросы, которые читают таблицу целиком по смыслу (полные списки), перечислены в FULL_SCAN_ALLOWED.
+"""
+import ast
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+import back
+from back.db import db, has_extension
+from back.queries import (
+    APPOINTMENT_ORDER, APPOINTMENT_SELECT, APPOINTMENT_SORTS, CLIENT_SEARCH_NAME_FUZZY, CLIENT_SEARCH_NAME_PREFIX,
+    CLIENT_SEARCH_PHONE, appointment_filters, appointment_list
+)
+from back.reports import UTILIZATION_QUERIES
+from bench.common import seed_calendar
+
+# Размер календаря, на котором планировщик уже выбирает индексы
+PLAN_APPOINTMENTS = 20_000
+
+# Таблицы, которые растут вместе с историей салона
+LARGE_TABLES = ('appointments', 'payments', 'clients')
+
+# Запросы, которым полный просмотр разрешен: (фрагмент SQL, причина)
+FULL_SCAN_ALLOWED = (
+    ("SELECT client_id, client_name, phone, birth_date FROM clients", "полный список клиентов"),
+    (f"{APPOINTMENT_SELECT} {APPOINTMENT_ORDER}".strip(), "потоковая выдача всех записей"),
+)
+
+
+def appointment_query(filters=None, sort='date', limit=False, after=False):
+    """SQL списка записей так, как его собирает GET /appointment"""
+    conditions, _ = appointment_filters(filters or {})
+    order, after_condition = APPOINTMENT_SORTS[sort]
+    if after:
+        conditions.append(after_condition)
+    return appointment_list(conditions, order) + (" LIMIT :limit" if limit else "")
+
+
+TODAY = {'date_from': '2024-03-01', 'date_to': '2024-03-01'}
+
+# Составные запросы, которые собираются в обработчиках через f-строки
+COMPOSED = {
+    'GET /appointment?limit': appointment_query(limit=True),
+    'GET /appointment?limit&after': appointment_query(limit=True, after=True),
+    'GET /appointment (stream)': appointment_query(),
+    'GET /appointment?date_from&date_to (stream)': appointment_query(TODAY),
+    'GET /appointment?master_id&date_from&date_to (stream)': appointment_query({**TODAY, 'master_id': '1'}),
+    'GET /appointment?client_id (stream)': appointment_query({'client_id': '1'}),
+    'GET /appointment?status&limit': appointment_query({'status': 'x'}, limit=True),
+    'GET /appointment?status&date_from (stream)': appointment_query({'status': 'x', 'date_from': '2024-03-01'}),
+    'GET /appointment?sort=-date&limit&after': appointment_query(sort='-date', limit=True, after=True),
+    'GET /appointment?master_id&sort=-date&limit': appointment_query({'master_id': '1'}, sort='-date', limit=True),
+    'bulk: existing client phones': "SELECT phone FROM clients WHERE phone = ANY(:keys)",
+    'GET /clients/search (phone)': CLIENT_SEARCH_PHONE,
+    'GET /clients/search (name prefix)': CLIENT_SEARCH_NAME_PREFIX,
+    'GET /clients/search (name fuzzy)': CLIENT_SEARCH_NAME_FUZZY,
+    **{f'GET /reports/utilization?group_by={group_by}': sql for group_by, sql in UTILIZATION_QUERIES.items()},
+}
+
+# Запросы, которые обработчики выполняют только при установленном расширении PostgreSQL
+REQUIRES_EXTENSION = {
+    'GET /clients/search (name fuzzy)': 'pg_trgm',
+}
+
+SAMPLE_DATE = datetime(2024, 3, 1, 10, 0)
+
+# Значения параметров для EXPLAIN; имена, которых нет здесь, подбираются по суффиксу
+SAMPLE_PARAMS = {
+    'phone': 'bc1',
+    'service_name': 'Услуга 1',
+    'username': 'admin',
+    'table_name': 'clients',
+    'keys': ['bc1', 'bc2'],
+    'dates': [SAMPLE_DATE],
+    'limit': 100,
+    'duration': 60,
+    'range_minutes': 720,
+    'price': 100,
+    'payment_amount': 100,
+    'payment_amounts': [100],
+    'payment_methods': ['Карта'],
+    'days': 31,
+    'open_minutes': 720,
+    'since': '1',
+    'ids': [1, 2, 3],
+    'q': 'Клиент 12',
+    'prefix': 'bc12%',
+    'contains': '%Клиент 12%',
+    'row_indexes': [0, 1, 2],
+    'durations': [60, 60, 60],
+}
+
+
+def sample_value(name):
+    if name in SAMPLE_PARAMS:
+        return SAMPLE_PARAMS[name]
+    if name.endswith('_ids'):
+        return [1, 2, 3]
+    if name.endswith('_id') or re.search(r'_id_\d+$', name):
+        return 1
+    if 'date' in name or name.endswith('_start') or name.endswith('_end'):
+        return SAMPLE_DATE
+    return 'x'
+
+
+def collect_statements():
+    """SQL из text(...) во всех модулях back/: литералы и имена модульных констант"""
+    statements = {}
+    package_dir = Path(back.__file__).parent
+    for module_info in pkgutil.iter_modules([str(package_dir)]):
+        try:
+            module = importlib.import_module(f'back.{module_info.name}')
+        except ImportError:
+            # Модуль не импортируется сам по себе - берем только строковые литералы
+            module = None
+        tree = ast.parse((package_dir / f'{module_info.name}.py').read_text(encoding='utf-8'))
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and getattr(node.func, 'id', None) == 'text' and node.args):
+                continue
+            arg = node.args[0]
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                sql = arg.value
+            elif isinstance(arg, ast.Name) and isinstance(getattr(module, arg.id, None), str):
+                sql = getattr(module, arg.id)
+            else:
+                # f-строки собираются из констант; нужные варианты перечислены в COMPOSED
+                continue
+            statements[f'{module_info.name}.py:{node.lineno}'] = sql
+    statements.update(COMPOSED)
+    return statements
+
+
+def seq_scans(plan):
+    """Таблицы, которые план читает последовательным просмотром"""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', ()):
+        found.extend(seq_scans(child))
+    return found
+
+
+def normalize(sql):
+    return ' '.join(sql.split())
+
+
+STATEMENTS = collect_statements()
+
+
+@pytest.fixture(scope='module')
+def calendar(app):
+    """Календарь записей в тестовой базе; заполняется один раз, пока записей меньше PLAN_APPOINTMENTS"""
+    with app.app_context():
+        if db.session.execute(text("SELECT COUNT(*) FROM appointments")).scalar() < PLAN_APPOINTMENTS:
+            seed_calendar(PLAN_APPOINTMENTS, clients=PLAN_APPOINTMENTS // 10)
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('name', sorted(STATEMENTS))
+def test_index_backed_plan(app, calendar, name):
+    sql = STATEMENTS[name]
+    allowed = {normalize(fragment): reason for fragment, reason in FULL_SCAN_ALLOWED}
+    with app.app_context():
+        extension = REQUIRES_EXTENSION.get(name)
+        if extension and not has_extension(extension):
+            pytest.skip(f"нет расширения {extension}")
+        params = {param: sample_value(param) for param in re.findall(r'(?<!:):(\w+)', sql)}
+        try:
+            plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()[0]['Plan']
+        finally:
+            db.session.rollback()
+
+    scanned = sorted({table for table in seq_scans(plan) if table in LARGE_TABLES})
+    assert not scanned or normalize(sql) in allowed, f"Seq Scan по {', '.join(scanned)}: {normalize(sql)}"
@@ -0,0 +1,90 @@
+"""GET /reports/revenue и /reports/utilization: отчеты из сводок revenue_daily и master_schedule"""
+from datetime import date
+
+import pytest
+
+# Салон открыт с 09:00 до 21:00
+OPEN_MINUTES = 12 * 60
+
+
+@pytest.fixture
+def booked(client, admin_headers, booking):
+    """Три записи мастера по 60 минут: две 2031-05-05 и одна 2031-05-06"""
+    ids = []
+    for appointment_date in ('2031-05-05 10:00', '2031-05-05 12:00', '2031-05-06 10:00'):
+        response = client.post('/appointment', json={**booking, 'appointment_date': appointment_date},
+                               headers=admin_headers)
+        assert response.status_code == 201
+        ids.append(response.get_json()['appointment_id'])
+    return ids
+
+
+def report(client, headers, name, **params):
+    response = client.get(f'/reports/{name}', query_string=params, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def row_for(result, key, value):
+    rows = [row for row in result['rows'] if row[key] == value]
+    assert len(rows) == 1
+    return rows[0]
+
+
+def test_utilization_by_master(client, admin_headers, booking, booked):
+    result = report(client, admin_headers, 'utilization', **{'from': '2031-05-04', 'to': '2031-05-07'},
+                    group_by='master')
+    row = row_for(result, 'master_id', booking['master_id'])
+    assert row['appointment_count'] == 3
+    assert row['booked_minutes'] == 180
+    # Рабочее время - только два дня с записями, а не все четыре дня периода
+    assert row['available_minutes'] == 2 * OPEN_MINUTES
+    assert row['utilization'] == round(180 / (2 * OPEN_MINUTES), 4)
+
+
+def test_utilization_by_day_counts_working_masters(client, admin_headers, booked):
+    result = report(client, admin_headers, 'utilization', **{'from': '2031-05-05', 'to': '2031-05-06'},
+                    group_by='day')
+    assert [row['day'] for row in result['rows']] == ['2031-05-05', '2031-05-06']
+    first = result['rows'][0]
+    assert first['booked_minutes'] == 120
+    assert first['available_minutes'] == OPEN_MINUTES
+
+
+def test_utilization_by_service(client, admin_headers, booking, booked):
+    result = report(client, admin_headers, 'utilization', **{'from': '2031-05-05', 'to': '2031-05-05'},
+                    group_by='service')
+    row = row_for(result, 'service_id', booking['service_id'])
+    assert row['appointment_count'] == 2
+    assert row['booked_minutes'] == 120
+    assert row['available_minutes'] == OPEN_MINUTES
+
+
+def test_revenue_after_payment(client, admin_headers, booking, booked):
+    response = client.post('/payment', json={
+        'client_id': booking['client_id'],
+        'appointment_id': booked[0],
+        'payment_amount': 100,
+        'payment_method': 'Карта'
+    }, headers=admin_headers)
+    assert response.status_code == 200
+
+    today = date.today().isoformat()
+    result = report(client, admin_headers, 'revenue', **{'from': today, 'to': today}, group_by='master')
+    row = row_for(result, 'master_id', booking['master_id'])
+    assert row['payment_count'] == 1
+    assert row['revenue'] == 100.0
+
+    result = report(client, admin_headers, 'revenue', **{'from': today, 'to': today}, group_by='service')
+    assert row_for(result, 'service_id', booking['service_id'])['revenue'] == 100.0
+
+
+@pytest.mark.parametrize('name, params', [
+    ('revenue', {'from': '2031-05-05'}),
+    ('revenue', {'from': '2031-05-06', 'to': '2031-05-05'}),
+    ('revenue', {'from': '2031-05-05', 'to': '2031-05-06', 'group_by': 'client'}),
+    ('utilization', {'from': '2031-05-05', 'to': '2031-05-06', 'group_by': 'payment_method'}),
+])
+def test_invalid_params(client, admin_headers, name, params):
+    response = client.get(f'/reports/{name}', query_string=params, headers=admin_headers)
+    assert response.status_code == 400
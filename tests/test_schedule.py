@@ -0,0 +1,115 @@
+"""Расписание master_schedule: GET /schedule и согласованность с записями после создания, оплаты и импорта"""
+import pytest
+from sqlalchemy import text
+
+from back.db import db
+from back.schedule import SLOTS_PER_DAY, refresh_schedule
+
+SCHEDULE_ROWS = """
+    SELECT schedule_date, booked_minutes, CAST(slot_bitmap AS text) AS slots, appointment_count, completed_count
+    FROM master_schedule
+    WHERE master_id = :master_id
+    ORDER BY schedule_date
+"""
+
+
+def slots(*ranges):
+    """Маска слотов по 15 минут: ranges - пары (первый слот, число слотов)"""
+    bits = ['0'] * SLOTS_PER_DAY
+    for first, count in ranges:
+        bits[first:first + count] = ['1'] * count
+    return ''.join(bits)
+
+
+def schedule_rows(app, master_id):
+    with app.app_context():
+        rows = db.session.execute(text(SCHEDULE_ROWS), {'master_id': master_id}).fetchall()
+        return [tuple(row) for row in rows]
+
+
+def assert_consistent(app, master_id):
+    """Расписание мастера совпадает с пересчетом по таблице appointments"""
+    incremental = schedule_rows(app, master_id)
+    with app.app_context():
+        refresh_schedule([(master_id, row[0]) for row in incremental])
+        refreshed = [tuple(row) for row in db.session.execute(text(SCHEDULE_ROWS), {'master_id': master_id})]
+        db.session.rollback()
+    assert incremental == refreshed
+
+
+def create(client, headers, booking, appointment_date):
+    response = client.post('/appointment', json={**booking, 'appointment_date': appointment_date}, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['appointment_id']
+
+
+def test_get_schedule_after_create(app, client, admin_headers, booking):
+    create(client, admin_headers, booking, '2031-06-02 10:00')
+    create(client, admin_headers, booking, '2031-06-02 11:30')
+
+    response = client.get('/schedule', query_string={'date': '2031-06-02'}, headers=admin_headers)
+    assert response.status_code == 200
+    master = next(item for item in response.get_json()['masters'] if item['master_id'] == booking['master_id'])
+    assert master['booked_minutes'] == 120
+    assert master['appointment_count'] == 2
+    assert master['completed_count'] == 0
+    assert master['slots'] == slots((40, 4), (46, 4))
+    assert_consistent(app, booking['master_id'])
+
+
+def test_payment_completes_in_schedule(app, client, admin_headers, booking):
+    appointment_id = create(client, admin_headers, booking, '2031-06-03 10:00')
+    create(client, admin_headers, booking, '2031-06-03 12:00')
+    for _ in range(2):
+        # Повторная оплата не меняет счетчик: статус уже "Завершено"
+        response = client.post('/payment', json={
+            'client_id': booking['client_id'],
+            'appointment_id': appointment_id,
+            'payment_amount': 100,
+            'payment_method': 'Карта'
+        }, headers=admin_headers)
+        assert response.status_code == 200
+
+    assert schedule_rows(app, booking['master_id'])[0][3:] == (2, 1)
+    assert_consistent(app, booking['master_id'])
+
+
+def test_bulk_import_updates_schedule(app, client, admin_headers, booking):
+    create(client, admin_headers, booking, '2031-06-04 09:00')
+    starts = ['2031-06-04 10:00', '2031-06-04 15:00', '2031-06-05 09:00']
+    response = client.post('/appointments/bulk', json=[{**booking, 'appointment_date': start} for start in starts],
+                           headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 3
+
+    rows = schedule_rows(app, booking['master_id'])
+    assert [(row[0].isoformat(), row[1], row[3]) for row in rows] == [('2031-06-04', 180, 3), ('2031-06-05', 60, 1)]
+    assert_consistent(app, booking['master_id'])
+
+
+@pytest.mark.parametrize('import_rows', [False, True])
+def test_appointment_past_midnight_split_by_day(app, client, admin_headers, booking, import_rows):
+    if import_rows:
+        response = client.post('/appointments/bulk', json=[{**booking, 'appointment_date': '2031-06-06 23:30'}],
+                               headers=admin_headers)
+        assert response.get_json()['inserted'] == 1
+    else:
+        create(client, admin_headers, booking, '2031-06-06 23:30')
+
+    rows = schedule_rows(app, booking['master_id'])
+    # Запись считается в дне начала, а 30 минут и слоты - в каждом из двух дней
+    assert [(row[0].isoformat(), row[1], row[2], row[3]) for row in rows] == [
+        ('2031-06-06', 30, slots((94, 2)), 1),
+        ('2031-06-07', 30, slots((0, 2)), 0),
+    ]
+    assert_consistent(app, booking['master_id'])
+
+    # Следующее утро занято до 00:30
+    response = client.post('/appointment', json={**booking, 'appointment_date': '2031-06-07 00:00'},
+                           headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_get_schedule_invalid_date(client, admin_headers):
+    response = client.get('/schedule', query_string={'date': '02.06.2031'}, headers=admin_headers)
+    assert response.status_code == 400
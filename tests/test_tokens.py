@@ -0,0 +1,112 @@
+"""Кэш проверенных токенов и отзыв токенов (back/tokens.py) без базы"""
+import time
+
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token
+
+from back.tokens import (
+    RevokedTokens, TokenCache, bearer_token, cached_jwt_required, get_claims, get_token_cache, init_tokens,
+    is_revoked, revoke_token
+)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2)
+    cache.put('a', {}, {'jti': 'a'})
+    cache.put('b', {}, {'jti': 'b'})
+    assert cache.get('a') is not None  # 'a' становится самым свежим
+    cache.put('c', {}, {'jti': 'c'})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == ({}, {'jti': 'a'})
+    assert cache.get('c') == ({}, {'jti': 'c'})
+
+
+def test_cache_drops_expired_token():
+    cache = TokenCache(max_size=2)
+    cache.put('old', {}, {'exp': time.time() - 1})
+    cache.put('fresh', {}, {'exp': time.time() + 60})
+    assert cache.get('old') is None
+    assert cache.get('fresh') is not None
+
+
+def test_cache_discard():
+    cache = TokenCache(max_size=2)
+    cache.put('a', {}, {})
+    cache.discard('a')
+    cache.discard('missing')
+    assert cache.get('a') is None
+
+
+def test_revoked_tokens_prune_expired_on_add():
+    revoked = RevokedTokens()
+    revoked.add('forever', None)
+    revoked.add('old', time.time() - 1)
+    assert 'old' in revoked
+    revoked.add('new', time.time() + 60)
+    assert 'old' not in revoked
+    assert 'forever' in revoked
+    assert 'new' in revoked
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-with-at-least-32-bytes'
+    app.config['AUTH_TOKEN_CACHE_SIZE'] = 8
+    jwt_manager = JWTManager(app)
+    jwt_manager.token_in_blocklist_loader(lambda header, payload: is_revoked(payload))
+    init_tokens(app)
+
+    @app.route('/claims')
+    @cached_jwt_required()
+    def claims():
+        return jsonify(role_id=get_claims()['role_id'])
+
+    @app.route('/logout', methods=['POST'])
+    @cached_jwt_required()
+    def logout():
+        revoke_token(get_claims(), bearer_token())
+        return jsonify(ok=True)
+
+    return app
+
+
+@pytest.fixture
+def token_app():
+    app = make_app()
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role_id': 2})
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def test_claims_from_cache(token_app):
+    app, headers = token_app
+    client = app.test_client()
+    # Первый запрос проверяет подпись, второй берет claims из кэша
+    for _ in range(2):
+        response = client.get('/claims', headers=headers)
+        assert response.status_code == 200
+        assert response.get_json() == {'role_id': 2}
+    with app.app_context():
+        assert get_token_cache().get(headers['Authorization'][len('Bearer '):]) is not None
+
+
+def test_revoked_token_rejected_from_cache(token_app):
+    app, headers = token_app
+    client = app.test_client()
+    assert client.get('/claims', headers=headers).status_code == 200
+    assert client.post('/logout', headers=headers).status_code == 200
+    assert client.get('/claims', headers=headers).status_code == 401
+
+
+def test_state_is_per_app(token_app):
+    app, headers = token_app
+    other = make_app()
+    assert other.test_client().get('/claims', headers=headers).status_code == 200
+
+    # Отзыв в одном приложении не виден другому: кэш и список отозванных лежат в app.extensions
+    assert app.test_client().post('/logout', headers=headers).status_code == 200
+    assert app.test_client().get('/claims', headers=headers).status_code == 401
+    assert other.test_client().get('/claims', headers=headers).status_code == 200
+    assert other.extensions['token_cache'] is not app.extensions['token_cache']